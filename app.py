@@ -2,11 +2,17 @@
 import streamlit as st
 import datetime
 import os
+import uuid
 import pandas as pd
-import io
 from modules import url_builder
 from modules import data_fetcher
-from modules import data_processor
+from modules import query_cache
+from modules import exporter
+from modules import metrics
+from modules import analytics
+from modules import jobs
+from modules import query_engine
+from modules import citations
 
 # ==============================================================================
 # 1. UI (화면 구성)
@@ -21,6 +27,248 @@ DEFAULT_OR_KEYWORDS = (
     "\"novel memory\", \"advanced memory\", memristor, memristive"
 )
 
+JOB_POLL_INTERVAL_S = 1          # 실행 중인 작업의 진행 상황을 다시 읽는 간격(초)
+JOB_HISTORY_LIMIT = 20           # 사이드바 작업 목록에 보여줄 최근 작업 수
+PAGE_SIZE_OPTIONS = [50, 100, 200]  # 결과 표의 페이지당 행 수 선택지
+MESSAGE_RENDERERS = {'info': st.info, 'success': st.success, 'warning': st.warning, 'error': st.error, 'write': st.write}
+
+
+def session_owner() -> str:
+    """
+    이 브라우저 세션을 나타내는 작업 소유자 값. 작업 목록은 모든 세션이 보지만 취소/삭제/다시 실행은 소유자만 할 수 있습니다.
+    새로 고침해도 같은 값이 유지되도록 URL 쿼리 파라미터(owner)에 둡니다.
+    """
+    owner = st.query_params.get('owner')
+    if not owner:
+        owner = uuid.uuid4().hex
+        st.query_params['owner'] = owner
+    return owner
+
+
+def resume_job(job_id: str, refine_only: bool = False) -> bool:
+    """작업을 다시 실행하고 진행 상황 화면으로 넘어갑니다. 이미 다시 실행 중인 경우(버튼을 두 번 누른 경우 등)에는 경고만 표시합니다."""
+    try:
+        jobs.get_runner().resume(job_id, refine_only=refine_only, owner=session_owner())
+    except ValueError:
+        st.warning("이미 실행 중이거나 다시 실행할 수 없는 작업입니다.")
+        return False
+    st.session_state.job_id = job_id
+    st.session_state.step = "job"
+    return True
+
+
+def split_ui_inputs(ui_inputs: dict):
+    """세션에 저장된 UI 입력값을 (prepare_params 결과, 검색 모드, 수집/정제 옵션)으로 나눕니다."""
+    inputs = ui_inputs.copy()
+    search_mode = inputs.pop('search_mode')
+    run_options = {key: inputs.pop(key) for key in ('use_sharding', 'shard_by_type', 'max_workers', 'overlap_refine', 'parallel_refine', 'profile', 'expand_citations')}
+    # 인용 네트워크를 만들려면 경량 수집 모드에서도 referenced_works를 받아야 합니다.
+    return url_builder.prepare_params(**inputs, with_references=run_options['expand_citations']), search_mode, run_options
+
+
+def submit_job(cache_action: str):
+    """세션에 저장된 입력값으로 수집/정제 작업을 백그라운드에 제출하고, 진행 상황 화면(job)으로 넘어갑니다."""
+    params, search_mode, run_options = split_ui_inputs(st.session_state.ui_inputs)
+    spec = {"params": params, "search_mode": search_mode, "run_options": run_options,
+            "cache_key": st.session_state.cache_key, "cache_query": st.session_state.cache_query,
+            "cache_action": cache_action}
+    job = jobs.get_runner().submit(spec, inputs={k: v for k, v in st.session_state.ui_inputs.items() if k != 'email'},
+                                   owner=session_owner())
+    st.session_state.job_id = job.id
+    st.session_state.step = "job"
+
+
+def start_collection():
+    """세션에 저장된 입력값으로 전체 수집을 시작합니다. (수집 버튼과 통계 화면의 드릴다운에서 함께 사용)"""
+    # 같은 조건(키워드 순서/공백/연도 표기와 무관)으로 수집한 캐시가 있으면 사용 여부를 묻습니다.
+    params, search_mode, _ = split_ui_inputs(st.session_state.ui_inputs)
+    canonical = query_cache.canonical_query(params, search_mode)
+    st.session_state.cache_key = query_cache.cache_key(canonical)
+    st.session_state.cache_query = canonical
+    if query_cache.lookup(st.session_state.cache_key):
+        st.session_state.step = "cache_found"
+    else:
+        submit_job("fresh")
+
+
+def open_job(job: jobs.Job):
+    """끝난 작업의 결과 조회용 데이터베이스를 열고 결과 화면(done)으로 넘어갑니다. (정제 결과 전체를 메모리에 올리지 않습니다)"""
+    # 이 서버 프로세스에서 실행한 작업이면 수집/정제 단계의 성능 지표를 그대로 이어서 씁니다.
+    run = job.run_metrics or metrics.RunMetrics(info=job.state.get('inputs'))
+    result_summary = {"total": 0}
+    if os.path.exists(job.refined_path):
+        with run.stage('open_query_index') as stage:
+            # 조회용 데이터베이스가 없는 이전 작업은 처음 열 때 한 번 만듭니다.
+            stage.extra['rebuilt'] = query_engine.ensure_index(job.refined_path, job.db_path)
+            result_summary = query_engine.summary(job.db_path)
+            stage.rows = result_summary['total']
+    st.session_state.run_metrics = run
+    st.session_state.result_summary = result_summary
+    st.session_state.result_db_mtime = os.path.getmtime(job.db_path) if result_summary['total'] else None
+    st.session_state.harvest_id = job.state.get('harvest_id')
+    st.session_state.job_id = job.id
+    st.session_state.step = "done"
+
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def cached_facet_counts(db_path: str, db_mtime: float, filters: dict) -> dict:
+    """패싯 건수는 필터가 바뀔 때만 다시 셉니다. (정렬/페이지 이동은 재사용, db_mtime은 데이터베이스를 다시 만든 경우 구분용)"""
+    return query_engine.all_facet_counts(db_path, filters)
+
+
+@st.cache_data(show_spinner="내보내기 파일을 만드는 중입니다...")
+def build_export(harvest_id: str, fmt: str, oversize: str, rows: int, _source_path: str, _export_root: str) -> tuple:
+    """
+    내보내기 파일은 데이터프레임 해시가 아니라 수집 ID(정제 결과 파일) 기준으로 한 번만 만듭니다.
+    (파일 경로, 보고서)를 돌려주며, rows는 성능 지표에 기록할 행 수입니다.
+    """
+    exporter.clear_exports(_export_root, keep=harvest_id)
+    output_dir = os.path.join(_export_root, harvest_id)
+    with metrics.stage(f"export_{fmt}", rows=rows) as stage:
+        export_path, report = exporter.export(_source_path, output_dir, fmt, oversize=oversize)
+        stage.bytes = os.path.getsize(export_path)
+    return export_path, report
+
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def citation_overview(workspace: str, graph_mtime: float) -> tuple:
+    """인용 네트워크의 건수 요약과 많이 인용된 논문 표. (graph_mtime은 다시 만든 그래프를 구분하는 데 사용)"""
+    node_table, indptr, indices = citations.load_graph(workspace)
+    harvested = int(node_table['harvested'].sum())
+    counts = {"works": harvested, "external": len(node_table) - harvested, "edges": len(indices),
+              "resolved": int(node_table['resolved'].sum()) - harvested}
+    return counts, citations.most_cited(node_table, indices)
+
+
+def show_citation_network(workspace: str):
+    """수집 작업에서 만든 인용 네트워크(노드 표 + CSR 배열)의 요약을 보여줍니다."""
+    graph_path = os.path.join(workspace, citations.GRAPH_FILENAME)
+    counts, top = citation_overview(workspace, os.path.getmtime(graph_path))
+    with st.expander("🔗 인용 네트워크"):
+        col_works, col_external, col_edges, col_resolved = st.columns(4)
+        col_works.metric("수집 논문", f"{counts['works']:,}")
+        col_external.metric("외부 참고문헌", f"{counts['external']:,}")
+        col_edges.metric("인용 관계", f"{counts['edges']:,}")
+        col_resolved.metric("메타데이터 확인", f"{counts['resolved']:,}")
+        st.markdown(f"**수집 논문들이 많이 인용한 논문 상위 {len(top)}개**")
+        st.dataframe(top[['title', 'publication_year', 'Journal_Name', 'cited_by_count', 'citing_works', 'harvested', 'id']],
+                     hide_index=True, use_container_width=True,
+                     column_config={'citing_works': "인용한 수집 논문 수", 'harvested': "수집 논문"})
+        st.caption(f"그래프 파일: {graph_path} (CSR 배열 indptr/indices), "
+                   f"{os.path.join(workspace, citations.NODES_FILENAME)} (노드 표, 행 번호 = 노드 번호)")
+
+
+@st.fragment
+def show_result_explorer(db_path: str, harvest_inputs: dict):
+    """
+    정제 결과를 필터/정렬하고 한 페이지씩 보여줍니다. 조회는 모두 작업 폴더의 SQLite 데이터베이스에서 하므로
+    결과가 수백만 건이어도 화면에는 보이는 페이지의 행만 올라옵니다. (위젯을 바꾸면 이 영역만 다시 실행)
+    harvest_inputs는 이 결과를 수집할 때의 UI 입력값입니다. (키워드 재검색과 추가 수집에 사용)
+    """
+    info = st.session_state.result_summary
+    filters = {}
+    with st.expander("🔎 필터", expanded=True):
+        # --- 수집한 결과 안에서 키워드로 다시 좁히기: API 요청 없이 로컬 전문 검색 색인에서 찾습니다 ---
+        col_or, col_and = st.columns(2)
+        text_help = ("수집한 논문의 제목·초록·키워드에서 수집할 때와 같은 규칙으로 찾습니다. (띄어쓰기가 있는 키워드는 구문 검색) "
+                     "넓게 검색으로 수집한 경우 본문에서만 일치했던 논문은 찾지 못합니다.")
+        with col_or:
+            or_keywords = url_builder.split_keywords(st.text_input("결과 내 검색: OR 키워드 (쉼표로 구분)", key='text_or', help=text_help))
+        with col_and:
+            and_keywords = url_builder.split_keywords(st.text_input("결과 내 검색: AND 키워드 (쉼표로 구분)", key='text_and', help=text_help))
+        filters['text_query'] = query_engine.text_match(or_keywords, and_keywords, harvest_inputs['search_mode'])
+
+        # 수집할 때의 OR 키워드에 없던 키워드는 수집 데이터에 일부만 있으므로, 그 키워드만 API에서 더 받을 수 있게 합니다.
+        outside = query_engine.terms_outside_harvest(url_builder.split_keywords(harvest_inputs['or_keywords_input']), or_keywords)
+        if outside:
+            col_warning, col_fetch = st.columns([3, 1])
+            with col_warning:
+                st.warning(f"'{', '.join(outside)}'은(는) 수집할 때의 OR 키워드에 없어, 이 키워드로 찾은 결과는 일부일 수 있습니다.")
+            with col_fetch:
+                if st.button("이 키워드만 추가 수집", use_container_width=True):
+                    # 수집 당시의 AND 키워드에 결과 내 검색의 AND 키워드를 더해, 로컬 검색과 같은 범위를 API에서 받습니다.
+                    all_and = url_builder.split_keywords(harvest_inputs['and_keywords_input']) + and_keywords
+                    st.session_state.ui_inputs = dict(harvest_inputs, or_keywords_input=", ".join(outside),
+                                                      and_keywords_input=", ".join(all_and))
+                    start_collection()
+                    st.rerun()
+
+        col_year, col_cited, col_fwci, col_percentile, col_top = st.columns([3, 2, 2, 2, 2])
+        with col_year:
+            if info['min_year'] is not None and info['min_year'] < info['max_year']:
+                year_range = st.slider("출판 연도", info['min_year'], info['max_year'], (info['min_year'], info['max_year']))
+                if year_range != (info['min_year'], info['max_year']):
+                    filters['year_range'] = year_range
+        with col_cited:
+            filters['min_citations'] = st.number_input("최소 피인용 수", min_value=0, max_value=max(info['max_cited_by_count'], 0), value=0)
+        with col_fwci:
+            filters['min_fwci'] = st.number_input("최소 FWCI", min_value=0.0, value=0.0, step=0.5)
+        with col_percentile:
+            filters['min_percentile'] = st.slider("최소 인용 백분위", 0.0, 1.0, 0.0, step=0.01)
+        with col_top:
+            filters['top_10'] = st.checkbox("상위 10% 논문만")
+            filters['top_1'] = st.checkbox("상위 1% 논문만")
+
+        # 패싯 값 목록은 현재 조건에서 건수가 많은 순으로 보여주고, 이미 고른 값은 목록에서 빠지지 않게 붙여 둡니다.
+        for facet in query_engine.FACETS:
+            filters[facet] = st.session_state.get(f"facet_{facet}", [])
+        counts = cached_facet_counts(db_path, st.session_state.result_db_mtime, filters)
+        for col, (facet, (_, label)) in zip(st.columns(len(query_engine.FACETS)), query_engine.FACETS.items()):
+            facet_counts = dict(zip(counts[facet]['value'], counts[facet]['count']))
+            options = list(facet_counts) + [name for name in filters[facet] if name not in facet_counts]
+            with col:
+                filters[facet] = st.multiselect(
+                    label, options, key=f"facet_{facet}", placeholder="전체",
+                    format_func=lambda name, c=facet_counts: f"{name} ({c[name]:,})" if name in c else name)
+
+    col_sort, col_order, col_size, col_page = st.columns(4)
+    with col_sort:
+        sort_by = st.selectbox("정렬 기준", list(query_engine.SORT_COLUMNS), format_func=query_engine.SORT_COLUMNS.get)
+    with col_order:
+        descending = st.radio("정렬 방향", [True, False], format_func={True: "내림차순", False: "오름차순"}.get, horizontal=True)
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", PAGE_SIZE_OPTIONS)
+    # 조건이나 정렬이 바뀌면 첫 페이지로 돌아갑니다.
+    signature = (repr(sorted(filters.items())), sort_by, descending, page_size)
+    if st.session_state.get('result_signature') != signature:
+        st.session_state.result_signature = signature
+        st.session_state.result_page = 1
+    with col_page:
+        page = st.number_input("페이지", min_value=1, key='result_page')
+
+    page_df, total = query_engine.query_page(db_path, filters, sort_by, descending, page, page_size)
+    pages = max(1, -(-total // page_size))
+    st.dataframe(page_df, hide_index=True, use_container_width=True)
+    if not total:
+        st.caption("조건에 맞는 논문이 없습니다.")
+    elif page > pages:
+        st.caption(f"조건에 맞는 논문은 {total:,}건이며 마지막 페이지는 {pages}입니다.")
+    else:
+        st.caption(f"조건에 맞는 논문 {total:,}건 중 {(page - 1) * page_size + 1:,}–{(page - 1) * page_size + len(page_df):,}번째 "
+                   f"({page}/{pages} 페이지)")
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL_S)
+def show_job_progress(job_id: str):
+    """작업 진행 상황을 주기적으로 다시 읽어 표시합니다. 작업이 끝나면 전체 화면을 다시 실행해 다음 단계로 넘어갑니다."""
+    job = jobs.get_runner().get(job_id)
+    if job is None or job.status not in jobs.ACTIVE_STATUSES:
+        # 끝났거나 다른 창에서 삭제된 작업은 전체 화면에서 다음 단계를 정합니다.
+        st.rerun()
+    st.subheader("📈 데이터 수집 현황")
+    phase = jobs.PHASE_LABELS.get(job.state.get('phase'), "수집")
+    st.caption(f"작업 {job.id} · {jobs.STATUS_LABELS[job.status]} ({phase})")
+    for message in job.state.get('messages', []):
+        MESSAGE_RENDERERS.get(message['level'], st.write)(message['message'])
+    st.progress(job.state.get('progress') or 0.0)
+    if job.state.get('status_text'):
+        st.text(job.state['status_text'])
+    if job.owned_by(session_owner()) and st.button("작업 취소", use_container_width=True):
+        jobs.get_runner().cancel(job.id, owner=session_owner())
+        st.rerun(scope="fragment")
+    st.caption("작업은 서버에서 계속 실행되므로 이 창을 닫아도 됩니다. 왼쪽 작업 목록에서 다시 열 수 있습니다.")
+
+
 st.set_page_config(layout="wide")
 st.title(" OpenAlex 논문 데이터 수집")
 
@@ -28,8 +276,52 @@ st.title(" OpenAlex 논문 데이터 수집")
 if 'step' not in st.session_state:
     st.session_state.step = "start"
 
-# --- 입력 섹션: 작업 완료(done) 또는 시작 전(start) 상태일 때만 표시 ---
-if st.session_state.step in ["start", "done"]:
+# 단계별 성능 지표는 세션에 보관한 실행 기록에 쌓습니다. (스크립트가 다시 실행될 때마다 다시 연결)
+metrics.activate(st.session_state.get('run_metrics'))
+
+# --- 작업 목록: 이 서버에서 실행한 모든 수집 작업 (다른 사용자의 작업 포함, 취소/삭제/다시 실행은 내 작업만) ---
+with st.sidebar:
+    st.header("📋 작업 목록")
+    runner = jobs.get_runner()
+    owner = session_owner()
+    history = runner.history(limit=JOB_HISTORY_LIMIT)
+    if not history:
+        st.caption("아직 실행한 작업이 없습니다.")
+    for job in history:
+        owned = job.owned_by(owner)
+        with st.container(border=True):
+            st.markdown(f"**{job.state['label']}**")
+            rows = f" · {job.state['rows']:,}건" if job.state.get('rows') is not None else ""
+            other = "" if owned else " · 다른 세션의 작업"
+            st.caption(f"{jobs.STATUS_LABELS[job.status]} · {job.state['created_at'].replace('T', ' ')}{rows}{other}")
+            col_main, col_sub = st.columns(2)
+            if job.status in jobs.ACTIVE_STATUSES:
+                st.progress(job.state.get('progress') or 0.0)
+                if col_main.button("진행 상황", key=f"view_{job.id}", use_container_width=True):
+                    st.session_state.job_id = job.id
+                    st.session_state.step = "job"
+                    st.rerun()
+                if owned and col_sub.button("취소", key=f"cancel_{job.id}", use_container_width=True):
+                    runner.cancel(job.id, owner=owner)
+                    st.rerun()
+                continue
+            if job.status == 'done':
+                if col_main.button("결과 열기", key=f"open_{job.id}", use_container_width=True):
+                    open_job(job)
+                    st.rerun()
+            elif job.state.get('resumable') and owned:
+                if col_main.button("이어서 실행", key=f"resume_{job.id}", use_container_width=True):
+                    if resume_job(job.id):
+                        st.rerun()
+            if owned and col_sub.button("삭제", key=f"delete_{job.id}", use_container_width=True):
+                runner.delete(job.id, owner=owner)
+                if st.session_state.get('job_id') == job.id:
+                    for key in list(st.session_state.keys()):
+                        del st.session_state[key]
+                st.rerun()
+
+# --- 입력 섹션: 시작 전(start), 통계 보기(analytics), 작업 완료(done) 상태일 때만 표시 ---
+if st.session_state.step in ["start", "analytics", "done"]:
     with st.container(border=True):
         st.header("1. 검색 조건 설정")
         col1, col2 = st.columns(2)
@@ -68,91 +360,227 @@ if st.session_state.step in ["start", "done"]:
 
             email = st.text_input("API 사용 이메일 주소", "test@example.com", help="반드시 본인의 이메일 주소를 입력해야 검색결과를 받을 수 있습니다.")
 
-    # --- 데이터 수집 시작 버튼 ---
-    if st.button("1. 데이터 수집 시작", type="primary", use_container_width=True):
-        st.session_state.step = "collecting"
-        # UI 입력 값들을 세션에 저장
-        st.session_state.ui_inputs = {
+            col_shard, col_workers = st.columns(2)
+            with col_shard:
+                use_sharding = st.checkbox("연도별 병렬 수집", value=True,
+                    help="검색 기간을 연도(및 문서 유형)별로 나누어 동시에 수집한 뒤 하나의 파일로 합칩니다.")
+                shard_by_type = st.checkbox("문서 유형별로도 분할", value=False, disabled=not use_sharding)
+                lean_mode = st.checkbox("경량 수집 모드", value=True,
+                    help="정제에 필요한 필드만 받아(select=) 다운로드 용량과 처리 시간을 줄입니다. 끄면 전체 논문 객체를 받습니다.")
+            with col_workers:
+                max_workers = st.slider("동시 요청 수", min_value=1, max_value=8, value=data_fetcher.DEFAULT_MAX_WORKERS,
+                    disabled=not use_sharding, help="OpenAlex polite pool 한도(초당 10회)는 동시 요청 수와 관계없이 지켜집니다.")
+                parallel_refine = st.checkbox("멀티프로세스 병렬 정제", value=False,
+                    help=f"수집한 파일을 구간별로 나누어 CPU 코어 {os.cpu_count()}개에서 동시에 정제합니다. 대용량 수집에 유리합니다.")
+                overlap_refine = st.checkbox("수집과 동시에 정제", value=True, disabled=parallel_refine,
+                    help="받은 페이지를 수집이 끝나기를 기다리지 않고 바로 정제해 결과 파일에 이어 씁니다. "
+                         "새로 수집할 때만 적용되며, 이어받기·캐시 사용 시와 멀티프로세스 병렬 정제를 켠 경우에는 수집 후 정제합니다.")
+                expand_citations = st.checkbox("인용 네트워크 확장", value=False,
+                    help="수집한 논문의 참고문헌(referenced_works)을 중복 없이 모아 100개씩 묶어 조회하고, 인용 관계를 그래프로 저장합니다.")
+                profile_mode = st.checkbox("성능 분석 모드", value=False,
+                    help="단계마다 cProfile(함수별 시간)과 tracemalloc(메모리 최대 사용량)을 기록합니다. 실행이 느려지므로 원인 분석 시에만 사용하세요.")
+
+    # --- 데이터 수집 시작 / 통계만 보기 버튼 ---
+    ui_inputs = {
         "email": email,
         "or_keywords_input": or_keywords_input,
         "and_keywords_input": and_keywords_input,
         "start_year": start_year,
         "end_year": end_year,
         "include_types_values": include_types_values,
-        "search_mode": 'broad' if '넓게' in search_mode_option else 'precise'
+        "lean": lean_mode,
+        "search_mode": 'broad' if '넓게' in search_mode_option else 'precise',
+        "use_sharding": use_sharding,
+        "shard_by_type": shard_by_type,
+        "max_workers": max_workers,
+        "overlap_refine": overlap_refine and not parallel_refine,
+        "parallel_refine": parallel_refine,
+        "profile": profile_mode,
+        "expand_citations": expand_citations
     }
-        st.rerun()
+    col_collect, col_analytics = st.columns([2, 1])
+    with col_collect:
+        if st.button("1. 데이터 수집 시작", type="primary", use_container_width=True):
+            # UI 입력 값들을 세션에 저장
+            st.session_state.ui_inputs = ui_inputs
+            start_collection()
+            st.rerun()
+    with col_analytics:
+        if st.button("통계만 보기 (전체 수집 없이)", use_container_width=True,
+                     help="OpenAlex의 group_by 집계로 연도/기관/저널/주제별 논문 수만 몇 번의 요청으로 확인합니다."):
+            st.session_state.ui_inputs = ui_inputs
+            st.session_state.analytics_refresh = False
+            st.session_state.step = "analytics"
+            st.rerun()
+
+# --- 통계만 보기: group_by 집계만 받아 차트로 보여주고, 드릴다운할 때만 전체 수집으로 넘어갑니다 ---
+if st.session_state.step == "analytics":
+    params, search_mode, _ = split_ui_inputs(st.session_state.ui_inputs)
+    create_query = url_builder.create_broad_query if search_mode == 'broad' else url_builder.create_precise_query
+    # 집계 결과는 select와 무관하므로 select 없이 요청하고, 캐시 키도 경량 모드 여부와 상관없이 같게 만듭니다.
+    params = dict(params, select_fields=None)
+    canonical = dict(query_cache.canonical_query(params, search_mode), group_by=sorted(analytics.GROUP_BY_FIELDS))
+    try:
+        with st.spinner("집계 요청 중..."):
+            result, from_cache = analytics.get_analytics(
+                create_query(**params), query_cache.cache_key(canonical),
+                refresh=st.session_state.pop('analytics_refresh', False))
+    except Exception as e:
+        st.error(f"집계 요청 중 에러가 발생했습니다: {e}")
+        result = None
+
+    if result is not None:
+        st.header("검색 결과 통계")
+        st.metric("검색된 전체 논문 수", f"{result['total']:,}건")
+        st.caption(f"집계 시각: {result['fetched_at'].replace('T', ' ')}" + (" (캐시된 결과)" if from_cache else ""))
+        chart_cols = st.columns(2)
+        for idx, (item, (_, label)) in enumerate(analytics.GROUP_BY_FIELDS.items()):
+            df = result['groups'][item]
+            with chart_cols[idx % 2]:
+                st.subheader(label)
+                if df.empty:
+                    st.info("집계된 값이 없습니다.")
+                elif item == 'publication_year':
+                    st.bar_chart(df.set_index('name')['count'])
+                else:
+                    st.bar_chart(df.head(analytics.ANALYTICS_TOP_N).set_index('name')['count'], horizontal=True)
+
+        # --- 드릴다운: 전체 기간 또는 특정 연도만 골라 실제 논문 데이터를 수집합니다 ---
+        st.markdown("---")
+        year_counts = dict(zip(result['groups']['publication_year']['name'], result['groups']['publication_year']['count']))
+        scope = st.selectbox("수집 범위", ["검색 기간 전체"] + list(year_counts)[::-1],
+                             format_func=lambda y: f"{y} ({result['total']:,}건)" if y == "검색 기간 전체" else f"{y}년 ({year_counts[y]:,}건)")
+        col_drill, col_reload = st.columns([2, 1])
+        with col_drill:
+            if st.button("이 범위의 논문 전체 수집", type="primary", use_container_width=True):
+                if scope != "검색 기간 전체":
+                    st.session_state.ui_inputs = dict(st.session_state.ui_inputs, start_year=int(scope), end_year=int(scope))
+                start_collection()
+                st.rerun()
+        with col_reload:
+            if st.button("통계 다시 집계", use_container_width=True):
+                st.session_state.analytics_refresh = True
+                st.rerun()
+
+# --- 캐시된 결과가 있는 경우: 그대로 사용 / 신규·변경분만 갱신 / 전체 새로 수집 ---
+if st.session_state.step == "cache_found":
+    cache_meta = query_cache.lookup(st.session_state.cache_key)
+    st.info(f"같은 검색 조건으로 수집한 결과가 캐시에 있습니다. "
+            f"({cache_meta['items']}건, 마지막 수집: {cache_meta['fetched_at'].replace('T', ' ')})")
+    col_use, col_refresh, col_fresh = st.columns(3)
+    for col, label, action in [(col_use, "캐시된 결과 사용", "use"),
+                               (col_refresh, "신규/변경분만 갱신", "refresh"),
+                               (col_fresh, "전체 새로 수집", "fresh")]:
+        with col:
+            if st.button(label, type="primary" if action == "use" else "secondary", use_container_width=True):
+                submit_job(action)
+                st.rerun()
 
 # ==============================================================================
-# 2. 데이터 수집 단계
+# 2. 데이터 수집/정제 단계 (백그라운드 작업)
 # ==============================================================================
-if st.session_state.step == "collecting":
-    with st.spinner("URL 생성 및 데이터 수집 중..."):
-        # 저장된 입력 값으로 URL 생성
-        inputs = st.session_state.ui_inputs.copy()
-        search_mode = inputs.pop('search_mode')
-
-        params = url_builder.prepare_params(**inputs)
-        if search_mode == 'broad':
-            api_url = url_builder.create_broad_query(**params)
-        else:
-            api_url = url_builder.create_precise_query(**params)
-
-        st.subheader("📈 데이터 수집 현황")
-        DATA_DIR = "data"
-        if not os.path.exists(DATA_DIR): os.makedirs(DATA_DIR)
-        output_filepath = os.path.join(DATA_DIR, "collected_data.jsonl")
-
-        data_fetcher.fetch_and_save_incrementally(api_url, output_filepath)
-
-        st.session_state['data_filepath'] = output_filepath
-        st.session_state.step = "processing" # 다음 단계로 전환
+if st.session_state.step == "job":
+    job = jobs.get_runner().get(st.session_state.job_id)
+    if job is None:
+        st.error("작업을 찾을 수 없습니다. 삭제되었을 수 있습니다.")
+        st.session_state.step = "start"
+    elif job.status in jobs.ACTIVE_STATUSES:
+        show_job_progress(job.id)
+    elif job.status == 'done':
+        open_job(job)
+        st.rerun()
+    else:
+        st.session_state.step = "job_failed"
         st.rerun()
 
-# ==============================================================================
-# 3. 데이터 정제 단계
-# ==============================================================================
-if st.session_state.step == "processing":
-    filepath = st.session_state['data_filepath']
-    with st.spinner(f"'{filepath}' 파일을 정제하는 중입니다..."):
-        # data_processor의 마스터 함수 호출
-        final_df = data_processor.process_and_refine_data(filepath)
-        st.session_state['final_df'] = final_df
-        st.session_state.step = "done"
-    st.rerun()
+# --- 수집이 중간에 끊기거나 취소된 경우: 체크포인트에서 이어받거나, 받은 데이터만으로 진행 ---
+if st.session_state.step == "job_failed":
+    job = jobs.get_runner().get(st.session_state.job_id)
+    if job is None:
+        # 다른 창에서 삭제된 작업: 작업 화면에서 안내하고 처음 화면으로 돌아갑니다.
+        st.session_state.step = "job"
+        st.rerun()
+    owned = job.owned_by(session_owner())
+    for message in job.state.get('messages', []):
+        if message['level'] in ('warning', 'error'):
+            MESSAGE_RENDERERS[message['level']](message['message'])
+    st.warning(f"작업이 완료되지 않았습니다. ({jobs.STATUS_LABELS[job.status]}) 저장된 체크포인트부터 이어서 수집할 수 있습니다.")
+    col_resume, col_partial, col_new = st.columns(3)
+    with col_resume:
+        if st.button("이어서 수집", type="primary", use_container_width=True,
+                     disabled=not (owned and job.state.get('resumable'))):
+            if resume_job(job.id):
+                st.rerun()
+    with col_partial:
+        if st.button("지금까지 받은 데이터로 정제", use_container_width=True,
+                     disabled=not (owned and os.path.exists(job.raw_path))):
+            if resume_job(job.id, refine_only=True):
+                st.rerun()
+    with col_new:
+        if st.button("새 검색 시작", use_container_width=True):
+            st.session_state.step = "start"
+            st.rerun()
 
 # ==============================================================================
 # 4. 최종 결과 표시 및 다운로드/초기화
 # ==============================================================================
 if st.session_state.step == "done":
+    job = jobs.get_runner().get(st.session_state.job_id)
     st.subheader("📊 최종 정제 데이터")
-    st.dataframe(st.session_state['final_df'])
-    st.info(f"총 {len(st.session_state['final_df'])}개의 논문 데이터가 처리되었습니다.")
+    if st.session_state.result_summary['total'] and job is not None:
+        # 수집 당시 입력값에 없는 항목(이메일, 이후에 추가된 옵션)은 현재 화면의 값으로 채웁니다.
+        show_result_explorer(job.db_path, dict(ui_inputs, **job.state['inputs']))
+    st.info(f"총 {st.session_state.result_summary['total']:,}개의 논문 데이터가 처리되었습니다.")
+    if job is not None and citations.has_graph(job.workspace):
+        show_citation_network(job.workspace)
 
     col1_dl, col2_reset = st.columns(2)
     with col1_dl:
-        @st.cache_data
-        def convert_df_to_excel(df):
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-            processed_data = output.getvalue()
-            return processed_data
-
-        excel_data = convert_df_to_excel(st.session_state['final_df'])
-        st.download_button(
-            label="📥 엑셀 파일로 다운로드", data=excel_data, file_name="최종_보고서_OpenAlex.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", use_container_width=True)
+        if st.session_state.get('harvest_id') and job is not None and os.path.exists(job.refined_path):
+            fmt_labels = {'xlsx': "엑셀 (.xlsx)", 'csv_zst': "CSV (zstd 압축)", 'parquet': "Parquet"}
+            fmt = st.radio("다운로드 형식", list(fmt_labels), format_func=fmt_labels.get, horizontal=True)
+            oversize = 'truncate'
+            if fmt == 'xlsx':
+                oversize = st.radio(
+                    "엑셀 셀 길이 제한(32,767자)을 넘는 값", ['truncate', 'split'], horizontal=True,
+                    format_func={'truncate': "잘라내기", 'split': "이어지는 컬럼에 나누기"}.get)
+
+            export_args = (st.session_state.harvest_id, fmt, oversize, st.session_state.result_summary['total'],
+                           job.refined_path, job.export_dir)
+            export_path, report = build_export(*export_args)
+            if not os.path.exists(export_path):
+                # 캐시에 남은 경로의 파일이 그사이 지워졌다면 그 항목만 비우고 다시 만듭니다.
+                build_export.clear(*export_args)
+                export_path, report = build_export(*export_args)
+            for col, info in report.items():
+                if col == '_skipped_rows':
+                    st.warning(f"엑셀 시트 행 수 제한으로 {info:,}개 행이 빠졌습니다. CSV나 Parquet 형식을 사용하세요.")
+                else:
+                    action = "나누어 담았습니다" if oversize == 'split' else "잘라냈습니다"
+                    st.warning(f"'{col}' 컬럼의 {info['cells']:,}개 셀이 엑셀 제한을 넘어(최대 {info['max_length']:,}자) {action}.")
+
+            extension, mime = exporter.EXPORT_FORMATS[fmt]
+            with open(export_path, 'rb') as f:
+                st.download_button(
+                    label="📥 파일로 다운로드", data=f, file_name=f"최종_보고서_OpenAlex.{extension}",
+                    mime=mime, use_container_width=True)
 
     with col2_reset:
         if st.button("새 검색 시작", type="secondary", use_container_width=True):
-            if 'data_filepath' in st.session_state:
-                filepath = st.session_state['data_filepath']
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                    st.toast(f"'{filepath}' 데이터 파일이 삭제되었습니다.")
-
+            # 작업 폴더(정제 결과, 압축 원본)는 작업 목록에서 다시 열 수 있도록 남겨 두고 화면 상태만 초기화합니다.
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
 
-            st.rerun()
\ No newline at end of file
+            st.rerun()
+
+    run = st.session_state.get('run_metrics')
+    if run and run.stages:
+        with st.expander("⏱️ 단계별 성능 지표"):
+            st.dataframe(pd.DataFrame(run.summary()).dropna(axis=1, how='all'), hide_index=True, use_container_width=True)
+            # 서버를 다시 시작한 뒤 작업 목록에서 연 경우에는 수집 당시의 보고서가 작업 폴더에만 남아 있습니다.
+            report_path = run.report_path or (job.report_path if job is not None and os.path.exists(job.report_path) else None)
+            st.caption(f"실행 보고서: {report_path or '없음'} (서버 프로세스 최대 메모리 {metrics.peak_rss_mb():,.0f}MB, 모든 작업 합산)")
+            for stage in run.stages:
+                if stage.profile_top:
+                    st.markdown(f"**{stage.name}** 프로파일 (누적 시간 상위 {metrics.PROFILE_TOP_N}개, 전체: `{stage.profile_path}`)")
+                    st.code(stage.profile_top, language=None)
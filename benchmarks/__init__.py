@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""수집/정제/내보내기 파이프라인 벤치마크: 합성 코퍼스 생성기(corpus), 모의 API 서버(mock_server), 시나리오 실행기(run)."""
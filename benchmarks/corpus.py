@@ -0,0 +1,183 @@
+# benchmarks/corpus.py
+"""
+OpenAlex /works 응답과 같은 구조의 합성 작업물(work) 레코드 생성기.
+
+레코드 i는 (seed, i)만으로 결정되므로, 전체 코퍼스를 메모리에 올리지 않고도
+JSONL 파일로 스트리밍하거나(generate_corpus) 모의 서버에서 필요한 레코드만 즉석으로 만들 수 있습니다.
+"""
+import json
+import os
+import random
+import string
+from itertools import accumulate
+
+DEFAULT_SEED = 42
+YEAR_START = 2000
+YEAR_SPAN = 25                    # publication_year = YEAR_START + (i % YEAR_SPAN)
+ID_OFFSET = 1_000_000             # 작업물 id: https://openalex.org/W{ID_OFFSET + i}
+WORK_TYPES = ['article', 'article', 'article', 'article', 'review', 'book-chapter', 'preprint', 'dataset']
+
+VOCAB_SIZE = 5000
+NUM_AUTHORS = 200_000
+NUM_INSTITUTIONS = 2000
+NUM_SOURCES = 800
+NUM_TOPICS = 400
+NUM_KEYWORDS = 3000
+COUNTRIES = ['KR', 'US', 'CN', 'JP', 'DE', 'GB', 'FR', 'IN', 'CA', 'AU', 'BR', 'IT']
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 11)))
+
+
+# 모든 레코드가 공유하는 어휘/기관/저널/주제 목록 (고정 시드로 한 번만 만듭니다)
+_rng = random.Random(0)
+VOCAB = [_word(_rng) for _ in range(VOCAB_SIZE)]
+VOCAB_CUM_WEIGHTS = list(accumulate(1 / rank for rank in range(1, VOCAB_SIZE + 1)))  # Zipf 분포
+INSTITUTIONS = [{"id": f"https://openalex.org/I{100000 + k}",
+                 "display_name": f"University of {_word(_rng).title()} {_word(_rng).title()}",
+                 "country_code": _rng.choice(COUNTRIES), "type": "education"} for k in range(NUM_INSTITUTIONS)]
+SOURCES = [{"id": f"https://openalex.org/S{100000 + k}",
+            "display_name": f"Journal of {_word(_rng).title()} {_word(_rng).title()}",
+            "issn_l": f"{_rng.randint(1000, 9999)}-{_rng.randint(1000, 9999)}",
+            "host_organization_name": f"{_word(_rng).title()} Press", "type": "journal"} for k in range(NUM_SOURCES)]
+TOPICS = [{"id": f"https://openalex.org/T{10000 + k}",
+           "display_name": ' '.join(_word(_rng).title() for _ in range(_rng.randint(2, 5))),
+           "subfield": {"display_name": _word(_rng).title()}, "field": {"display_name": _word(_rng).title()},
+           "domain": {"display_name": _word(_rng).title()}} for k in range(NUM_TOPICS)]
+GIVEN_NAMES = [_word(_rng).title() for _ in range(1000)]
+FAMILY_NAMES = [_word(_rng).title() for _ in range(1000)]
+KEYWORDS = [' '.join(_word(_rng) for _ in range(_rng.randint(1, 3))) for _ in range(NUM_KEYWORDS)]
+del _rng
+
+
+def work_year(i: int) -> int:
+    return YEAR_START + i % YEAR_SPAN
+
+
+def work_type(i: int) -> str:
+    return WORK_TYPES[(i // YEAR_SPAN) % len(WORK_TYPES)]
+
+
+def work_id(i: int) -> str:
+    return f"https://openalex.org/W{ID_OFFSET + i}"
+
+
+def work_index(openalex_id: str):
+    """'W1000123' 또는 전체 URL 형태의 id를 레코드 번호로 바꿉니다. (형식이 다르면 None)"""
+    short = openalex_id.rsplit('/', 1)[-1]
+    if not short[:1] in ('W', 'w') or not short[1:].isdigit():
+        return None
+    return int(short[1:]) - ID_OFFSET
+
+
+def _author_count(rng: random.Random) -> int:
+    """대부분 1~10명, 드물게 수백~수천 명(대형 공동연구) 논문이 섞이도록 합니다."""
+    roll = rng.random()
+    if roll < 0.002:
+        return rng.randint(500, 3000)
+    if roll < 0.02:
+        return rng.randint(30, 200)
+    return min(1 + int(rng.expovariate(0.35)), 30)
+
+
+def _authorships(rng: random.Random) -> tuple:
+    n = _author_count(rng)
+    authorships = []
+    for pos in range(n):
+        author_num = rng.randrange(NUM_AUTHORS)
+        n_inst = rng.choices((0, 1, 2, 3), weights=(10, 70, 15, 5))[0]
+        authorships.append({
+            "author_position": "first" if pos == 0 else ("last" if pos == n - 1 else "middle"),
+            "author": {"id": f"https://openalex.org/A{5000000 + author_num}",
+                       "display_name": f"{GIVEN_NAMES[author_num % 1000]} {FAMILY_NAMES[author_num // 1000 % 1000]}",
+                       "orcid": None},
+            "institutions": [INSTITUTIONS[rng.randrange(NUM_INSTITUTIONS)] for _ in range(n_inst)],
+            "countries": [],
+            "is_corresponding": False,
+            "raw_author_name": None,
+        })
+    corresponding = []
+    if authorships and rng.random() < 0.8:
+        idx = 0 if rng.random() < 0.5 else n - 1
+        authorships[idx]["is_corresponding"] = True
+        corresponding.append(authorships[idx]["author"]["id"])
+    return authorships, corresponding
+
+
+def _abstract_inverted_index(rng: random.Random):
+    if rng.random() < 0.15:
+        return None
+    words = rng.choices(VOCAB, cum_weights=VOCAB_CUM_WEIGHTS, k=rng.randint(60, 300))
+    index = {}
+    for pos, word in enumerate(words):
+        index.setdefault(word, []).append(pos)
+    return index
+
+
+def _topics(rng: random.Random) -> list:
+    scores = sorted((round(rng.uniform(0.3, 1.0), 4) for _ in range(rng.randint(1, 3))), reverse=True)
+    return [dict(TOPICS[rng.randrange(NUM_TOPICS)], score=score) for score in scores]
+
+
+def _percentile(rng: random.Random, cited_by_count: int):
+    if rng.random() < 0.1:
+        return None
+    value = round(min(0.999999, rng.random() ** 0.7 if cited_by_count else rng.random() * 0.3), 6)
+    return {"value": value, "is_in_top_1_percent": value >= 0.99, "is_in_top_10_percent": value >= 0.9}
+
+
+def make_work(i: int, seed: int = DEFAULT_SEED) -> dict:
+    """레코드 번호 i의 합성 작업물을 만듭니다. 같은 (i, seed)는 항상 같은 레코드를 만듭니다."""
+    rng = random.Random(seed * 1_000_003 + i)
+    authorships, corresponding = _authorships(rng)
+    topics = _topics(rng)
+    cited_by_count = int(rng.paretovariate(1.2)) - 1
+    source = SOURCES[rng.randrange(NUM_SOURCES)] if rng.random() < 0.9 else None
+    title_words = rng.choices(VOCAB, cum_weights=VOCAB_CUM_WEIGHTS, k=rng.randint(5, 18))
+    return {
+        "id": work_id(i),
+        "doi": f"https://doi.org/10.{rng.randint(1000, 9999)}/{_word(rng)}.{i}" if rng.random() < 0.85 else None,
+        "title": ' '.join(title_words).capitalize(),
+        "display_name": ' '.join(title_words).capitalize(),
+        "publication_year": work_year(i),
+        "publication_date": f"{work_year(i)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "type": work_type(i),
+        "language": "en",
+        "cited_by_count": cited_by_count,
+        "fwci": round(rng.lognormvariate(0, 1), 3) if rng.random() < 0.9 else None,
+        "authorships": authorships,
+        "corresponding_author_ids": corresponding,
+        "primary_topic": topics[0],
+        "topics": topics,
+        "keywords": [{"id": f"https://openalex.org/keywords/{k}", "display_name": KEYWORDS[k],
+                      "score": round(rng.uniform(0.2, 0.9), 4)}
+                     for k in rng.sample(range(NUM_KEYWORDS), rng.randint(0, 5))],
+        "abstract_inverted_index": _abstract_inverted_index(rng),
+        "citation_normalized_percentile": _percentile(rng, cited_by_count),
+        "primary_location": {"is_oa": rng.random() < 0.4, "landing_page_url": None, "source": source},
+        "referenced_works": [work_id(rng.randrange(i + 1) if rng.random() < 0.5 else rng.randrange(ID_OFFSET))
+                             for _ in range(rng.randint(0, 60))],
+        "updated_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00",
+    }
+
+
+def corpus_path(directory: str, size: int, seed: int = DEFAULT_SEED) -> str:
+    return os.path.join(directory, f"corpus_{size}_{seed}.jsonl")
+
+
+def generate_corpus(directory: str, size: int, seed: int = DEFAULT_SEED) -> str:
+    """
+    size건의 합성 레코드를 JSONL로 저장하고 경로를 돌려줍니다.
+    같은 크기/시드의 파일이 이미 있으면 다시 만들지 않습니다.
+    """
+    path = corpus_path(directory, size, seed)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for i in range(size):
+            f.write(json.dumps(make_work(i, seed), ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,221 @@
+# benchmarks/mock_server.py
+"""
+OpenAlex /works 엔드포인트를 흉내 내는 로컬 HTTP 서버.
+
+레코드는 corpus.make_work로 요청마다 즉석에서 만들기 때문에 코퍼스 크기와 관계없이 메모리를 거의 쓰지 않습니다.
+지원 기능: page / cursor / per-page / select / group_by,
+          filter의 publication_year, type, ids.openalex (그 밖의 필터는 무시하고 전체 코퍼스를 대상으로 합니다)
+장애 주입: latency_ms(응답 지연), error_rate(429 응답 비율, Retry-After 포함)
+
+단독 실행: python -m benchmarks.mock_server --size 100000 --port 8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks import corpus
+
+MAX_PER_PAGE = 200
+DEFAULT_PER_PAGE = 25
+PAGE_MODE_RESULT_LIMIT = 10000
+
+
+class _Corpus:
+    """필터 조건에 맞는 레코드 번호 목록을 계산하고 캐시합니다."""
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.seed = seed
+        self.matching = lru_cache(maxsize=64)(self._matching)
+
+    def _matching(self, filter_str: str):
+        years, types, ids = None, None, None
+        for part in filter(None, filter_str.split(',')):
+            name, _, value = part.partition(':')
+            if name == 'publication_year':
+                start, _, end = value.partition('-')
+                years = range(int(start), int(end or start) + 1)
+            elif name == 'type':
+                types = set(value.split('|'))
+            elif name in ('ids.openalex', 'openalex', 'openalex_id'):
+                ids = sorted({i for i in map(corpus.work_index, value.split('|'))
+                              if i is not None and 0 <= i < self.size})
+
+        candidates = ids if ids is not None else range(self.size)
+        if years is not None and ids is None and types is None:
+            # 연도 필터만 있으면 레코드를 훑지 않고 번호를 바로 계산합니다.
+            offsets = sorted((y - corpus.YEAR_START) % corpus.YEAR_SPAN for y in years
+                             if 0 <= y - corpus.YEAR_START < corpus.YEAR_SPAN)
+            return sorted(i for off in offsets for i in range(off, self.size, corpus.YEAR_SPAN))
+        return [i for i in candidates
+                if (years is None or corpus.work_year(i) in years)
+                and (types is None or corpus.work_type(i) in types)]
+
+    def work(self, i: int) -> dict:
+        return corpus.make_work(i, self.seed)
+
+
+def _group_key(work: dict, field: str):
+    if field == 'publication_year':
+        return str(work['publication_year']), str(work['publication_year'])
+    if field == 'type':
+        return work['type'], work['type']
+    if field in ('primary_topic.id', 'topics.id'):
+        return work['primary_topic']['id'], work['primary_topic']['display_name']
+    if field in ('primary_location.source.id', 'host_venue.id'):
+        source = work['primary_location']['source']
+        return (source['id'], source['display_name']) if source else ('unknown', 'unknown')
+    if field in ('authorships.institutions.id', 'institutions.id'):
+        inst = next((i for a in work['authorships'] for i in a['institutions']), None)
+        return (inst['id'], inst['display_name']) if inst else ('unknown', 'unknown')
+    return 'unknown', 'unknown'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAlex/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        config = self.server.config
+        self.server.count_request()
+        if config['latency_ms']:
+            time.sleep(config['latency_ms'] / 1000)
+        if config['error_rate'] and self.server.rng_random() < config['error_rate']:
+            self.server.count_throttled()
+            return self._send(429, {"error": "Too Many Requests"}, {"Retry-After": str(config['retry_after'])})
+
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/works':
+            return self._send(404, {"error": f"unknown endpoint {url.path}"})
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        data = self.server.corpus
+        matching = data.matching(query.get('filter', ''))
+
+        if 'group_by' in query:
+            counts, names = Counter(), {}
+            for i in matching:
+                key, name = _group_key(data.work(i), query['group_by'])
+                counts[key] += 1
+                names[key] = name
+            groups = [{"key": k, "key_display_name": names[k], "count": c} for k, c in counts.most_common()]
+            return self._send(200, {"meta": {"count": len(matching), "groups_count": len(groups)}, "group_by": groups})
+
+        per_page = int(query.get('per-page', query.get('per_page', DEFAULT_PER_PAGE)))
+        if not 1 <= per_page <= MAX_PER_PAGE:
+            return self._send(400, {"error": f"per-page must be between 1 and {MAX_PER_PAGE}"})
+
+        meta = {"count": len(matching), "db_response_time_ms": 1, "per_page": per_page}
+        if 'cursor' in query:
+            offset = 0 if query['cursor'] == '*' else int(query['cursor'])
+            indices = matching[offset:offset + per_page]
+            meta.update(page=None, next_cursor=str(offset + per_page) if indices else None)
+        else:
+            page = int(query.get('page', 1))
+            if (page - 1) * per_page >= PAGE_MODE_RESULT_LIMIT:
+                return self._send(400, {"error": f"page mode is limited to {PAGE_MODE_RESULT_LIMIT} results; use cursor"})
+            indices = matching[(page - 1) * per_page:page * per_page]
+            meta.update(page=page)
+
+        results = [data.work(i) for i in indices]
+        if 'select' in query:
+            fields = query['select'].split(',')
+            results = [{f: w.get(f) for f in fields} for w in results]
+        return self._send(200, {"meta": meta, "results": results, "group_by": []})
+
+
+class MockOpenAlexServer:
+    """
+    백그라운드 스레드에서 동작하는 모의 /works 서버. with 문으로 쓰거나 start()/stop()을 호출합니다.
+    port=0이면 빈 포트를 자동으로 고르며, 실제 주소는 base_url로 확인합니다.
+    """
+
+    def __init__(self, size: int, seed: int = corpus.DEFAULT_SEED, latency_ms: float = 0,
+                 error_rate: float = 0.0, retry_after: float = 0, host: str = '127.0.0.1', port: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.corpus = _Corpus(size, seed)
+        self.httpd.config = {"latency_ms": latency_ms, "error_rate": error_rate, "retry_after": retry_after}
+        self.requests = 0
+        self.throttled = 0
+        lock = threading.Lock()
+        rng = random.Random(seed)
+
+        def count_request():
+            with lock:
+                self.requests += 1
+
+        def count_throttled():
+            with lock:
+                self.throttled += 1
+
+        def rng_random():
+            with lock:
+                return rng.random()
+
+        self.httpd.count_request = count_request
+        self.httpd.count_throttled = count_throttled
+        self.httpd.rng_random = rng_random
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def works_url(self) -> str:
+        return f"{self.base_url}/works"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 OpenAlex /works 모의 서버")
+    parser.add_argument('--size', type=int, default=10000, help="코퍼스 크기 (레코드 수)")
+    parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help="요청마다 더할 응답 지연(ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="429로 응답할 요청 비율 (0~1)")
+    parser.add_argument('--retry-after', type=float, default=0, help="429 응답의 Retry-After(초)")
+    args = parser.parse_args()
+    server = MockOpenAlexServer(args.size, args.seed, args.latency_ms, args.error_rate, args.retry_after, port=args.port)
+    print(f"모의 서버 실행 중: {server.works_url} (레코드 {args.size}건, Ctrl+C로 종료)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+# benchmarks/run.py
+"""
+수집/정제/내보내기 파이프라인의 시간 측정 시나리오 실행기.
+
+    python -m benchmarks.run --sizes 1000 10000
+    python -m benchmarks.run --sizes 100000 --scenarios refine_authors refine_abstract --repeats 5
+    python -m benchmarks.run --sizes 10000 --compare data/bench/results-<이전 커밋>.json
+
+결과는 JSON 파일(기본값: data/bench/results-<커밋>.json)로 저장되며, --compare로 이전 결과와
+시나리오별 중앙값 시간을 비교할 수 있습니다. 수집 시나리오는 benchmarks.mock_server를 대상으로 하므로
+api.openalex.org에 요청을 보내지 않습니다.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow
+
+from benchmarks import corpus
+from benchmarks.mock_server import MockOpenAlexServer
+from modules import citations, data_fetcher, data_processor, exporter, http_client, storage
+from modules.reporter import Reporter
+from tests import baseline
+
+BENCH_DIR = os.path.join("data", "bench")
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_REPEATS = 3
+FETCH_SIZE_LIMIT = 20000     # 수집 시나리오는 코퍼스 크기와 이 값 중 작은 쪽만큼 받습니다.
+
+SCENARIOS = {}
+
+
+def scenario(name: str, group: str, setup=None):
+    """
+    시나리오 함수를 등록합니다. 함수는 (ctx) -> 처리한 행 수(또는 (행 수, 추가 정보))를 돌려줍니다.
+    setup(ctx)은 측정 전에 한 번 호출되어 입력 파일/데이터프레임을 준비합니다. (측정 시간에 포함되지 않음)
+    """
+    def register(func):
+        SCENARIOS[name] = (group, func, setup)
+        return func
+    return register
+
+
+class Context:
+    """한 코퍼스 크기에 대한 시나리오들이 공유하는 입력 파일과 준비된 데이터프레임."""
+
+    def __init__(self, size: int, seed: int, work_dir: str, args):
+        self.size = size
+        self.seed = seed
+        self.work_dir = work_dir
+        self.args = args
+        self._corpus_path = None
+        self._frames = {}
+        self._refined_path = None
+
+    @property
+    def corpus_path(self) -> str:
+        if self._corpus_path is None:
+            self._corpus_path = corpus.generate_corpus(os.path.join(BENCH_DIR, "corpus"), self.size, self.seed)
+        return self._corpus_path
+
+    def frame(self, stage: str) -> pd.DataFrame:
+        """
+        정제 단계별 입력 데이터프레임을 한 번만 만들어 둡니다. (측정 시간에 포함되지 않음)
+            'raw'     - load_and_prepare_df 결과
+            'authors' - refine_authors까지 적용
+            'content' - 주제/키워드, 초록, 인용 백분위, 저널 정제까지 적용 (finalize_dataframe 입력)
+        """
+        if stage not in self._frames:
+            if stage == 'raw':
+                df = data_processor.load_and_prepare_df(self.corpus_path)
+            elif stage == 'authors':
+                df = data_processor.refine_authors(self.frame('raw').copy(deep=False))
+            else:
+                df = _refine_content(self.frame('authors').copy(deep=False))
+            self._frames[stage] = df
+        return self._frames[stage]
+
+    @property
+    def refined_path(self) -> str:
+        if self._refined_path is None:
+            self._refined_path = os.path.join(self.work_dir, storage.REFINED_FILENAME)
+            storage.save_refined(data_processor.finalize_dataframe(self.frame('content').copy(deep=False)),
+                                 self._refined_path)
+        return self._refined_path
+
+
+# --- 수집 시나리오 (모의 서버 대상) ---
+
+def _fetch_server(ctx: Context) -> MockOpenAlexServer:
+    return MockOpenAlexServer(min(ctx.size, FETCH_SIZE_LIMIT), ctx.seed, latency_ms=ctx.args.latency_ms,
+                              error_rate=ctx.args.error_rate)
+
+
+def _fetch_result(ok: bool, filename: str, server: MockOpenAlexServer, stats: http_client.RequestStats) -> tuple:
+    if not ok:
+        raise RuntimeError("수집이 완료되지 않았습니다.")
+    with open(filename, 'rb') as f:
+        rows = sum(1 for _ in f)
+    extra = dict(stats.summary(), server_requests=server.requests,
+                 server_throttled=server.throttled)
+    os.remove(filename)
+    return rows, extra
+
+
+@scenario('fetch_cursor', 'fetch')
+def bench_fetch_cursor(ctx: Context):
+    filename = os.path.join(ctx.work_dir, "fetch_cursor.jsonl")
+    stats = http_client.RequestStats()
+    with _fetch_server(ctx) as server:
+        ok = data_fetcher.fetch_and_save_incrementally(f"{server.works_url}?mailto=bench@example.com", filename,
+                                                       reporter=Reporter(), stats=stats)
+        return _fetch_result(ok, filename, server, stats)
+
+
+@scenario('fetch_sharded', 'fetch')
+def bench_fetch_sharded(ctx: Context):
+    filename = os.path.join(ctx.work_dir, "fetch_sharded.jsonl")
+    stats = http_client.RequestStats()
+    with _fetch_server(ctx) as server:
+        years = range(corpus.YEAR_START, corpus.YEAR_START + corpus.YEAR_SPAN)
+        api_urls = [f"{server.works_url}?filter=publication_year:{y}&mailto=bench@example.com" for y in years]
+        ok = data_fetcher.fetch_sharded_and_save(api_urls, filename, max_workers=ctx.args.max_workers, reporter=Reporter(),
+                                                 stats=stats)
+        return _fetch_result(ok, filename, server, stats)
+
+
+@scenario('fetch_and_refine_overlapped', 'fetch')
+def bench_fetch_overlapped(ctx: Context):
+    filename = os.path.join(ctx.work_dir, "fetch_overlapped.jsonl")
+    stats = http_client.RequestStats()
+    refined_path = os.path.join(ctx.work_dir, "fetch_overlapped.parquet")
+    with _fetch_server(ctx) as server, data_processor.OverlappedRefiner(refined_path) as refiner:
+        ok = data_fetcher.fetch_and_save_incrementally(f"{server.works_url}?mailto=bench@example.com", filename,
+                                                       on_page=refiner.on_page, reporter=Reporter(), stats=stats)
+        finish_started = time.perf_counter()
+        refined_rows = refiner.finish()
+        finish_s = time.perf_counter() - finish_started
+        rows, extra = _fetch_result(ok, filename, server, stats)
+    if os.path.exists(refined_path):
+        os.remove(refined_path)
+    return rows, dict(extra, refined_rows=refined_rows, refine_busy_s=round(refiner.busy_seconds, 3),
+                      finish_s=round(finish_s, 3))
+
+
+@scenario('expand_citations', 'fetch', setup=lambda ctx: ctx.corpus_path)
+def bench_expand_citations(ctx: Context):
+    workspace = os.path.join(ctx.work_dir, "citations")
+    shutil.rmtree(workspace, ignore_errors=True)
+    os.makedirs(workspace)
+    # 참고문헌은 코퍼스 크기와 관계없이 ID_OFFSET 범위의 번호를 가리키므로, 모의 서버는 그 범위 전체를 제공합니다.
+    stats = http_client.RequestStats()
+    with MockOpenAlexServer(corpus.ID_OFFSET, ctx.seed, latency_ms=ctx.args.latency_ms,
+                            error_rate=ctx.args.error_rate) as server:
+        summary = citations.expand_citations(ctx.corpus_path, workspace, "bench@example.com", ctx.args.max_workers,
+                                             Reporter(), works_url=server.works_url, stats=stats)
+        if summary is None:
+            raise RuntimeError("참고문헌 조회가 완료되지 않았습니다.")
+        extra = dict(summary, **stats.summary(), server_requests=server.requests,
+                     server_throttled=server.throttled)
+    shutil.rmtree(workspace)
+    return summary['edges'], extra
+
+
+# --- 정제 시나리오 ---
+
+@scenario('load_and_prepare_df', 'refine', setup=lambda ctx: ctx.corpus_path)
+def bench_load(ctx: Context):
+    return len(data_processor.load_and_prepare_df(ctx.corpus_path))
+
+
+def _refine_content(df: pd.DataFrame) -> pd.DataFrame:
+    for refine in (data_processor.refine_topics_and_keywords, data_processor.refine_abstract,
+                   data_processor.refine_percentile, data_processor.refine_journal):
+        df = refine(df)
+    return df
+
+
+def _refine_step(func, stage: str):
+    def run(ctx: Context):
+        df = ctx.frame(stage).copy(deep=False)
+        return len(func(df))
+    return run
+
+
+for _name, _stage in [('refine_authors', 'raw'), ('refine_topics_and_keywords', 'raw'), ('refine_abstract', 'raw'),
+                      ('refine_percentile', 'raw'), ('refine_journal', 'raw'), ('finalize_dataframe', 'content')]:
+    scenario(_name, 'refine', setup=lambda ctx, stage=_stage: ctx.frame(stage))(
+        _refine_step(getattr(data_processor, _name), _stage))
+
+# 주제/키워드, 초록, 인용 백분위, 저널 정제 전체를 현재 구현과 리팩터링 전 구현(tests/baseline.py)으로 비교합니다.
+scenario('refine_content', 'refine', setup=lambda ctx: ctx.frame('raw'))(_refine_step(_refine_content, 'raw'))
+scenario('refine_content_baseline', 'refine', setup=lambda ctx: ctx.frame('raw'))(
+    _refine_step(baseline.refine_content_apply, 'raw'))
+
+
+@scenario('process_and_refine_data', 'end_to_end', setup=lambda ctx: ctx.corpus_path)
+def bench_end_to_end(ctx: Context):
+    return len(data_processor.process_and_refine_data(ctx.corpus_path))
+
+
+@scenario('process_and_refine_data_chunked', 'end_to_end', setup=lambda ctx: ctx.corpus_path)
+def bench_end_to_end_chunked(ctx: Context):
+    output_path = os.path.join(ctx.work_dir, "chunked.parquet")
+    rows = data_processor.process_and_refine_data_chunked(ctx.corpus_path, output_path)
+    os.remove(output_path)
+    return rows
+
+
+@scenario('process_and_refine_data_parallel', 'end_to_end', setup=lambda ctx: ctx.corpus_path)
+def bench_end_to_end_parallel(ctx: Context):
+    output_path = os.path.join(ctx.work_dir, "parallel.parquet")
+    rows = data_processor.process_and_refine_data_parallel(ctx.corpus_path, output_path, workers=ctx.args.refine_workers)
+    os.remove(output_path)
+    return rows, {"workers": ctx.args.refine_workers or os.cpu_count()}
+
+
+# --- 내보내기 시나리오 ---
+
+@scenario('export_excel', 'export', setup=lambda ctx: ctx.refined_path)
+def bench_export_excel(ctx: Context):
+    output_path = os.path.join(ctx.work_dir, "export.xlsx")
+    report = exporter.write_excel(ctx.refined_path, output_path)
+    os.remove(output_path)
+    return ctx.size, {"oversize_cells": sum(v['cells'] for k, v in report.items() if k != '_skipped_rows')}
+
+
+@scenario('export_csv_zst', 'export', setup=lambda ctx: ctx.refined_path)
+def bench_export_csv(ctx: Context):
+    output_path = os.path.join(ctx.work_dir, "export.csv.zst")
+    exporter.write_csv_zst(ctx.refined_path, output_path)
+    os.remove(output_path)
+    return ctx.size
+
+
+# --- 실행/기록 ---
+
+def _peak_rss_mb() -> float:
+    """프로세스 시작 이후 최대 RSS(MB). 이 값은 줄어들지 않으므로 시나리오 순서의 영향을 받습니다."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def run_scenario(name: str, ctx: Context, repeats: int) -> dict:
+    group, func, setup = SCENARIOS[name]
+    times, rows, extra = [], 0, {}
+    if setup:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            setup(ctx)
+    for _ in range(repeats):
+        # 정제 함수의 진행 메시지(print)는 결과 표에 섞이지 않도록 버립니다.
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            result = func(ctx)
+            times.append(time.perf_counter() - started)
+        rows, extra = result if isinstance(result, tuple) else (result, {})
+    median = statistics.median(times)
+    return {
+        "scenario": name,
+        "group": group,
+        "size": ctx.size,
+        "repeats": repeats,
+        "times_s": [round(t, 4) for t in times],
+        "best_s": round(min(times), 4),
+        "median_s": round(median, 4),
+        "rows": rows,
+        "rows_per_s": round(rows / median, 1) if median else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "extra": extra,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment_info(args) -> dict:
+    return {
+        "revision": _git_revision(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": pyarrow.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "rate": args.rate,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """두 결과 파일에서 같은 (시나리오, 크기)의 중앙값 시간을 비교해 (이름, 크기, 이전, 현재, 비율) 목록을 돌려줍니다."""
+    before = {(r['scenario'], r['size']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        old = before.get((r['scenario'], r['size']))
+        if old:
+            rows.append((r['scenario'], r['size'], old['median_s'], r['median_s'],
+                         r['median_s'] / old['median_s'] if old['median_s'] else float('nan')))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAlex 수집/정제 파이프라인 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="코퍼스 크기 (1000 ~ 1000000)")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                        metavar='NAME', help=f"실행할 시나리오 (기본값: 전체). 선택지: {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="시나리오별 반복 횟수")
+    parser.add_argument('--seed', type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument('--latency-ms', type=float, default=0, help="모의 서버 응답 지연(ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="모의 서버가 429로 응답할 비율")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="클라이언트 초당 요청 한도 (기본값: http_client 기본값과 동일한 polite pool 한도)")
+    parser.add_argument('--max-workers', type=int, default=data_fetcher.DEFAULT_MAX_WORKERS)
+    parser.add_argument('--refine-workers', type=int, default=None,
+                        help="병렬 정제 시나리오의 작업자 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본값: data/bench/results-<커밋>.json)")
+    parser.add_argument('--compare', default=None, help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    if args.rate:
+        http_client.get_client().limiter = http_client.TokenBucket(args.rate, max(1, int(args.rate)))
+
+    env = environment_info(args)
+    output = args.output or os.path.join(BENCH_DIR, f"results-{env['revision']}.json")
+    results = []
+    for size in args.sizes:
+        work_dir = os.path.join(BENCH_DIR, f"work_{size}")
+        os.makedirs(work_dir, exist_ok=True)
+        ctx = Context(size, args.seed, work_dir, args)
+        for name in args.scenarios:
+            result = run_scenario(name, ctx, args.repeats)
+            results.append(result)
+            print(f"[{size:>8}] {name:<32} 중앙값 {result['median_s']:>9.3f}s  "
+                  f"{result['rows_per_s'] or 0:>12,.0f} 행/s  최대 RSS {result['peak_rss_mb']:,.0f}MB", flush=True)
+
+    report = {"environment": env, "results": results}
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과를 '{output}'에 저장했습니다.")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n이전 결과({baseline['environment']['revision']})와 비교 (비율 < 1 이면 빨라짐):")
+        for name, size, old, new, ratio in compare(baseline, report):
+            print(f"[{size:>8}] {name:<32} {old:>9.3f}s -> {new:>9.3f}s  x{ratio:.2f}")
+
+
+if __name__ == '__main__':
+    main()
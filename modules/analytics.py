@@ -0,0 +1,102 @@
+# modules/analytics.py
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from modules.http_client import get_client
+from modules.query_cache import CACHE_DIR
+
+ANALYTICS_CACHE_DIR = os.path.join(CACHE_DIR, "analytics")
+ANALYTICS_TTL_HOURS = 24          # 집계 값은 매일 바뀔 수 있으므로 전체 수집 캐시보다 짧게 보관
+GROUP_BY_PER_PAGE = 200           # group_by 응답 한 번에 받을 최대 그룹 수
+ANALYTICS_TOP_N = 15              # 기관/저널/주제 차트에 표시할 상위 항목 수
+
+# 집계 항목: (group_by 필드, 화면 표시 이름)
+GROUP_BY_FIELDS = {
+    'publication_year': ('publication_year', "연도별 논문 수"),
+    'institutions': ('authorships.institutions.id', "상위 기관"),
+    'sources': ('primary_location.source.id', "상위 저널/출처"),
+    'topics': ('primary_topic.id', "주요 주제 분포"),
+}
+
+
+def group_by_url(api_url: str, field: str) -> str:
+    """create_broad_query/create_precise_query가 만든 URL에 group_by 파라미터를 붙입니다."""
+    return f"{api_url}&group_by={field}&per-page={GROUP_BY_PER_PAGE}"
+
+
+def fetch_group_counts(api_url: str, field: str) -> tuple:
+    """group_by 요청 한 번으로 (전체 논문 수, 그룹별 건수 데이터프레임[key, name, count])를 받아옵니다."""
+    data = get_client().get_json(group_by_url(api_url, field))
+    groups = pd.DataFrame(
+        [(g.get('key'), g.get('key_display_name') or g.get('key'), g.get('count', 0)) for g in data.get('group_by', [])],
+        columns=['key', 'name', 'count'])
+    return data.get('meta', {}).get('count', 0), groups
+
+
+def run_analytics(api_url: str, items: list = None) -> dict:
+    """
+    items(GROUP_BY_FIELDS의 키)마다 group_by 요청을 동시에 보내 결과를 모읍니다.
+    연도는 오름차순, 나머지는 건수 내림차순으로 정렬합니다.
+    반환값: {"total": 전체 논문 수, "groups": {항목: 데이터프레임}, "fetched_at": 시각}
+    """
+    items = items or list(GROUP_BY_FIELDS)
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        responses = dict(zip(items, executor.map(
+            lambda item: fetch_group_counts(api_url, GROUP_BY_FIELDS[item][0]), items)))
+
+    groups = {}
+    for item, (_, df) in responses.items():
+        if item == 'publication_year':
+            df = df.assign(year=pd.to_numeric(df['key'], errors='coerce')).dropna(subset=['year'])
+            df = df.sort_values('year').drop(columns='year')
+        else:
+            df = df.sort_values('count', ascending=False)
+        groups[item] = df.reset_index(drop=True)
+    return {
+        "total": max(total for total, _ in responses.values()),
+        "groups": groups,
+        "fetched_at": datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(ANALYTICS_CACHE_DIR, f"{key}.json")
+
+
+def load_cached(key: str, ttl_hours: int = ANALYTICS_TTL_HOURS):
+    """저장된 집계 결과가 있고 만료되지 않았으면 run_analytics와 같은 형태로 돌려줍니다."""
+    try:
+        with open(_cache_path(key), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if datetime.fromisoformat(cached['fetched_at']) < datetime.now() - timedelta(hours=ttl_hours):
+        return None
+    cached['groups'] = {item: pd.DataFrame(rows, columns=['key', 'name', 'count'])
+                        for item, rows in cached['groups'].items()}
+    return cached
+
+
+def store(key: str, result: dict):
+    """집계 결과를 캐시에 저장합니다."""
+    os.makedirs(ANALYTICS_CACHE_DIR, exist_ok=True)
+    payload = dict(result, groups={item: df.values.tolist() for item, df in result['groups'].items()})
+    tmp_path = f"{_cache_path(key)}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, _cache_path(key))
+
+
+def get_analytics(api_url: str, key: str, refresh: bool = False) -> tuple:
+    """캐시를 먼저 확인하고, 없거나 refresh=True이면 API에 요청합니다. (결과, 캐시 사용 여부)를 돌려줍니다."""
+    if not refresh:
+        cached = load_cached(key)
+        if cached is not None:
+            return cached, True
+    result = run_analytics(api_url)
+    store(key, result)
+    return result, False
@@ -0,0 +1,230 @@
+# modules/citations.py
+import json
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+from modules import storage
+from modules.fields import CITATION_NODE_FIELDS
+from modules.http_client import RequestStats, get_client
+from modules.reporter import StreamlitReporter
+
+WORKS_URL = "https://api.openalex.org/works"
+IDS_PER_REQUEST = 100             # OR 필터(ids.openalex:W1|W2|...) 한 번에 넣을 수 있는 최대 id 수
+DEFAULT_MAX_WORKERS = 4           # 동시에 보낼 일괄 조회 요청 수 (속도 제한은 http_client가 모든 스레드에 공통 적용)
+FETCHED_FILENAME = "referenced_works.jsonl"     # 받아 온 참고문헌 메타데이터 (다시 실행하면 이어서 받음)
+NODES_FILENAME = "citation_nodes.parquet"
+GRAPH_FILENAME = "citation_graph.npz"
+MOST_CITED_TOP_N = 20             # 결과 화면에 보여줄 많이 인용된 참고문헌 수
+
+# 노드 표의 컬럼 (행 번호가 곧 그래프의 노드 번호)
+NODE_COLUMNS = ['id', 'doi', 'title', 'publication_year', 'cited_by_count', 'Journal_Name', 'harvested', 'resolved']
+
+
+def work_number(openalex_id):
+    """'https://openalex.org/W123' 또는 'W123'을 정수 123으로 바꿉니다. (형식이 다르면 None)"""
+    if not isinstance(openalex_id, str):
+        return None
+    short = openalex_id.rsplit('/', 1)[-1]
+    if short[:1] not in ('W', 'w') or not short[1:].isdigit():
+        return None
+    return int(short[1:])
+
+
+def _node(work: dict) -> tuple:
+    """수집한 논문과 일괄 조회로 받은 참고문헌을 같은 형태의 노드 행(NODE_COLUMNS의 앞 6개)으로 만듭니다."""
+    source = (work.get('primary_location') or {}).get('source') or {}
+    return (work.get('id'), work.get('doi'), work.get('title'), work.get('publication_year'),
+            work.get('cited_by_count'), source.get('display_name'))
+
+
+def read_references(jsonl_path: str) -> tuple:
+    """
+    수집한 원본 JSONL을 한 번 훑어 (수집 논문 노드 행 목록, 논문 번호 -> 노드 번호, 인용한 노드 번호 배열, 인용된 논문 번호 배열)을 만듭니다.
+    id 문자열 대신 정수 번호로 모아 두므로 참고문헌이 수천만 건이어도 메모리를 적게 씁니다.
+    """
+    nodes, local_index = [], {}
+    sources, targets = array('i'), array('q')
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                work = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            number = work_number(work.get('id'))
+            if number is None or number in local_index:
+                continue
+            local_index[number] = len(nodes)
+            nodes.append(_node(work))
+            references = {n for n in map(work_number, work.get('referenced_works') or []) if n is not None}
+            sources.extend([local_index[number]] * len(references))
+            targets.extend(references)
+    return nodes, local_index, np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int64)
+
+
+def external_numbers(local_index: dict, targets: np.ndarray) -> np.ndarray:
+    """인용된 논문 번호에서 중복과 이미 수집한 논문을 뺀 번호 (오름차순)."""
+    return np.setdiff1d(targets, np.fromiter(local_index, dtype=np.int64, count=len(local_index)))
+
+
+def _read_fetched(path: str) -> tuple:
+    """이전 실행에서 받아 둔 참고문헌 메타데이터와, 요청했지만 응답에 없던(삭제·병합된) 번호를 읽습니다."""
+    fetched, unresolved = {}, set()
+    if not os.path.exists(path):
+        return fetched, unresolved
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # 중단되며 잘린 마지막 줄
+            if 'unresolved' in entry:
+                unresolved.update(entry['unresolved'])
+            elif work_number(entry.get('id')) is not None:
+                fetched[work_number(entry['id'])] = entry
+    return fetched, unresolved
+
+
+def batch_url(numbers: list, email: str, works_url: str = WORKS_URL) -> str:
+    """논문 번호 최대 100개를 OR 필터 하나로 조회하는 URL. 노드 표에 필요한 필드만 받습니다(select)."""
+    ids = '|'.join(f"W{n}" for n in numbers)
+    return (f"{works_url}?filter=ids.openalex:{ids}&per-page={IDS_PER_REQUEST}"
+            f"&select={','.join(CITATION_NODE_FIELDS)}&mailto={email}")
+
+
+def fetch_referenced_works(numbers: list, path: str, email: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                           reporter=None, works_url: str = WORKS_URL, stats: RequestStats = None) -> bool:
+    """
+    논문 번호 목록을 100개씩 묶어 동시에 조회하고, 받은 메타데이터를 path(JSONL)에 이어 씁니다.
+    이미 받았거나 응답에 없던 번호는 다시 요청하지 않으므로, 중단된 뒤 다시 호출하면 남은 묶음만 받습니다.
+    파일 쓰기와 진행 상황 알림은 호출한 스레드에서만 합니다. 모두 받으면 True, 취소되거나 요청이 실패하면 False.
+    요청 통계는 stats에 모읍니다. (지정하지 않으면 호출마다 새로 만듭니다)
+    """
+    reporter = reporter or StreamlitReporter()
+    stats = stats if stats is not None else RequestStats()
+    fetched, unresolved = _read_fetched(path)
+    pending = sorted(set(numbers) - fetched.keys() - unresolved)
+    total, done = len(numbers), len(numbers) - len(pending)
+    batches = [pending[i:i + IDS_PER_REQUEST] for i in range(0, len(pending), IDS_PER_REQUEST)]
+    if done:
+        reporter.info(f"이전에 받은 참고문헌 {done:,}건은 건너뛰고 나머지 {len(pending):,}건만 조회합니다.")
+    if not batches:
+        return True
+
+    client = get_client()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(client.get_json, batch_url(batch, email, works_url), stats): batch for batch in batches}
+        with open(path, 'a', encoding='utf-8') as f:
+            for future in as_completed(futures):
+                batch = futures[future]
+                works = future.result().get('results', [])
+                for work in works:
+                    f.write(json.dumps(work, ensure_ascii=False) + '\n')
+                # 병합·삭제되어 다른 id로 응답하거나 응답에 없는 번호는 따로 기록해 두고 다시 요청하지 않습니다.
+                missing = sorted(set(batch) - {work_number(work.get('id')) for work in works})
+                if missing:
+                    f.write(json.dumps({"unresolved": missing}) + '\n')
+                f.flush()
+                done += len(batch)
+                reporter.progress(done / total, f"참고문헌 조회: {done:,} / {total:,} 건\n{stats.format_summary()}")
+                if reporter.cancelled():
+                    reporter.warning(f"참고문헌 조회를 취소했습니다. ({done:,}건 확인, 다시 실행하면 이어서 조회합니다)")
+                    return False
+        return True
+    except requests.exceptions.RequestException as e:
+        reporter.error(f"참고문헌 조회 중 에러가 발생했습니다: {e} (다시 실행하면 받은 묶음 이후부터 이어서 조회합니다)")
+        return False
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_graph(nodes: list, local_index: dict, sources: np.ndarray, targets: np.ndarray, fetched: dict) -> tuple:
+    """
+    (노드 표, indptr, indices)를 만듭니다. 노드 번호는 수집 논문이 0부터 먼저, 이어서 외부 참고문헌이 논문 번호 순으로 붙습니다.
+    CSR 형식: 노드 i가 인용한 노드 번호는 indices[indptr[i]:indptr[i + 1]] (오름차순, 중복 없음)
+    """
+    external = external_numbers(local_index, targets)
+    numbers = np.concatenate([np.fromiter(local_index, dtype=np.int64, count=len(local_index)), external])
+    node_count = len(numbers)
+    # 같은 논문을 두 번 인용한 경우를 합치고, 행(인용한 노드)과 열(인용된 노드) 순으로 정렬합니다.
+    edges = np.unique(sources.astype(np.int64) * node_count + pd.Index(numbers).get_indexer(targets))
+    indices = (edges % node_count).astype(np.int32)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(edges // node_count, minlength=node_count))]).astype(np.int64)
+
+    external_rows = [_node(fetched[n]) if n in fetched else (f"https://openalex.org/W{n}", None, None, None, None, None)
+                     for n in external.tolist()]
+    node_table = pd.DataFrame(nodes + external_rows, columns=NODE_COLUMNS[:6])
+    node_table['harvested'] = np.arange(node_count) < len(nodes)
+    node_table['resolved'] = node_table['harvested'] | np.isin(numbers, np.fromiter(fetched, dtype=np.int64, count=len(fetched)))
+    return storage.apply_column_types(node_table), indptr, indices
+
+
+def save_graph(workspace: str, node_table: pd.DataFrame, indptr: np.ndarray, indices: np.ndarray):
+    """노드 표는 Parquet으로, CSR 배열은 npz로 작업 폴더에 저장합니다."""
+    nodes_path = os.path.join(workspace, NODES_FILENAME)
+    pq.write_table(pa.Table.from_pandas(node_table, preserve_index=False), f"{nodes_path}.tmp",
+                   compression=storage.PARQUET_COMPRESSION)
+    os.replace(f"{nodes_path}.tmp", nodes_path)
+    graph_path = os.path.join(workspace, GRAPH_FILENAME)
+    with open(f"{graph_path}.tmp", 'wb') as f:
+        np.savez_compressed(f, indptr=indptr, indices=indices)
+    os.replace(f"{graph_path}.tmp", graph_path)
+
+
+def has_graph(workspace: str) -> bool:
+    return os.path.exists(os.path.join(workspace, GRAPH_FILENAME))
+
+
+def load_graph(workspace: str) -> tuple:
+    """save_graph로 저장한 (노드 표, indptr, indices)를 읽습니다."""
+    node_table = storage.load_refined(os.path.join(workspace, NODES_FILENAME))
+    with np.load(os.path.join(workspace, GRAPH_FILENAME)) as graph:
+        return node_table, graph['indptr'], graph['indices']
+
+
+def most_cited(node_table: pd.DataFrame, indices: np.ndarray, top_n: int = MOST_CITED_TOP_N) -> pd.DataFrame:
+    """수집 논문들이 가장 많이 인용한 노드(수집 논문 포함) 상위 top_n개. 'citing_works'는 인용한 수집 논문 수입니다."""
+    counts = np.bincount(indices, minlength=len(node_table))
+    top = np.argsort(-counts, kind='stable')[:top_n]
+    return node_table.iloc[top].assign(citing_works=counts[top]).reset_index(drop=True)
+
+
+def expand_citations(jsonl_path: str, workspace: str, email: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                     reporter=None, works_url: str = WORKS_URL, stats: RequestStats = None) -> dict:
+    """
+    수집한 논문의 참고문헌(referenced_works)으로 인용 네트워크를 만듭니다.
+
+    1. 모든 논문의 참고문헌 id를 정수 번호로 모아 중복을 없애고, 이미 수집한 논문은 조회 대상에서 뺍니다.
+    2. 나머지를 100개씩 묶어 ids.openalex OR 필터로 동시에 조회합니다. (수만 건도 수백 번의 요청으로 끝남)
+    3. 노드 표와 CSR 배열을 작업 폴더에 저장합니다.
+
+    완료하면 건수 요약을, 취소되거나 요청이 실패하면 None을 돌려줍니다. (받은 묶음은 남아 있어 다시 실행하면 이어서 조회)
+    works_url은 벤치마크의 모의 서버처럼 다른 /works 주소로 조회할 때 지정합니다.
+    stats를 지정하면 일괄 조회의 요청 통계를 그곳에 모읍니다.
+    """
+    reporter = reporter or StreamlitReporter()
+    nodes, local_index, sources, targets = read_references(jsonl_path)
+    if len(targets) == 0:
+        reporter.warning("수집한 논문에 참고문헌(referenced_works) 정보가 없어 인용 네트워크를 만들지 않았습니다.")
+        return {"works": len(nodes), "references": 0, "external": 0, "resolved": 0, "edges": 0}
+    external = external_numbers(local_index, targets)
+    reporter.info(f"참고문헌 {len(targets):,}건 중 중복과 수집한 논문을 뺀 {len(external):,}건을 "
+                  f"{IDS_PER_REQUEST}개씩 묶어 조회합니다.")
+
+    fetched_path = os.path.join(workspace, FETCHED_FILENAME)
+    if not fetch_referenced_works(external.tolist(), fetched_path, email, max_workers, reporter, works_url, stats):
+        return None
+    fetched, _ = _read_fetched(fetched_path)
+    node_table, indptr, indices = build_graph(nodes, local_index, sources, targets, fetched)
+    save_graph(workspace, node_table, indptr, indices)
+    summary = {"works": len(nodes), "references": len(targets), "external": len(external),
+               "resolved": int(node_table['resolved'].sum()) - len(nodes), "edges": len(indices)}
+    reporter.success(f"인용 네트워크를 만들었습니다. (노드 {len(node_table):,}개, 인용 관계 {len(indices):,}건)")
+    return summary
@@ -1,81 +1,394 @@
 # modules/data_fetcher.py
 import requests
 import json
-import time
 import math
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import streamlit as st # Streamlit의 위젯을 사용하기 위해 import
+from urllib.parse import quote
+from modules.http_client import RequestStats, get_client
+from modules.reporter import StreamlitReporter
 
-def fetch_and_save_incrementally(api_url: str, filename: str):
+# OpenAlex API 제약 사항
+MAX_PER_PAGE = 200              # 한 번에 받을 수 있는 최대 결과 수
+PAGE_MODE_RESULT_LIMIT = 10000  # page 방식으로 접근 가능한 최대 결과 수 (이후는 cursor 필수)
+DEFAULT_MAX_WORKERS = 4         # 샤드 병렬 수집 시 기본 동시 요청 수
+
+
+# --- 체크포인트(이어받기) 관리 ---
+
+def checkpoint_path(filename: str) -> str:
+    """JSONL 파일 옆에 저장되는 체크포인트 매니페스트 경로."""
+    return f"{filename}.checkpoint.json"
+
+
+def remove_checkpoint(filename: str):
+    """체크포인트 매니페스트가 있으면 삭제합니다."""
+    path = checkpoint_path(filename)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _save_checkpoint(filename: str, state: dict):
+    """매니페스트를 임시 파일에 쓴 뒤 교체하여, 중간에 끊겨도 깨진 매니페스트가 남지 않게 합니다."""
+    path = checkpoint_path(filename)
+    tmp_path = f"{path}.tmp"
+    state = dict(state, updated_at=datetime.now().isoformat(timespec='seconds'))
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_checkpoint(filename: str, query: dict):
+    """
+    같은 쿼리(query의 모든 항목이 일치)에 대한 체크포인트가 있고 데이터 파일이 남아 있으면,
+    파일을 마지막 체크포인트 위치로 잘라낸 뒤 매니페스트를 돌려줍니다. 없으면 None.
+    """
+    path = checkpoint_path(filename)
+    if not (os.path.exists(path) and os.path.exists(filename)):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if any(state.get(key) != value for key, value in query.items()):
+        return None
+
+    offset = state.get('byte_offset', 0)
+    if os.path.getsize(filename) < offset:
+        return None # 데이터 파일이 매니페스트보다 짧다면 믿을 수 없으므로 새로 시작
+    _truncate_partial_tail(filename, offset)
+    return state
+
+
+def _truncate_partial_tail(filename: str, offset: int):
+    """
+    체크포인트 이후에 쓰인 내용과, 중간에 끊겨 반쯤 쓰인 마지막 줄을 잘라냅니다.
+    offset은 항상 줄 경계이지만, 혹시 아니라면 마지막 개행 문자 위치까지 되돌립니다.
+    """
+    with open(filename, 'r+b') as f:
+        f.truncate(offset)
+        if offset == 0:
+            return
+        f.seek(offset - 1)
+        if f.read(1) == b'\n':
+            return
+        f.seek(0)
+        last_newline = f.read(offset).rfind(b'\n')
+        f.truncate(last_newline + 1)
+
+
+# --- API 페이지 순회 ---
+
+def _page_url(api_url: str, page_num: int) -> str:
+    """page 방식 URL (최대 per-page 적용)"""
+    return f"{api_url}&per-page={MAX_PER_PAGE}&page={page_num}"
+
+
+def _cursor_url(api_url: str, cursor: str) -> str:
+    """cursor 방식 URL (최대 per-page 적용)"""
+    return f"{api_url}&per-page={MAX_PER_PAGE}&cursor={quote(cursor)}"
+
+
+def _is_last_cursor_page(page_data: dict, received: int) -> bool:
+    """
+    cursor 방식에서 이 페이지가 마지막인지 판단합니다. 결과가 끝났음을 알리는 빈 페이지를 한 번 더 요청하지 않도록,
+    받은 건수(received, 이 페이지 포함)가 meta.count에 이르렀거나 per-page보다 적게 왔거나 다음 cursor가 없으면 마지막입니다.
+    """
+    meta = page_data.get('meta', {})
+    results = page_data.get('results') or []
+    return (not results or not meta.get('next_cursor') or len(results) < (meta.get('per_page') or MAX_PER_PAGE)
+            or received >= meta.get('count', 0))
+
+
+def _iter_pages(api_url: str, pagination: str, start=None, stats: RequestStats = None, received: int = 0):
+    """
+    API 응답(dict)을 차례로 돌려주는 제너레이터. 요청 통계는 stats에도 기록합니다.
+    - 'cursor': start(기본 '*') cursor부터 meta.next_cursor를 따라가다 마지막 페이지에서 멈춥니다. (결과 수 제한 없음)
+                received는 이어받기 전에 이미 받은 건수입니다. (마지막 페이지 판단에 사용)
+    - 'page'  : start(기본 1) 페이지부터 page=N 방식. 10,000건을 넘는 결과는 받을 수 없습니다.
+    """
+    if pagination == 'cursor':
+        cursor = start or '*'
+        while cursor:
+            data = get_client().get_json(_cursor_url(api_url, cursor), stats)
+            yield data
+            received += len(data.get('results') or [])
+            if _is_last_cursor_page(data, received):
+                break
+            cursor = data.get('meta', {}).get('next_cursor')
+    else:
+        page_num = start or 1
+        while True:
+            data = get_client().get_json(_page_url(api_url, page_num), stats)
+            yield data
+            meta = data.get('meta', {})
+            total_pages = math.ceil(min(meta.get('count', 0), PAGE_MODE_RESULT_LIMIT) / meta.get('per_page', MAX_PER_PAGE))
+            if page_num >= total_pages:
+                break
+            page_num += 1
+
+
+def _chain_first(first, rest):
+    """이미 받아 둔 첫 응답을 나머지 제너레이터 앞에 붙입니다."""
+    yield first
+    yield from rest
+
+
+def fetch_and_save_incrementally(api_url: str, filename: str, pagination: str = 'cursor', on_page=None, reporter=None,
+                                 stats: RequestStats = None) -> bool:
     """
     OpenAlex API에서 데이터를 가져와 즉시 파일에 추가하고,
-    Streamlit 화면에 프로그레스 바와 진행 상황 텍스트를 직접 출력합니다.
+    진행 상황을 reporter(기본값: Streamlit 화면에 직접 출력)로 알립니다.
+
+    pagination:
+        'cursor' (기본값) - cursor 페이지네이션. 10,000건 이상의 대규모 결과도 모두 수집합니다.
+        'page'           - 기존 page=N 방식. 10,000건까지만 수집됩니다.
+
+    페이지마다 '<filename>.checkpoint.json'에 다음 cursor/페이지와 저장 건수를 기록합니다.
+    같은 쿼리로 다시 호출하면 처음부터 받지 않고 마지막 체크포인트부터 이어서 수집합니다.
+    수집이 끝까지 완료되면 체크포인트를 삭제하고 True를 돌려줍니다.
+
+    on_page를 지정하면 페이지를 파일에 쓸 때마다 그 페이지의 레코드 리스트로 호출합니다. (수집과 동시에 정제할 때 사용)
+    reporter.cancelled()가 True가 되면 페이지를 저장한 직후 멈추고 False를 돌려줍니다. (체크포인트는 남겨 둡니다)
+    stats를 지정하면 이 수집의 요청 통계를 그곳에 모읍니다. (지정하지 않으면 호출마다 새로 만듭니다)
     """
+    reporter = reporter or StreamlitReporter()
+    stats = stats if stats is not None else RequestStats()
     start_time = datetime.now()
-    st.info(f"데이터 수집을 시작합니다... (시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')})")
+    query = {"api_url": api_url, "pagination": pagination}
+    checkpoint = _load_checkpoint(filename, query)
+
+    if checkpoint and checkpoint['next_position'] is None:
+        # 마지막 페이지까지 저장한 뒤 체크포인트 삭제 직전에 끊긴 경우
+        remove_checkpoint(filename)
+        reporter.success(f"이미 완료된 수집입니다. 총 {checkpoint['items_written']}개의 데이터가 저장되어 있습니다.")
+        return True
+
+    if checkpoint:
+        items_saved = checkpoint['items_written']
+        next_position = checkpoint['next_position']
+        reporter.info(f"이전 수집을 이어서 진행합니다... ({items_saved}건 저장됨, 시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')})")
+    else:
+        items_saved = 0
+        next_position = None
+        reporter.info(f"데이터 수집을 시작합니다... (시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')})")
 
     try:
-        response_p1 = requests.get(api_url)
-        response_p1.raise_for_status()
-        data_p1 = response_p1.json()
+        pages = _iter_pages(api_url, pagination, next_position, stats, received=items_saved)
+        data_p1 = next(pages)
 
         total_results = data_p1['meta']['count']
         per_page = data_p1['meta']['per_page']
 
         if total_results == 0:
-            st.warning("검색 결과가 없습니다.")
-            return
-
-        total_pages = math.ceil(total_results / per_page)
-        st.write(f"총 {total_results}개의 결과를 {total_pages} 페이지에 걸쳐 '{filename}' 파일에 저장합니다.")
-
-        # 파일을 'w'(쓰기) 모드로 열어서, 실행할 때마다 새로 만듭니다.
-        with open(filename, 'w', encoding='utf-8') as f:
-            results_p1 = data_p1.get('results', [])
-            for work in results_p1:
-                f.write(json.dumps(work, ensure_ascii=False) + '\n')
+            reporter.warning("검색 결과가 없습니다.")
+            remove_checkpoint(filename)
+            return True
 
-            items_saved = len(results_p1)
+        if pagination == 'page' and total_results > PAGE_MODE_RESULT_LIMIT:
+            reporter.warning(f"page 방식은 최대 {PAGE_MODE_RESULT_LIMIT}건까지만 수집됩니다. 전체 결과를 받으려면 cursor 방식을 사용하세요.")
 
-            # ★★★ Streamlit용 진행 상황 표시 위젯 생성 ★★★
-            progress_bar = st.progress(0) # 0%에서 시작하는 프로그레스 바
-            status_text = st.empty() # 진행 상황 텍스트를 덮어쓸 빈 공간
-
-            # 첫 페이지 진행률 업데이트
-            progress_bar.progress(items_saved / total_results)
-            status_text.text(f"수집 진행률: {items_saved} / {total_results} 건")
-
-            # 두 번째 페이지부터 마지막까지 반복
-            for page_num in range(2, total_pages + 1):
-                paginated_url = f"{api_url}&page={page_num}"
-                response = requests.get(paginated_url)
-                response.raise_for_status()
-                page_data = response.json()
+        total_pages = math.ceil(total_results / per_page)
+        reporter.write(f"총 {total_results}개의 결과를 {total_pages} 페이지에 걸쳐 '{filename}' 파일에 저장합니다.")
 
+        # 이어받기라면 'a'(추가) 모드, 아니면 'w'(쓰기) 모드로 새로 만듭니다.
+        page_num = next_position if (checkpoint and pagination == 'page') else 1
+        with open(filename, 'a' if checkpoint else 'w', encoding='utf-8') as f:
+            for page_data in _chain_first(data_p1, pages):
                 page_results = page_data.get('results', [])
                 if not page_results:
-                    st.error(f"\n{page_num}페이지에서 데이터를 가져오는데 실패했습니다.")
-                    break
+                    # cursor 방식은 결과가 정확히 per-page의 배수로 끝나는 등 예외적인 경우에 빈 페이지가 옵니다.
+                    if pagination == 'cursor' or items_saved >= min(total_results, PAGE_MODE_RESULT_LIMIT):
+                        break
+                    reporter.error(f"\n{page_num}페이지에서 데이터를 가져오는데 실패했습니다.")
+                    return False
 
                 for work in page_results:
                     f.write(json.dumps(work, ensure_ascii=False) + '\n')
+                f.flush()
 
+                # 페이지를 다 쓴 뒤에만 체크포인트를 갱신합니다.
                 items_saved += len(page_results)
+                page_num += 1
+                if pagination == 'cursor':
+                    # 마지막 페이지라면 다음 cursor가 있어도 더 받을 것이 없습니다.
+                    next_position = None if _is_last_cursor_page(page_data, items_saved) else page_data.get('meta', {}).get('next_cursor')
+                else:
+                    next_position = page_num if items_saved < min(total_results, PAGE_MODE_RESULT_LIMIT) else None
+                _save_checkpoint(filename, dict(query, next_position=next_position,
+                                                items_written=items_saved, byte_offset=f.tell()))
+                if on_page is not None:
+                    on_page(page_results)
 
                 # ★★★ 프로그레스 바와 텍스트 업데이트 ★★★
-                progress_bar.progress(items_saved / total_results)
-                status_text.text(f"수집 진행률: {items_saved} / {total_results} 건")
+                reporter.progress(min(items_saved / total_results, 1.0),
+                                  f"수집 진행률: {items_saved} / {total_results} 건\n{stats.format_summary()}")
+                if reporter.cancelled():
+                    reporter.warning(f"수집을 취소했습니다. ({items_saved}건 저장됨, 다시 실행하면 이어서 수집합니다)")
+                    return False
 
-                time.sleep(0.1)
+        remove_checkpoint(filename)
 
         end_time = datetime.now()
         elapsed_time = end_time - start_time
 
-        status_text.text(f"수집 완료! 총 {items_saved}건") # 최종 메시지로 업데이트
-        st.success(f"작업 완료! 총 {items_saved}개의 데이터를 성공적으로 저장했습니다.")
-        st.write(f"총 소요 시간: {elapsed_time}")
+        reporter.progress(1.0, f"수집 완료! 총 {items_saved}건\n{stats.format_summary()}") # 최종 메시지로 업데이트
+        reporter.success(f"작업 완료! 총 {items_saved}개의 데이터를 성공적으로 저장했습니다.")
+        reporter.write(f"총 소요 시간: {elapsed_time}")
+        return True
 
     except requests.exceptions.RequestException as e:
-        st.error(f"API 요청 중 에러가 발생했습니다: {e}")
+        reporter.error(f"API 요청 중 에러가 발생했습니다: {e} (다시 실행하면 {items_saved}건 이후부터 이어서 수집합니다)")
+    except Exception as e:
+        reporter.error(f"알 수 없는 오류가 발생했습니다: {e}")
+    return False
+
+
+# --- 샤드 병렬 수집 ---
+
+def _shard_worker(shard_idx: int, api_url: str, start_cursor, page_queue: queue.Queue, stop_event: threading.Event,
+                  stats: RequestStats, received: int = 0):
+    """하나의 샤드를 cursor 방식으로 끝까지 읽어 (샤드 번호, 응답) 형태로 큐에 넣습니다."""
+    def put(item):
+        # 중단 요청 후에는 큐가 가득 차도 기다리지 않고 버립니다.
+        while True:
+            try:
+                page_queue.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                if stop_event.is_set():
+                    return
+
+    try:
+        if stop_event.is_set():
+            return
+        for page_data in _iter_pages(api_url, 'cursor', start_cursor, stats, received):
+            if stop_event.is_set():
+                break
+            put((shard_idx, page_data))
     except Exception as e:
-        st.error(f"알 수 없는 오류가 발생했습니다: {e}")
\ No newline at end of file
+        put((shard_idx, e))
+    finally:
+        put((shard_idx, None)) # 샤드 종료 신호
+
+
+def _read_saved_ids(filename: str) -> set:
+    """이어받기 시 중복 제거를 위해 이미 저장된 작업물 id를 읽어옵니다."""
+    ids = set()
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                ids.add(json.loads(line).get('id'))
+            except json.JSONDecodeError:
+                continue
+    return ids
+
+
+def fetch_sharded_and_save(api_urls: list, filename: str, max_workers: int = DEFAULT_MAX_WORKERS, on_page=None,
+                           reporter=None, stats: RequestStats = None) -> bool:
+    """
+    url_builder.split_into_shards로 나눈 여러 샤드 URL을 동시에 수집하여
+    id 기준으로 중복을 제거한 하나의 JSONL 파일로 합칩니다.
+
+    - 각 샤드는 별도 스레드에서 cursor 방식으로 수집됩니다. (동시 실행 수는 max_workers로 제한)
+    - 요청 속도 제한(http_client의 토큰 버킷)은 모든 스레드가 공유하므로 polite pool 한도를 넘지 않습니다.
+    - 파일 쓰기와 진행 상황 알림(reporter)은 호출한 스레드에서만 수행합니다.
+    - 샤드별 다음 cursor를 체크포인트에 기록하므로, 중단된 수집은 끝나지 않은 샤드만 이어서 받습니다.
+    - on_page를 지정하면 페이지마다 중복을 제거하고 새로 저장한 레코드 리스트로 호출합니다.
+    - reporter.cancelled()가 True가 되면 남은 샤드 요청을 멈추고 체크포인트를 남긴 채 False를 돌려줍니다.
+    - stats를 지정하면 모든 샤드의 요청 통계를 그곳에 모읍니다. (지정하지 않으면 호출마다 새로 만듭니다)
+    """
+    reporter = reporter or StreamlitReporter()
+    stats = stats if stats is not None else RequestStats()
+    start_time = datetime.now()
+    query = {"api_urls": api_urls, "pagination": "cursor"}
+    checkpoint = _load_checkpoint(filename, query)
+
+    if checkpoint:
+        shard_states = {int(k): v for k, v in checkpoint['shards'].items()}
+        items_saved, duplicates = checkpoint['items_written'], checkpoint.get('duplicates', 0)
+        seen_ids = _read_saved_ids(filename)
+        reporter.info(f"이전 병렬 수집을 이어서 진행합니다... ({items_saved}건 저장됨, 시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')})")
+    else:
+        shard_states = {idx: {"next_cursor": None, "done": False, "count": 0, "received": 0} for idx in range(len(api_urls))}
+        items_saved, duplicates = 0, 0
+        seen_ids = set()
+        reporter.info(f"{len(api_urls)}개 샤드에 대해 병렬 수집을 시작합니다... (동시 요청: {max_workers}, 시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')})")
+
+    page_queue = queue.Queue(maxsize=max_workers * 4)
+    stop_event = threading.Event()
+    pending = [idx for idx, state in shard_states.items() if not state['done']]
+    finished = len(api_urls) - len(pending)
+    errors = []
+    cancelled = False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for idx in pending:
+            executor.submit(_shard_worker, idx, api_urls[idx], shard_states[idx]['next_cursor'], page_queue, stop_event,
+                            stats, shard_states[idx].get('received', 0))
+
+        try:
+            with open(filename, 'a' if checkpoint else 'w', encoding='utf-8') as f:
+                while finished < len(api_urls):
+                    shard_idx, page_data = page_queue.get()
+                    if page_data is None:
+                        finished += 1
+                        continue
+                    if isinstance(page_data, Exception):
+                        errors.append((shard_idx, page_data))
+                        continue
+
+                    meta = page_data.get('meta', {})
+                    state = shard_states[shard_idx]
+                    state['count'] = meta.get('count', 0)
+                    new_works = []
+                    for work in page_data.get('results', []):
+                        work_id = work.get('id')
+                        if work_id in seen_ids:
+                            duplicates += 1
+                            continue
+                        seen_ids.add(work_id)
+                        f.write(json.dumps(work, ensure_ascii=False) + '\n')
+                        new_works.append(work)
+                    items_saved += len(new_works)
+                    f.flush()
+
+                    # 페이지를 다 쓴 뒤에만 해당 샤드의 cursor를 갱신합니다. (received는 중복 제거 전 건수)
+                    state['received'] = state.get('received', 0) + len(page_data.get('results') or [])
+                    state['next_cursor'] = meta.get('next_cursor')
+                    state['done'] = _is_last_cursor_page(page_data, state['received'])
+                    _save_checkpoint(filename, dict(query, shards=shard_states, items_written=items_saved,
+                                                    duplicates=duplicates, byte_offset=f.tell()))
+                    if on_page is not None and new_works:
+                        on_page(new_works)
+
+                    # 아직 첫 응답이 오지 않은 샤드가 있으므로 전체 건수는 점점 커질 수 있습니다.
+                    total_results = sum(s['count'] for s in shard_states.values())
+                    reporter.progress(min((items_saved + duplicates) / total_results, 1.0) if total_results else 0.0,
+                                      f"수집 진행률: {items_saved} / {total_results} 건 (완료 샤드 {finished}/{len(api_urls)})\n{stats.format_summary()}")
+                    if reporter.cancelled():
+                        cancelled = True
+                        break
+        finally:
+            # 오류나 중단 시 남은 작업자가 더 이상 요청하지 않도록 알립니다.
+            stop_event.set()
+
+    elapsed_time = datetime.now() - start_time
+    if cancelled:
+        reporter.warning(f"수집을 취소했습니다. ({items_saved}건 저장됨, 다시 실행하면 끝나지 않은 샤드만 이어서 수집합니다)")
+        return False
+    if errors:
+        for shard_idx, e in errors:
+            reporter.error(f"{shard_idx + 1}번째 샤드 수집 중 에러가 발생했습니다: {e}")
+        reporter.warning(f"다시 실행하면 끝나지 않은 샤드만 이어서 수집합니다. (현재 {items_saved}건 저장됨)")
+        return False
+
+    remove_checkpoint(filename)
+    reporter.progress(1.0, f"수집 완료! 총 {items_saved}건 (중복 제거 {duplicates}건)\n{stats.format_summary()}")
+    reporter.success(f"작업 완료! 총 {items_saved}개의 데이터를 성공적으로 저장했습니다.")
+    reporter.write(f"총 소요 시간: {elapsed_time}")
+    return True
@@ -1,5 +1,17 @@
 import pandas as pd
 import json
+import os
+import multiprocessing
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from itertools import chain, count
+from concurrent.futures import ProcessPoolExecutor
+from modules.fields import WORK_FIELDS
+from modules.storage import RefinedParquetWriter, load_refined, save_refined
+from modules import metrics
 
 # --- 1. 데이터 로딩 및 기본 준비 함수 ---
 def load_and_prepare_df(filepath: str) -> pd.DataFrame:
@@ -24,6 +36,11 @@ def load_and_prepare_df(filepath: str) -> pd.DataFrame:
             return raw_df
 
         df = raw_df.drop_duplicates(subset=['id'], keep='first').copy()
+
+        # 경량 수집 모드(select=)나 누락된 필드가 있어도 정제 함수가 동작하도록 빈 컬럼을 채워 둡니다.
+        for col in WORK_FIELDS:
+            if col not in df.columns:
+                df[col] = None
         print(f"-> 정제 시작 데이터: {len(df)} 행")
         return df
     except FileNotFoundError:
@@ -33,113 +50,192 @@ def load_and_prepare_df(filepath: str) -> pd.DataFrame:
 
 # --- 2. 개별 정제 함수들 ---
 
+def _extract_author_fields(authorships, corr_ids) -> tuple:
+    """한 논문의 authorships에서 저자/기관 관련 6개 값을 뽑아 refine_authors 컬럼 순서대로 돌려줍니다."""
+    first_author_name, first_author_institution = '', ''
+    corr_author_names, all_author_names = [], []
+    corr_institution_names, all_institution_names = set(), set()
+    # 교신저자 id는 리스트 대신 set으로 조회합니다.
+    corr_lookup = set(corr_ids) if isinstance(corr_ids, list) else corr_ids
+
+    for author_info in authorships:
+        author = author_info.get('author', {})
+        author_name = author.get('display_name', '')
+        inst_names = sorted([inst.get('display_name', '') for inst in author_info.get('institutions', []) if inst.get('display_name')])
+        inst_names_str = "; ".join(inst_names)
+        # 기관명 자체에 '; '가 들어 있는 경우까지 기존 출력과 같도록, 합친 문자열을 다시 나눈 값을 사용합니다.
+        inst_pieces = inst_names_str.split('; ') if inst_names_str else ()
+
+        if author_name: all_author_names.append(author_name)
+        all_institution_names.update(inst_pieces)
+
+        if author_info.get('author_position') == 'first':
+            first_author_name, first_author_institution = author_name, inst_names_str
+
+        if corr_lookup and author.get('id') in corr_lookup:
+            corr_author_names.append(author_name)
+            corr_institution_names.update(inst_pieces)
+
+    return (first_author_name, first_author_institution,
+            "; ".join(sorted(corr_author_names)), "; ".join(sorted(corr_institution_names)),
+            "; ".join(all_author_names), "; ".join(sorted(all_institution_names)))
+
+
 def refine_authors(df: pd.DataFrame) -> pd.DataFrame:
     """authorships 컬럼을 정제하여 저자/기관 관련 6개 컬럼을 추가합니다."""
     print("-> 저자/기관 정보 정제 중...")
     new_cols = ['First_Author_Name', 'First_Author_Institution', 'Corresponding_Author_Names',
                 'Corresponding_Institution_Names', 'All_Authors', 'All_Institutions']
-    for col in new_cols:
-        df[col] = ''
+    empty_row = ('',) * len(new_cols)
+
+    # iterrows/df.at 대신 두 컬럼을 파이썬 리스트로 한 번에 훑고, 6개 컬럼을 한꺼번에 만듭니다.
+    authorships_col = df['authorships'].tolist() if 'authorships' in df.columns else [[]] * len(df)
+    corr_ids_col = df['corresponding_author_ids'].tolist() if 'corresponding_author_ids' in df.columns else [[]] * len(df)
 
-    for index, row in df.iterrows():
+    rows = []
+    for index, authorships, corr_ids in zip(df.index, authorships_col, corr_ids_col):
+        if not isinstance(authorships, list):
+            rows.append(empty_row)
+            continue
         try:
-            authorships = row.get('authorships', [])
-            if not isinstance(authorships, list): continue
-
-            corr_ids = row.get('corresponding_author_ids', [])
-            first_author_name, first_author_institution = '', ''
-            corr_author_names, all_author_names = [], []
-            corr_institution_names, all_institution_names = set(), set()
-
-            for author_info in authorships:
-                author_id = author_info.get('author', {}).get('id')
-                author_name = author_info.get('author', {}).get('display_name', '')
-                institutions = author_info.get('institutions', [])
-                inst_names_str = "; ".join(sorted([inst.get('display_name', '') for inst in institutions if inst.get('display_name')]))
-
-                if author_name: all_author_names.append(author_name)
-                if inst_names_str:
-                    for inst_name in inst_names_str.split('; '): all_institution_names.add(inst_name)
-
-                if author_info.get('author_position') == 'first':
-                    first_author_name, first_author_institution = author_name, inst_names_str
-
-                if corr_ids and author_id in corr_ids:
-                    corr_author_names.append(author_name)
-                    if inst_names_str:
-                        for inst_name in inst_names_str.split('; '): corr_institution_names.add(inst_name)
-
-            df.at[index, 'First_Author_Name'] = first_author_name
-            df.at[index, 'First_Author_Institution'] = first_author_institution
-            df.at[index, 'Corresponding_Author_Names'] = "; ".join(sorted(corr_author_names))
-            df.at[index, 'Corresponding_Institution_Names'] = "; ".join(sorted(list(corr_institution_names)))
-            df.at[index, 'All_Authors'] = "; ".join(all_author_names)
-            df.at[index, 'All_Institutions'] = "; ".join(sorted(list(all_institution_names)))
+            rows.append(_extract_author_fields(authorships, corr_ids))
         except Exception as e:
             print(f"경고: 저자 정보 처리 중 에러 (index: {index}): {e}")
-            continue
+            rows.append(empty_row)
+
+    if not rows:
+        for col in new_cols:
+            df[col] = ''
+        return df
+    for col, values in zip(new_cols, zip(*rows)):
+        df[col] = list(values)
     return df
 
 
+# 아래 추출 함수들은 레코드 하나의 값만 다루며, 각 refine_* 함수가 컬럼 리스트를 훑으며 호출합니다.
+
+def _format_item(item_dict) -> str:
+    """주제/키워드 dict를 '이름 (점수)' 문자열로 만듭니다."""
+    try:
+        if not isinstance(item_dict, dict): return ""
+        name = item_dict.get('display_name', 'N/A')
+        score = round(item_dict.get('score', 0), 3)
+        return f"{name} ({score})"
+    except Exception: return ""
+
+
+def _format_topics(topics) -> str:
+    return "; ".join([_format_item(t) for t in topics]) if isinstance(topics, list) else ""
+
+
+def _format_keywords(keywords) -> str:
+    return "; ".join([_format_item(k) for k in sorted(keywords, key=lambda x: x.get('score', 0), reverse=True)]) if isinstance(keywords, list) else ""
+
+
+def _reconstruct_abstract_sorted(inverted_index) -> str:
+    """(위치, 단어) 쌍을 정렬해 초록을 복원하는 기존 방식. 위치가 겹치는 등 예외적인 입력에만 사용합니다."""
+    try:
+        indexed_words = sorted([(idx, word) for word, indices in inverted_index.items() for idx in indices])
+        return " ".join([word for idx, word in indexed_words])
+    except Exception: return ""
+
+
+def _reconstruct_abstract(inverted_index) -> str:
+    """
+    abstract_inverted_index에서 초록을 복원합니다.
+    미리 만든 슬롯 배열에 단어를 제 위치에 바로 넣으므로 정렬이 필요 없습니다.
+    - 위치가 0부터 빈틈없이 이어지는 일반적인 경우: 슬롯 수 = 전체 위치 수
+    - 중간에 빈 위치가 있는 경우: 슬롯 수 = 최대 위치 + 1, 빈 슬롯은 건너뜀
+    위치가 겹치거나 음수/정수가 아니거나 비정상적으로 큰 경우에는 기존 정렬 방식으로 처리해
+    결과를 그대로 유지합니다.
+    """
+    if not isinstance(inverted_index, dict): return ""
+    try:
+        indices_lists = inverted_index.values()
+        size = sum(map(len, indices_lists))
+        if size == 0 or min(chain.from_iterable(indices_lists)) < 0:
+            return _reconstruct_abstract_sorted(inverted_index)
+        slots = [None] * size
+        try:
+            for word, indices in inverted_index.items():
+                for idx in indices:
+                    slots[idx] = word
+        except IndexError:
+            # 빈 위치가 있어 최대 위치가 전체 위치 수보다 큰 경우
+            max_idx = max(chain.from_iterable(indices_lists))
+            if max_idx >= 4 * size + 1024:
+                return _reconstruct_abstract_sorted(inverted_index)
+            slots = [None] * (max_idx + 1)
+            for word, indices in inverted_index.items():
+                for idx in indices:
+                    slots[idx] = word
+            if len(slots) - slots.count(None) != size: # 위치가 겹침
+                return _reconstruct_abstract_sorted(inverted_index)
+            return " ".join([word for word in slots if word is not None])
+        # 빈 슬롯(None)이 남았다면 위치가 겹친 것이므로 join에서 TypeError가 납니다.
+        return " ".join(slots)
+    except Exception:
+        return _reconstruct_abstract_sorted(inverted_index)
+
+
+def _extract_percentile(p_dict) -> tuple:
+    try:
+        if not isinstance(p_dict, dict): return None, None, None
+        return p_dict.get('value'), p_dict.get('is_in_top_1_percent'), p_dict.get('is_in_top_10_percent')
+    except Exception: return None, None, None
+
+
+def _extract_journal(loc_dict) -> tuple:
+    try:
+        if not isinstance(loc_dict, dict): return None, None, None
+        source = loc_dict.get('source', {}) or {}
+        return source.get('display_name'), source.get('host_organization_name'), source.get('issn_l')
+    except Exception: return None, None, None
+
+
+def _assign_columns(df: pd.DataFrame, columns: list, rows: list):
+    """행 단위 튜플 리스트를 컬럼별 리스트로 바꿔 한 번에 할당합니다."""
+    if not rows:
+        for col in columns:
+            df[col] = []
+        return
+    for col, values in zip(columns, zip(*rows)):
+        df[col] = list(values)
+
+
 def refine_topics_and_keywords(df: pd.DataFrame) -> pd.DataFrame:
     """topics, primary_topic, keywords 컬럼을 정제합니다."""
     print("-> 주제/키워드 정보 정제 중...")
-
-    def format_item(item_dict):
-        try:
-            if not isinstance(item_dict, dict): return ""
-            name = item_dict.get('display_name', 'N/A')
-            score = round(item_dict.get('score', 0), 3)
-            return f"{name} ({score})"
-        except Exception: return ""
-
-    df['Primary_Topic(Score)'] = df['primary_topic'].apply(format_item)
-    df['Top_Topics(Scores)'] = df['topics'].apply(lambda lst: "; ".join([format_item(t) for t in lst]) if isinstance(lst, list) else "")
-    df['Keywords(Scores)'] = df['keywords'].apply(lambda lst: "; ".join([format_item(k) for k in sorted(lst, key=lambda x: x.get('score', 0), reverse=True)]) if isinstance(lst, list) else "")
+    df['Primary_Topic(Score)'] = [_format_item(t) for t in df['primary_topic'].tolist()]
+    df['Top_Topics(Scores)'] = [_format_topics(t) for t in df['topics'].tolist()]
+    df['Keywords(Scores)'] = [_format_keywords(k) for k in df['keywords'].tolist()]
     return df
 
 def refine_abstract(df: pd.DataFrame) -> pd.DataFrame:
     """abstract_inverted_index를 복원하여 Abstract 컬럼을 추가합니다."""
     print("-> 초록 정보 복원 중...")
-    def reconstruct(inverted_index):
-        try:
-            if not isinstance(inverted_index, dict): return ""
-            indexed_words = sorted([(idx, word) for word, indices in inverted_index.items() for idx in indices])
-            return " ".join([word for idx, word in indexed_words])
-        except Exception: return ""
-    df['Abstract'] = df['abstract_inverted_index'].apply(reconstruct)
+    df['Abstract'] = [_reconstruct_abstract(ii) for ii in df['abstract_inverted_index'].tolist()]
     return df
 
 def refine_percentile(df: pd.DataFrame) -> pd.DataFrame:
     """citation_normalized_percentile을 정제하여 3개 컬럼을 추가합니다."""
     print("-> 인용 백분위 정보 정제 중...")
-    def extract_info(p_dict):
-        try:
-            if not isinstance(p_dict, dict): return None, None, None
-            return p_dict.get('value'), p_dict.get('is_in_top_1_percent'), p_dict.get('is_in_top_10_percent')
-        except Exception: return None, None, None
-    (df['Citation_Percentile'], df['Is_Top_1_Percent'], df['Is_Top_10_Percent']) = zip(*df['citation_normalized_percentile'].apply(extract_info))
+    _assign_columns(df, ['Citation_Percentile', 'Is_Top_1_Percent', 'Is_Top_10_Percent'],
+                    [_extract_percentile(p) for p in df['citation_normalized_percentile'].tolist()])
     return df
 
 
 def refine_journal(df: pd.DataFrame) -> pd.DataFrame:
     """primary_location을 정제하여 저널/출판사 관련 3개 컬럼을 추가합니다."""
     print("-> 저널/출판사 정보 정제 중...")
-    def extract_info(loc_dict):
-        try:
-            if not isinstance(loc_dict, dict): return None, None, None
-            source = loc_dict.get('source', {}) or {}
-            return source.get('display_name'), source.get('host_organization_name'), source.get('issn_l')
-        except Exception: return None, None, None
-    (df['Journal_Name'], df['Publisher'], df['ISSN-L']) = zip(*df['primary_location'].apply(extract_info))
+    _assign_columns(df, ['Journal_Name', 'Publisher', 'ISSN-L'],
+                    [_extract_journal(loc) for loc in df['primary_location'].tolist()])
     return df
 
 
 # --- 3. 최종 정리 함수 ---
-def finalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """최종적으로 컬럼을 선택하고 순서를 재정렬한 후, 복잡한 데이터를 문자열로 변환하여 엑셀 저장 준비를 합니다."""
-    print("-> 최종 컬럼 선택 및 순서 정렬, 데이터 변환 중...")
-    new_column_order = [
+# 최종 결과의 컬럼 순서 (원본 중첩 컬럼은 이 뒤에 붙습니다)
+FINAL_COLUMNS = [
     # === 식별자 및 링크 정보 ===
     'doi',
     'id',
@@ -165,9 +261,14 @@ def finalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     'Is_Top_1_Percent',
     'Is_Top_10_Percent',
 ]
+
+
+def finalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """최종적으로 컬럼을 선택하고 순서를 재정렬한 후, 복잡한 데이터를 문자열로 변환하여 엑셀 저장 준비를 합니다."""
+    print("-> 최종 컬럼 선택 및 순서 정렬, 데이터 변환 중...")
     all_current_columns = df.columns.tolist()
-    remaining_columns = [col for col in all_current_columns if col not in new_column_order]
-    final_ordered_columns = new_column_order + remaining_columns
+    remaining_columns = [col for col in all_current_columns if col not in FINAL_COLUMNS]
+    final_ordered_columns = FINAL_COLUMNS + remaining_columns
 
     # 존재하는 컬럼만 선택
     existing_cols = [col for col in final_ordered_columns if col in df.columns]
@@ -190,19 +291,338 @@ def process_and_refine_data(filepath: str) -> pd.DataFrame:
     전체 파이프라인을 실행합니다.
     """
     # 1. 데이터 로딩 및 준비
-    df = load_and_prepare_df(filepath)
+    with metrics.stage('load_and_prepare_df') as stage:
+        df = load_and_prepare_df(filepath)
+        stage.rows = len(df)
     if df.empty:
         return pd.DataFrame() # 빈 데이터프레임이면 바로 종료
 
     # 2. 각 정제 함수를 순서대로 호출하여 데이터프레임을 계속 업데이트
-    df = refine_authors(df)
-    df = refine_topics_and_keywords(df)
-    df = refine_abstract(df)
-    df = refine_percentile(df)
-    df = refine_journal(df)
+    with metrics.stage('refine_authors', rows=len(df)):
+        df = refine_authors(df)
+    for refine in (refine_topics_and_keywords, refine_abstract, refine_percentile, refine_journal):
+        with metrics.stage(refine.__name__, rows=len(df)):
+            df = refine(df)
 
     # 3. 최종 정리 함수 호출
-    final_df = finalize_dataframe(df)
+    with metrics.stage('finalize_dataframe', rows=len(df)):
+        final_df = finalize_dataframe(df)
 
     print("\n모든 데이터 처리 파이프라인이 성공적으로 완료되었습니다!")
-    return final_df
\ No newline at end of file
+    return final_df
+
+
+# ==============================================================================
+# ★★★ 섹션 3: 대용량 파일용 청크 단위 스트리밍 파이프라인 ★★★
+# ==============================================================================
+DEFAULT_CHUNK_SIZE = 5000
+CHUNKED_THRESHOLD_BYTES = 200 * 1024 ** 2   # 이보다 큰 JSONL은 청크 단위로 정제
+
+# 각 정제 함수와, 그 함수가 다 쓰고 나면 버려도 되는 원본 중첩 컬럼
+REFINE_STEPS = [
+    (refine_authors, ['authorships', 'corresponding_author_ids']),
+    (refine_topics_and_keywords, ['primary_topic', 'topics', 'keywords']),
+    (refine_abstract, ['abstract_inverted_index']),
+    (refine_percentile, ['citation_normalized_percentile']),
+    (refine_journal, ['primary_location']),
+]
+
+
+def iter_jsonl_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """JSONL 파일을 chunk_size 줄씩 읽어 파싱된 레코드 리스트로 돌려주는 제너레이터."""
+    chunk = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"경고: JSON 파싱 에러 발생. 해당 라인을 건너뜁니다.")
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _apply_refine_steps(records: list, drop_raw: bool) -> pd.DataFrame:
+    """레코드 리스트로 데이터프레임을 만들어 REFINE_STEPS를 차례로 적용합니다. (finalize_dataframe 전 단계)"""
+    df = pd.DataFrame(records)
+    for col in WORK_FIELDS:
+        if col not in df.columns:
+            df[col] = None
+    # 청크마다 호출되므로 단계별 시간은 같은 이름으로 합산합니다.
+    for refine, consumed_cols in REFINE_STEPS:
+        with metrics.stage(refine.__name__, rows=len(df), accumulate=True):
+            df = refine(df)
+        if drop_raw:
+            df = df.drop(columns=consumed_cols)
+    return df
+
+
+def refine_records(records: list, drop_raw: bool = True) -> pd.DataFrame:
+    """
+    레코드(dict) 리스트 하나를 모든 정제 단계에 통과시켜 최종 형태의 데이터프레임으로 만듭니다.
+    drop_raw=True이면 각 정제 단계가 끝나는 즉시 해당 원본 중첩 컬럼을 버려 메모리를 아낍니다.
+    """
+    df = _apply_refine_steps(records, drop_raw)
+    with metrics.stage('finalize_dataframe', rows=len(df), accumulate=True):
+        return finalize_dataframe(df)
+
+
+def process_and_refine_data_chunked(filepath: str, output_path: str,
+                                    chunk_size: int = DEFAULT_CHUNK_SIZE, drop_raw: bool = True) -> int:
+    """
+    JSONL을 chunk_size 줄씩 읽어 청크마다 전체 정제 파이프라인을 실행하고,
+    완성된 청크를 바로 output_path(Parquet)에 이어 씁니다. 메모리에는 한 청크만 올라갑니다.
+
+    - 중복 제거는 지금까지 본 id 집합으로 스트리밍 방식으로 수행합니다. (첫 번째 레코드 유지)
+    - 출력 타입은 첫 청크를 기준으로 고정하고, 뒤 청크에서 처음 나온 컬럼은 덧붙입니다. (storage.RefinedParquetWriter)
+    - drop_raw=True(기본값)이면 원본 중첩 컬럼(authorships 등)은 각 정제 단계 직후 버려 출력에 포함하지 않습니다.
+      drop_raw=False이면 process_and_refine_data와 같은 컬럼 구성으로 저장하지만 청크마다 원본 컬럼을 함께 들고 있습니다.
+    저장한 행 수를 돌려줍니다.
+    """
+    print(f"청크 단위 정제 시작 (청크 크기: {chunk_size})...")
+    seen_ids = set()
+    rows_written = 0
+
+    chunks = iter_jsonl_chunks(filepath, chunk_size)
+    with RefinedParquetWriter(output_path) as writer:
+        for chunk_num in count(1):
+            with metrics.stage('load_jsonl', rows=0, accumulate=True) as stage:
+                records = next(chunks, None)
+                stage.rows += len(records or [])
+            if records is None:
+                break
+            unique_records = []
+            for work in records:
+                work_id = work.get('id')
+                if work_id in seen_ids:
+                    continue
+                seen_ids.add(work_id)
+                unique_records.append(work)
+            del records
+            if not unique_records:
+                continue
+
+            chunk_df = refine_records(unique_records, drop_raw=drop_raw)
+            del unique_records
+            with metrics.stage('write_parquet', rows=len(chunk_df), accumulate=True):
+                writer.write(chunk_df)
+            rows_written += len(chunk_df)
+            print(f"-> {chunk_num}번째 청크 완료 (누적 {rows_written} 행)")
+
+    print(f"\n청크 단위 정제가 완료되었습니다! 총 {rows_written} 행을 '{output_path}'에 저장했습니다.")
+    return rows_written
+
+
+# ==============================================================================
+# ★★★ 섹션 4: 멀티프로세스 병렬 정제 ★★★
+# ==============================================================================
+SLICES_PER_WORKER = 4   # 작업자 간 부하를 고르게 하기 위해 작업자 수보다 잘게 나눕니다.
+
+
+def _byte_ranges(filepath: str, num_slices: int) -> list:
+    """파일을 줄 경계에 맞춘 (시작, 끝) 바이트 구간 num_slices개로 나눕니다."""
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return []
+    boundaries = [0]
+    with open(filepath, 'rb') as f:
+        for i in range(1, num_slices):
+            f.seek(max(size * i // num_slices, boundaries[-1]))
+            f.readline() # 줄 중간이라면 다음 줄의 시작으로 이동
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > boundaries[-1]:
+                boundaries.append(pos)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _refine_byte_range(filepath: str, start: int, end: int, drop_raw: bool, part_path: str) -> int:
+    """
+    [작업자 프로세스] 파일의 [start, end) 구간을 직접 읽어 파싱하고 정제한 뒤 part_path(Parquet)에 저장합니다.
+    결과 데이터프레임을 부모 프로세스로 피클링해 보내지 않도록 저장한 행 수만 돌려줍니다. (레코드가 없으면 0)
+    """
+    records, seen_ids = [], set()
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            try:
+                work = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"경고: JSON 파싱 에러 발생. 해당 라인을 건너뜁니다.")
+                continue
+            if work.get('id') in seen_ids:
+                continue
+            seen_ids.add(work.get('id'))
+            records.append(work)
+    if not records:
+        return 0
+    save_refined(refine_records(records, drop_raw=drop_raw), part_path)
+    return len(records)
+
+
+def process_and_refine_data_parallel(filepath: str, output_path: str, workers: int = None,
+                                     drop_raw: bool = True) -> int:
+    """
+    JSONL 파일을 줄 경계에 맞춘 바이트 구간으로 나누고, 프로세스 풀에서 구간별로
+    전체 정제 파이프라인을 실행한 뒤 원래 순서대로 output_path(Parquet)에 이어 씁니다. 저장한 행 수를 돌려줍니다.
+
+    - 각 작업자는 파일 경로와 구간만 받아 스스로 읽고 파싱하므로 원본 데이터를 피클링하지 않습니다.
+    - 결과도 작업자가 구간별 Parquet 파일로 저장하므로, 원본 중첩 컬럼까지 담긴 데이터프레임을 피클링해 돌려받지 않습니다.
+      부모 프로세스는 구간 파일을 하나씩 읽어 storage.RefinedParquetWriter로 합칩니다.
+    - 구간을 넘나드는 중복은 합치면서 id 기준으로 한 번 더 제거합니다. (첫 번째 레코드 유지)
+    - drop_raw는 process_and_refine_data_chunked와 같습니다. (기본값 True: 원본 중첩 컬럼 제외,
+      False: process_and_refine_data와 같은 컬럼 구성)
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = _byte_ranges(filepath, workers * SLICES_PER_WORKER) if os.path.exists(filepath) else []
+    if not ranges:
+        print(f"경고: '{filepath}' 파일에서 데이터를 읽어오지 못했습니다.")
+        return 0
+    print(f"병렬 정제 시작: {len(ranges)}개 구간, 작업자 {workers}개...")
+
+    parts_dir = tempfile.mkdtemp(prefix="refine_parts_", dir=os.path.dirname(os.path.abspath(output_path)))
+    part_paths = [os.path.join(parts_dir, f"part_{i:05d}.parquet") for i in range(len(ranges))]
+    try:
+        # Streamlit 서버처럼 스레드가 있는 프로세스에서 fork하지 않도록 spawn 방식을 사용합니다.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            part_rows = list(executor.map(_refine_byte_range, [filepath] * len(ranges),
+                                          [start for start, _ in ranges], [end for _, end in ranges],
+                                          [drop_raw] * len(ranges), part_paths))
+
+        seen_ids = set()
+        rows_written = 0
+        with RefinedParquetWriter(output_path) as writer:
+            for part_path, rows in zip(part_paths, part_rows):
+                if not rows:
+                    continue
+                part_df = load_refined(part_path)
+                part_df = part_df[~part_df['id'].isin(seen_ids)]
+                seen_ids.update(part_df['id'])
+                writer.write(part_df)
+                rows_written += len(part_df)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    print(f"\n병렬 정제가 완료되었습니다! 총 {rows_written} 행을 '{output_path}'에 저장했습니다.")
+    return rows_written
+
+
+# ==============================================================================
+# ★★★ 섹션 5: 수집과 동시에 정제 (수집-정제 오버랩) ★★★
+# ==============================================================================
+OVERLAP_QUEUE_PAGES = 32      # 정제를 기다릴 수 있는 페이지 수 (넘으면 수집이 잠시 기다립니다)
+OVERLAP_BATCH_SIZE = 2000     # 밀려 있는 페이지를 모아 한 번에 정제할 최대 레코드 수
+
+
+class OverlappedRefiner:
+    """
+    수집 중에 도착한 페이지를 백그라운드 스레드에서 바로 정제해 output_path(Parquet)에 이어 쓰는 작업자.
+    data_fetcher의 on_page 콜백으로 on_page를 넘기면, 수집이 끝날 무렵에는 정제와 저장도 거의 끝나 있습니다.
+
+    - 페이지는 크기가 제한된 큐를 거쳐 전달되므로, 정제가 밀리면 수집이 기다려 메모리가 일정하게 유지됩니다.
+    - 정제할 차례에 큐에 쌓여 있는 페이지는 OVERLAP_BATCH_SIZE까지 모아 한 번에 정제합니다.
+      묶음마다 finalize_dataframe까지 마치고 storage.RefinedParquetWriter로 바로 기록하므로,
+      원본 레코드나 정제 결과를 전부 메모리에 모아 두지 않고 finish()는 파일을 닫기만 합니다.
+      저장 결과는 process_and_refine_data_chunked와 같습니다. (drop_raw도 같은 뜻)
+    - 중복 id는 먼저 도착한 레코드를 남깁니다.
+    - 수집이 실패하는 등 finish()를 부르지 않고 끝낼 때는 close()(또는 with 문)로 작업 스레드를 멈추고
+      쓰던 임시 파일을 지웁니다.
+    """
+
+    def __init__(self, output_path: str, batch_size: int = OVERLAP_BATCH_SIZE,
+                 max_pending_pages: int = OVERLAP_QUEUE_PAGES, drop_raw: bool = True):
+        self.batch_size = batch_size
+        self.drop_raw = drop_raw
+        self.page_queue = queue.Queue(maxsize=max_pending_pages)
+        self.writer = RefinedParquetWriter(output_path)
+        self.seen_ids = set()
+        self.rows_received = 0
+        self.rows_written = 0
+        self.busy_seconds = 0.0
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="overlapped-refiner", daemon=True)
+        self.thread.start()
+
+    def on_page(self, records: list):
+        """[수집 스레드] 저장을 마친 페이지의 레코드를 정제 큐에 넣습니다."""
+        self.rows_received += len(records)
+        self.page_queue.put(records)
+
+    def _run(self):
+        finished = False
+        while not finished:
+            batch = []
+            records = self.page_queue.get()
+            while True:
+                if records is None:
+                    finished = True
+                    break
+                batch.extend(records)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    records = self.page_queue.get_nowait()
+                except queue.Empty:
+                    break
+            # 오류가 나거나 close()된 뒤에도 큐는 계속 비워서 수집 스레드가 멈추지 않게 합니다.
+            if batch and self.error is None and not self.closed:
+                try:
+                    self._refine(batch)
+                except Exception as e:
+                    self.error = e
+
+    def _refine(self, batch: list):
+        unique_records = []
+        for work in batch:
+            work_id = work.get('id')
+            if work_id in self.seen_ids:
+                continue
+            self.seen_ids.add(work_id)
+            unique_records.append(work)
+        if not unique_records:
+            return
+        started = time.perf_counter()
+        df = refine_records(unique_records, drop_raw=self.drop_raw)
+        self.writer.write(df)
+        self.rows_written += len(df)
+        self.busy_seconds += time.perf_counter() - started
+
+    def close(self):
+        """
+        작업 스레드를 멈추고 끝날 때까지 기다린 뒤 쓰던 임시 파일을 지웁니다. 남은 페이지는 정제하지 않습니다.
+        finish()가 끝난 뒤나 여러 번 불러도 됩니다.
+        """
+        if self.thread.is_alive():
+            self.closed = True
+            self.page_queue.put(None)
+            self.thread.join()
+        self.writer.abort()
+
+    def finish(self) -> int:
+        """
+        수집이 끝난 뒤 호출합니다. 남은 페이지의 정제를 기다렸다가 파일을 닫고 저장한 행 수를 돌려줍니다.
+        (레코드가 하나도 없으면 파일을 만들지 않고 0을 돌려줍니다)
+        """
+        if self.closed:
+            raise RuntimeError("close()된 OverlappedRefiner는 결과를 만들 수 없습니다.")
+        self.page_queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        self.writer.close()
+        return self.rows_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,179 @@
+# modules/exporter.py
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+EXCEL_CELL_LIMIT = 32767         # 엑셀 셀 하나에 들어갈 수 있는 최대 글자 수 (UTF-16 코드 단위)
+EXCEL_MAX_ROWS = 1048576         # 엑셀 시트 하나의 최대 행 수 (머리글 포함)
+BATCH_SIZE = 10_000              # Parquet에서 한 번에 읽어 내보낼 행 수
+TRUNCATION_MARKER = " …[잘림]"
+
+EXPORT_FORMATS = {
+    # 형식: (파일 확장자, MIME 타입)
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv_zst': ('csv.zst', 'application/zstd'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def _iter_batches(source_path: str):
+    """정제 결과 Parquet을 BATCH_SIZE 행씩 데이터프레임으로 읽어옵니다."""
+    parquet_file = pq.ParquetFile(source_path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE):
+        yield batch.to_pandas()
+
+
+def _excel_length(value: str) -> int:
+    """엑셀이 세는 글자 수. 엑셀은 UTF-16 코드 단위로 세므로 BMP 밖의 문자(이모지 등)는 2자입니다."""
+    return len(value.encode('utf-16-le')) // 2
+
+
+def _excel_pieces(value: str, limit: int = EXCEL_CELL_LIMIT) -> list:
+    """value를 UTF-16 코드 단위 limit개 이하의 조각으로 나눕니다. 서로게이트 쌍(BMP 밖의 문자)은 가르지 않습니다."""
+    data = value.encode('utf-16-le')
+    pieces, start = [], 0
+    while start < len(data):
+        end = min(start + 2 * limit, len(data))
+        if end < len(data) and 0xD8 <= data[end - 1] <= 0xDB:  # 조각이 상위 서로게이트로 끝나면 한 단위 앞에서 자름
+            end -= 2
+        pieces.append(data[start:end].decode('utf-16-le'))
+        start = end
+    return pieces
+
+
+def _oversize_parts(source_path: str) -> dict:
+    """
+    [분할 모드 사전 조사] 셀 길이 제한을 넘는 값이 있는 컬럼별로,
+    최대 몇 개의 셀로 나누어야 하는지를 구합니다. 문자열 컬럼의 길이만 읽습니다.
+    길이는 엑셀처럼 UTF-16 코드 단위로 셉니다. (코드 포인트 수 + BMP 밖의 문자 수)
+    """
+    parts = {}
+    schema = pq.read_schema(source_path)
+    string_cols = [f.name for f in schema if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)]
+    parquet_file = pq.ParquetFile(source_path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=string_cols):
+        for col in string_cols:
+            values = batch.column(col)
+            lengths = pc.add(pc.utf8_length(values), pc.count_substring_regex(values, r'[\x{10000}-\x{10FFFF}]'))
+            oversized = pc.filter(values, pc.greater(lengths, EXCEL_CELL_LIMIT))
+            for value in oversized.to_pylist():
+                parts[col] = max(parts.get(col, 1), len(_excel_pieces(value)))
+    return parts
+
+
+def _excel_value(value):
+    """엑셀 셀에 쓸 수 있는 값으로 바꿉니다. (결측값은 빈 셀, 제어 문자는 제거)"""
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    if isinstance(value, np.generic):
+        # numpy 스칼라(bool_ 등)는 파이썬 값으로 바꿔야 엑셀에 TRUE/FALSE 등 원래 타입으로 기록됩니다.
+        return value.item()
+    return value
+
+
+def write_excel(source_path: str, output_path: str, oversize: str = 'truncate') -> dict:
+    """
+    정제 결과 Parquet을 openpyxl write-only 모드로 한 행씩 엑셀에 기록합니다.
+    (전체 통합문서를 메모리에 만들지 않으므로 데이터 크기와 관계없이 메모리 사용량이 일정합니다.)
+
+    엑셀 셀 길이 제한(UTF-16 코드 단위 32,767자)을 넘는 값은 oversize 방식으로 처리합니다.
+        'truncate' - 제한 길이에 맞게 자르고 끝에 표시를 붙입니다.
+        'split'    - '<컬럼>_2', '<컬럼>_3' ... 이어지는 컬럼에 나누어 담습니다.
+    처리한 셀을 컬럼별로 정리한 보고서 {컬럼: {'cells': 셀 수, 'max_length': 최대 길이}}와
+    시트 행 수 제한으로 빠진 행 수('_skipped_rows')를 돌려줍니다.
+    """
+    split_parts = _oversize_parts(source_path) if oversize == 'split' else {}
+    columns = pq.read_schema(source_path).names
+    header = []
+    for col in columns:
+        header.append(col)
+        header.extend(f"{col}_{i}" for i in range(2, split_parts.get(col, 1) + 1))
+
+    report = {}
+    rows_written, skipped = 0, 0
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(header)
+
+    for batch_df in _iter_batches(source_path):
+        for row in batch_df.itertuples(index=False, name=None):
+            if rows_written >= EXCEL_MAX_ROWS - 1:
+                skipped += 1
+                continue
+            cells = []
+            for col, value in zip(columns, row):
+                value = _excel_value(value)
+                n_parts = split_parts.get(col, 1)
+                # 모든 문자가 2단위여도 제한 이하인 짧은 값은 인코딩해 세지 않습니다.
+                length = _excel_length(value) if isinstance(value, str) and len(value) > EXCEL_CELL_LIMIT // 2 else 0
+                if length > EXCEL_CELL_LIMIT:
+                    entry = report.setdefault(col, {'cells': 0, 'max_length': 0})
+                    entry['cells'] += 1
+                    entry['max_length'] = max(entry['max_length'], length)
+                    if oversize == 'split':
+                        pieces = _excel_pieces(value)
+                        cells.extend(pieces + [None] * (n_parts - len(pieces)))
+                        continue
+                    value = _excel_pieces(value, EXCEL_CELL_LIMIT - _excel_length(TRUNCATION_MARKER))[0] + TRUNCATION_MARKER
+                cells.append(value)
+                cells.extend([None] * (n_parts - 1))
+            sheet.append(cells)
+            rows_written += 1
+
+    tmp_path = f"{output_path}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, output_path)
+    if skipped:
+        report['_skipped_rows'] = skipped
+    return report
+
+
+def write_csv_zst(source_path: str, output_path: str) -> dict:
+    """정제 결과 Parquet을 배치 단위로 zstd 압축 CSV(UTF-8)에 스트리밍합니다."""
+    parquet_file = pq.ParquetFile(source_path, memory_map=True)
+    tmp_path = f"{output_path}.tmp"
+    with pa.CompressedOutputStream(tmp_path, 'zstd') as stream:
+        with pa_csv.CSVWriter(stream, parquet_file.schema_arrow) as writer:
+            for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE):
+                writer.write_batch(batch)
+    os.replace(tmp_path, output_path)
+    return {}
+
+
+def clear_exports(export_root: str, keep: str = None):
+    """내보내기 폴더에서 keep(현재 수집 ID)을 제외한 이전 수집의 내보내기 파일을 지웁니다."""
+    if not os.path.isdir(export_root):
+        return
+    for name in os.listdir(export_root):
+        if name != keep:
+            shutil.rmtree(os.path.join(export_root, name), ignore_errors=True)
+
+
+def export(source_path: str, output_dir: str, fmt: str, oversize: str = 'truncate') -> tuple:
+    """
+    정제 결과 Parquet(source_path)을 fmt 형식으로 output_dir에 내보내고 (파일 경로, 보고서)를 돌려줍니다.
+    Parquet 형식은 원본 파일을 그대로 사용합니다.
+    """
+    if fmt == 'parquet':
+        return source_path, {}
+    os.makedirs(output_dir, exist_ok=True)
+    extension = EXPORT_FORMATS[fmt][0]
+    suffix = f"_{oversize}" if fmt == 'xlsx' else ""
+    output_path = os.path.join(output_dir, f"export{suffix}.{extension}")
+    if fmt == 'xlsx':
+        report = write_excel(source_path, output_path, oversize=oversize)
+    else:
+        report = write_csv_zst(source_path, output_path)
+    return output_path, report
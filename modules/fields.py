@@ -0,0 +1,39 @@
+# modules/fields.py
+"""
+data_processor가 실제로 읽는 OpenAlex work 필드 목록.
+경량 수집 모드에서는 url_builder가 이 목록으로 select= 파라미터를 만들어,
+정제에 쓰이지 않는 referenced_works, related_works, counts_by_year, locations 등을 받지 않습니다.
+(인용 네트워크 확장을 켜면 REFERENCE_FIELDS도 함께 받습니다)
+정제 로직에서 새 필드를 읽게 되면 반드시 여기에 추가해야 합니다.
+"""
+
+# finalize_dataframe에서 그대로 보여주는 스칼라 필드
+SCALAR_FIELDS = [
+    'id',
+    'doi',
+    'title',
+    'publication_year',
+    'cited_by_count',
+    'fwci',
+]
+
+# refine_* 함수들이 정제에 사용하는 중첩 필드
+NESTED_FIELDS = [
+    'authorships',                      # refine_authors
+    'corresponding_author_ids',         # refine_authors
+    'primary_topic',                    # refine_topics_and_keywords
+    'topics',                           # refine_topics_and_keywords
+    'keywords',                         # refine_topics_and_keywords
+    'abstract_inverted_index',          # refine_abstract
+    'citation_normalized_percentile',   # refine_percentile
+    'primary_location',                 # refine_journal
+]
+
+WORK_FIELDS = SCALAR_FIELDS + NESTED_FIELDS
+
+
+# 인용 네트워크 확장(citations)이 수집한 논문에서 읽는 필드
+REFERENCE_FIELDS = ['referenced_works']
+
+# 참고문헌을 ids.openalex 필터로 일괄 조회할 때 받는 필드 (citations의 노드 표 컬럼)
+CITATION_NODE_FIELDS = ['id', 'doi', 'title', 'publication_year', 'cited_by_count', 'primary_location']
@@ -0,0 +1,189 @@
+# modules/http_client.py
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# OpenAlex polite pool 기준 (초당 10회)
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30            # 초
+MAX_RETRIES = 6
+BACKOFF_BASE = 0.5              # 초, 재시도마다 2배씩 증가
+BACKOFF_MAX = 60.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_WINDOW = 1000           # 통계에 보관할 최근 응답 시간 개수
+
+
+class TokenBucket:
+    """여러 스레드가 공유하는 토큰 버킷 방식의 요청 속도 제한기."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 기다립니다."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """429 응답 등으로 서버가 대기를 요구하면 버킷을 비워 모든 스레드를 잠시 멈춥니다."""
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class RequestStats:
+    """요청 수, 재시도 수, 응답 시간(ms)을 스레드 안전하게 집계합니다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.retries = 0
+            self.bytes_downloaded = 0
+            self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency_ms: float, retries: int, num_bytes: int):
+        with self.lock:
+            self.requests += 1
+            self.retries += retries
+            self.bytes_downloaded += num_bytes
+            self.latencies.append(latency_ms)
+
+    def summary(self) -> dict:
+        """평균/p50/p95 응답 시간과 누적 재시도 수를 딕셔너리로 돌려줍니다."""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            requests_count, retries, num_bytes = self.requests, self.retries, self.bytes_downloaded
+
+        def percentile(p):
+            if not latencies: return 0.0
+            return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+        return {
+            "requests": requests_count,
+            "retries": retries,
+            "bytes_downloaded": num_bytes,
+            "latency_avg_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50_ms": percentile(50),
+            "latency_p95_ms": percentile(95),
+        }
+
+    def format_summary(self) -> str:
+        """진행 상황 영역에 보여줄 한 줄 요약."""
+        s = self.summary()
+        return (f"응답 시간 평균 {s['latency_avg_ms']:.0f}ms / p95 {s['latency_p95_ms']:.0f}ms, "
+                f"요청 {s['requests']}회, 재시도 {s['retries']}회")
+
+
+def _parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 시간(초)으로 변환합니다."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenAlexClient:
+    """
+    연결을 재사용하는 requests.Session 기반의 OpenAlex API 클라이언트.
+    - keep-alive 커넥션 풀과 gzip 전송
+    - 토큰 버킷으로 초당 요청 수 제한 (모든 스레드 공유)
+    - 429/5xx 및 네트워크 오류 시 지수 백오프 + 지터로 재시도, Retry-After 준수
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = MAX_RETRIES):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        self.limiter = TokenBucket(rate, burst)
+        self.stats = RequestStats()
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    def _backoff(self, attempt: int) -> float:
+        """지수 백오프에 full jitter를 적용한 대기 시간."""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def get_json(self, url: str, stats: RequestStats = None) -> dict:
+        """
+        GET 요청 후 JSON을 반환합니다. 재시도를 모두 소진하면 RequestException을 발생시킵니다.
+        응답 통계는 클라이언트 전체 누적(self.stats)에 기록하고, stats를 지정하면 그 집계에도 함께 기록합니다.
+        (클라이언트는 프로세스 전체에서 공유되므로, 작업별 통계는 작업마다 만든 stats로 따로 모읍니다)
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = _parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self._backoff(attempt)
+                if response.status_code == 429:
+                    # 버킷을 비워 두면 다음 acquire()에서 모든 스레드가 함께 기다립니다.
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                attempt += 1
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.stats.record(latency_ms, attempt, len(response.content))
+            if stats is not None:
+                stats.record(latency_ms, attempt, len(response.content))
+            return data
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAlexClient:
+    """프로세스 전체에서 공유하는 OpenAlexClient 인스턴스를 돌려줍니다."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAlexClient()
+        return _client
@@ -0,0 +1,463 @@
+# modules/jobs.py
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from modules import url_builder
+from modules import citations
+from modules import data_fetcher
+from modules import data_processor
+from modules import query_cache
+from modules import storage
+from modules import metrics
+from modules import query_engine
+from modules.http_client import RequestStats
+from modules.reporter import Reporter
+
+JOBS_DIR = os.path.join("data", "jobs")
+JOB_FILENAME = "job.json"
+SPEC_FILENAME = "spec.json"
+RAW_FILENAME = "collected_data.jsonl"
+UPDATES_FILENAME = "collected_updates.jsonl"
+MAX_CONCURRENT_JOBS = 2           # 동시에 실행할 작업 수 (나머지는 대기열에서 순서대로 실행)
+MAX_MESSAGES = 50                 # job.json에 남길 최근 메시지 수
+PROGRESS_SAVE_INTERVAL_S = 0.5    # 진행률을 job.json에 기록하는 최소 간격
+
+ACTIVE_STATUSES = ('queued', 'running')
+STATUS_LABELS = {
+    'queued': "대기 중", 'running': "실행 중", 'done': "완료",
+    'failed': "실패", 'cancelled': "취소됨", 'interrupted': "중단됨",
+}
+PHASE_LABELS = {'collecting': "수집", 'citations': "참고문헌 확장", 'processing': "정제"}
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _describe(params: dict) -> str:
+    """작업 목록에 보여줄 짧은 검색 조건 요약."""
+    keywords = params.get('or_keywords') or []
+    label = ', '.join(keywords[:3]) + (f" 외 {len(keywords) - 3}개" if len(keywords) > 3 else '')
+    if params.get('and_keywords'):
+        label += f" + {', '.join(params['and_keywords'])}"
+    year_range = params.get('year_range')
+    if year_range:
+        label += f" ({year_range})"
+    return label or "(검색어 없음)"
+
+
+class Job:
+    """
+    백그라운드 작업 하나. 작업마다 'data/jobs/<id>/' 폴더를 따로 쓰므로 여러 사용자가 동시에 수집해도 파일이 섞이지 않습니다.
+    상태는 폴더의 job.json에 기록되어, 다른 세션이나 서버를 다시 시작한 뒤에도 작업 목록에서 조회할 수 있습니다.
+    """
+
+    def __init__(self, workspace: str, state: dict):
+        self.workspace = workspace
+        self.state = state
+        self.cancel_event = threading.Event()
+        self.run_metrics = None      # 이 프로세스에서 실행한 경우의 RunMetrics (결과 화면의 성능 지표용)
+        self._lock = threading.Lock()
+
+    @property
+    def id(self) -> str:
+        return self.state['id']
+
+    @property
+    def status(self) -> str:
+        return self.state['status']
+
+    @property
+    def raw_path(self) -> str:
+        return os.path.join(self.workspace, RAW_FILENAME)
+
+    @property
+    def updates_path(self) -> str:
+        return os.path.join(self.workspace, UPDATES_FILENAME)
+
+    @property
+    def refined_path(self) -> str:
+        return os.path.join(self.workspace, storage.REFINED_FILENAME)
+
+    @property
+    def db_path(self) -> str:
+        return os.path.join(self.workspace, query_engine.DB_FILENAME)
+
+    @property
+    def report_path(self) -> str:
+        return os.path.join(self.workspace, metrics.REPORT_FILENAME)
+
+    @property
+    def export_dir(self) -> str:
+        return os.path.join(self.workspace, "exports")
+
+    def update(self, **fields):
+        """상태 항목을 갱신하고 job.json에 바로 기록합니다."""
+        with self._lock:
+            self.state.update(fields, updated_at=_now())
+            _write_json(os.path.join(self.workspace, JOB_FILENAME), self.state)
+
+    def log(self, level: str, message: str):
+        """화면에 보여줄 메시지를 남깁니다. (level: info/success/warning/error/write)"""
+        with self._lock:
+            messages = self.state.setdefault('messages', [])
+            messages.append({"level": level, "message": message, "at": _now()})
+            del messages[:-MAX_MESSAGES]
+            self.state['updated_at'] = _now()
+            _write_json(os.path.join(self.workspace, JOB_FILENAME), self.state)
+
+    def owned_by(self, owner: str) -> bool:
+        """owner(작업을 제출한 세션)가 이 작업을 취소/삭제/다시 실행할 수 있는지. 소유자 기록이 없는 예전 작업은 누구나 관리합니다."""
+        return self.state.get('owner') in (None, owner)
+
+    @classmethod
+    def load(cls, workspace: str):
+        try:
+            with open(os.path.join(workspace, JOB_FILENAME), 'r', encoding='utf-8') as f:
+                return cls(workspace, json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+
+class JobReporter(Reporter):
+    """수집 함수의 진행 상황을 화면 대신 job.json에 기록하고, 작업 취소 요청을 전달합니다."""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self._last_saved = 0.0
+
+    def info(self, message: str):
+        self.job.log('info', message)
+
+    def success(self, message: str):
+        self.job.log('success', message)
+
+    def warning(self, message: str):
+        self.job.log('warning', message)
+
+    def error(self, message: str):
+        self.job.log('error', message)
+
+    def write(self, message: str):
+        self.job.log('write', message)
+
+    def progress(self, fraction: float, text: str):
+        # 페이지마다 파일을 다시 쓰지 않도록 일정 간격으로만 기록합니다. (완료 시점은 항상 기록)
+        now = time.monotonic()
+        if fraction >= 1.0 or now - self._last_saved >= PROGRESS_SAVE_INTERVAL_S:
+            self._last_saved = now
+            self.job.update(progress=round(fraction, 4), status_text=text)
+
+    def cancelled(self) -> bool:
+        return self.job.cancel_event.is_set()
+
+
+# --- 작업 내용: 수집 → 정제 → 저장 ---
+
+def _collect(job: Job, spec: dict, reporter: JobReporter):
+    """캐시 사용/갱신/새로 수집 중 spec['cache_action']에 따라 job.raw_path를 채웁니다. (완료 여부, 수집 중 정제 결과)"""
+    params, run_options = spec['params'], spec['run_options']
+    create_query = url_builder.create_broad_query if spec['search_mode'] == 'broad' else url_builder.create_precise_query
+    cache_key = spec['cache_key']
+
+    def run_fetch(query_params, filepath, on_page=None):
+        """선택한 수집 방식(샤드 병렬/단일)으로 filepath에 수집하고 완료 여부를 돌려줍니다."""
+        # 이어받기로 여러 번 수집하면 같은 'fetch' 단계에 합산합니다.
+        # 클라이언트는 다른 작업과 공유하므로 요청 통계는 이 수집만의 RequestStats에 따로 모읍니다.
+        request_stats = RequestStats()
+        with metrics.stage('fetch', accumulate=True) as stage:
+            if run_options['use_sharding']:
+                shards = url_builder.split_into_shards(query_params, by_year=True, by_type=run_options['shard_by_type'])
+                shard_urls = [create_query(**shard) for shard in shards]
+                completed = data_fetcher.fetch_sharded_and_save(shard_urls, filepath, max_workers=run_options['max_workers'],
+                                                                on_page=on_page, reporter=reporter, stats=request_stats)
+            else:
+                completed = data_fetcher.fetch_and_save_incrementally(create_query(**query_params), filepath,
+                                                                      on_page=on_page, reporter=reporter, stats=request_stats)
+            if os.path.exists(filepath):
+                with open(filepath, 'rb') as f:
+                    stage.rows = sum(1 for _ in f)   # 이어받은 경우에도 파일 전체 건수
+            summary = request_stats.summary()
+            stage.bytes = (stage.bytes or 0) + summary['bytes_downloaded']
+            stage.extra.update(
+                requests=stage.extra.get('requests', 0) + summary['requests'],
+                retries=stage.extra.get('retries', 0) + summary['retries'],
+                latency_p50_ms=round(summary['latency_p50_ms'], 1),
+                latency_p95_ms=round(summary['latency_p95_ms'], 1))
+        return completed
+
+    if spec['cache_action'] == "use":
+        with metrics.stage('cache_restore'):
+            query_cache.restore(cache_key, job.raw_path)
+        reporter.success("캐시된 결과를 불러왔습니다.")
+        return True, None
+
+    if spec['cache_action'] == "refresh":
+        # 마지막 수집 이후 새로 생기거나 변경된 작업물만 받아 id 기준으로 캐시에 병합
+        last_fetched = query_cache.lookup(cache_key)['fetched_at'][:10]
+        completed = run_fetch(dict(params, from_updated_date=last_fetched), job.updates_path)
+        if completed:
+            if os.path.exists(job.updates_path):
+                summary = query_cache.merge_updates(cache_key, job.updates_path)
+                os.remove(job.updates_path)
+                reporter.success(f"캐시 갱신 완료: 변경 {summary['updated']}건, 신규 {summary['added']}건 (총 {summary['items']}건)")
+            query_cache.restore(cache_key, job.raw_path)
+        return completed, None
+
+    # 처음부터 새로 수집하는 경우에는 도착한 페이지를 수집과 동시에 정제해 job.refined_path에 바로 씁니다.
+    # (이어받기는 수집 후 파일에서 정제하고, 멀티프로세스 병렬 정제를 고른 경우에는 수집 후 병렬로 정제합니다)
+    refiner = None
+    if (run_options['overlap_refine'] and not run_options['parallel_refine']
+            and not os.path.exists(data_fetcher.checkpoint_path(job.raw_path))):
+        refiner = data_processor.OverlappedRefiner(job.refined_path)
+    overlap_rows = None
+    try:
+        completed = run_fetch(params, job.raw_path, on_page=refiner.on_page if refiner else None)
+        if refiner is not None and completed:
+            # 수집이 끝난 뒤 남은 페이지의 정제를 기다리고 파일을 닫은 시간
+            with metrics.stage('refine_overlap_wait') as stage:
+                try:
+                    overlap_rows = refiner.finish()
+                except Exception as e:
+                    reporter.warning(f"수집 중 정제에 실패하여 수집이 끝난 뒤 다시 정제합니다: {e}")
+                stage.rows = overlap_rows
+                stage.extra.update(rows_received=refiner.rows_received, refine_busy_s=round(refiner.busy_seconds, 3))
+    finally:
+        # 수집이 실패하거나 취소되어 결과를 쓰지 않을 때도 정제 스레드는 항상 멈추고 쓰던 임시 파일을 지웁니다.
+        if refiner is not None:
+            refiner.close()
+    if completed and os.path.exists(job.raw_path):
+        query_cache.store(cache_key, spec['cache_query'], job.raw_path)
+    return completed, overlap_rows
+
+
+def _refine(job: Job, spec: dict, overlap_rows: int = None) -> int:
+    """
+    job.raw_path를 정제해 job.refined_path(Parquet)에 저장하고 원본을 압축합니다. 정제된 행 수를 돌려줍니다.
+    overlap_rows가 있으면 수집과 동시에 이미 job.refined_path에 저장한 것이므로 원본 압축만 합니다.
+    """
+    filepath = job.raw_path
+    run_options = spec['run_options']
+    final_df, rows = None, 0
+    with metrics.stage('refine') as refine_stage:
+        if overlap_rows is not None:
+            # 수집과 동시에 이미 정제해 저장한 결과
+            rows = overlap_rows
+        elif run_options['parallel_refine']:
+            # 구간별로 나누어 여러 프로세스에서 동시에 정제 (작업자가 구간별 Parquet을 쓰고 바로 합침)
+            rows = data_processor.process_and_refine_data_parallel(filepath, job.refined_path, drop_raw=True)
+        elif os.path.exists(filepath) and os.path.getsize(filepath) > data_processor.CHUNKED_THRESHOLD_BYTES:
+            # 대용량 파일은 청크 단위로 정제해 메모리 사용량을 일정하게 유지 (Parquet에 바로 기록)
+            # 원본 중첩 컬럼(authorships 등)은 단계마다 바로 버립니다. 원본은 아래에서 zstd로 압축해 보관합니다.
+            rows = data_processor.process_and_refine_data_chunked(filepath, job.refined_path, drop_raw=True)
+        else:
+            # data_processor의 마스터 함수 호출
+            final_df = data_processor.process_and_refine_data(filepath)
+        if final_df is not None:
+            rows = len(final_df)
+        refine_stage.extra['overlapped'] = overlap_rows is not None
+        if overlap_rows is None:
+            refine_stage.rows = rows
+        if os.path.exists(filepath):
+            refine_stage.bytes = os.path.getsize(filepath)
+
+    # 정제 결과는 타입이 지정된 Parquet으로, 원본은 zstd로 압축해 보관합니다.
+    if final_df is not None and not final_df.empty:
+        with metrics.stage('save_parquet', rows=rows):
+            storage.save_refined(final_df, job.refined_path)
+    if os.path.exists(filepath):
+        with metrics.stage('compress_raw') as stage:
+            stage.bytes = os.path.getsize(filepath)
+            storage.compress_raw(filepath)
+    return rows
+
+
+def _run(job: Job, spec: dict):
+    """작업자 스레드에서 실행되는 작업 본체. 결과와 오류는 모두 job.json에 기록합니다."""
+    if job.cancel_event.is_set():
+        job.update(status='cancelled', finished_at=_now())
+        return
+    job.run_metrics = metrics.RunMetrics(job.report_path, profile=spec['run_options']['profile'], info=job.state['inputs'])
+    metrics.activate(job.run_metrics)
+    job.update(status='running', phase='collecting', progress=0.0, status_text='', started_at=_now(), finished_at=None)
+    reporter = JobReporter(job)
+    try:
+        overlap_rows = None
+        # 수집을 마친 뒤 단계(참고문헌 확장, 정제)에서 멈춘 작업은 다시 실행할 때 수집을 건너뜁니다.
+        if not spec.get('refine_only') and not job.state.get('collected'):
+            completed, overlap_rows = _collect(job, spec, reporter)
+            if not completed:
+                # 체크포인트가 남아 있으므로 같은 작업을 다시 실행하면 이어서 수집합니다.
+                job.update(status='cancelled' if job.cancel_event.is_set() else 'failed',
+                           resumable=os.path.exists(job.raw_path), finished_at=_now())
+                return
+            job.update(collected=True)
+        if job.cancel_event.is_set():
+            job.update(status='cancelled', resumable=os.path.exists(job.raw_path), finished_at=_now())
+            return
+
+        if spec['run_options'].get('expand_citations') and os.path.exists(job.raw_path):
+            job.update(phase='citations', progress=0.0, status_text="참고문헌을 모아 인용 네트워크를 만드는 중입니다...")
+            request_stats = RequestStats()
+            with metrics.stage('expand_citations') as stage:
+                summary = citations.expand_citations(job.raw_path, job.workspace, spec['params']['email'],
+                                                     spec['run_options']['max_workers'], reporter, stats=request_stats)
+                if summary:
+                    stage.rows = summary['edges']
+                    stage.extra.update(summary)
+                request_summary = request_stats.summary()
+                stage.bytes = request_summary['bytes_downloaded']
+                stage.extra.update(requests=request_summary['requests'], retries=request_summary['retries'])
+            if summary is None:
+                # 받은 참고문헌은 작업 폴더에 남아 있어 다시 실행하면 남은 묶음만 조회합니다.
+                job.update(status='cancelled' if job.cancel_event.is_set() else 'failed', resumable=True,
+                           finished_at=_now())
+                return
+
+        job.update(phase='processing', status_text="수집한 데이터를 정제하는 중입니다...")
+        rows = _refine(job, spec, overlap_rows)
+        if rows:
+            # 결과 화면의 필터/정렬/페이지 조회용 데이터베이스
+            job.update(status_text="결과 조회용 색인을 만드는 중입니다...")
+            with metrics.stage('build_query_index', rows=rows) as stage:
+                query_engine.build_index(job.refined_path, job.db_path)
+                stage.bytes = os.path.getsize(job.db_path)
+        job.update(status='done', phase='done', progress=1.0, rows=rows, resumable=False, finished_at=_now(),
+                   harvest_id=storage.harvest_id(job.refined_path) if rows else None)
+    except Exception as e:
+        reporter.error(f"알 수 없는 오류가 발생했습니다: {e}")
+        job.update(status='failed', resumable=os.path.exists(job.raw_path), finished_at=_now())
+    finally:
+        metrics.activate(None)
+
+
+# --- 작업 실행기 ---
+
+class JobRunner:
+    """
+    수집/정제 작업을 정해진 수(max_workers)의 백그라운드 스레드에서 실행합니다.
+    Streamlit 스크립트는 작업을 제출한 뒤 job.json의 진행 상황만 주기적으로 읽어 화면에 표시합니다.
+    (OpenAlex 요청 속도 제한은 http_client의 공유 클라이언트가 모든 작업에 걸쳐 지킵니다)
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR, max_workers: int = MAX_CONCURRENT_JOBS):
+        self.jobs_dir = jobs_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}    # 이 프로세스에서 제출한 작업 (취소 신호와 성능 지표를 들고 있음)
+        self._lock = threading.Lock()
+        self._mark_interrupted()
+
+    def _mark_interrupted(self):
+        """이전 서버 프로세스에서 실행/대기 중이던 작업은 더 이상 진행되지 않으므로 '중단됨'으로 표시합니다."""
+        for job in self._load_all():
+            if job.status in ACTIVE_STATUSES:
+                job.update(status='interrupted', resumable=os.path.exists(job.raw_path))
+
+    def _load_all(self) -> list:
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        jobs = (Job.load(os.path.join(self.jobs_dir, name)) for name in os.listdir(self.jobs_dir))
+        return [job for job in jobs if job is not None]
+
+    def _enqueue(self, job: Job, spec: dict) -> Job:
+        job.cancel_event = threading.Event()
+        job.update(status='queued', phase='queued', progress=0.0, status_text='')
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(_run, job, spec)
+        return job
+
+    def submit(self, spec: dict, inputs: dict, owner: str = None) -> Job:
+        """
+        새 작업을 만들어 대기열에 넣습니다.
+        spec: params(prepare_params 결과), search_mode, run_options, cache_key, cache_query, cache_action
+        inputs: 작업 목록과 실행 보고서에 남길 입력값 (이메일 등 공유하면 안 되는 값은 빼고 전달)
+        owner: 작업을 제출한 세션. 작업 목록은 모든 세션이 보지만 취소/삭제/다시 실행은 이 세션만 할 수 있습니다.
+        """
+        job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        workspace = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(workspace, exist_ok=True)
+        # 이어서 실행할 때 필요한 전체 조건은 작업 목록(job.json)과 분리해 저장합니다.
+        _write_json(os.path.join(workspace, SPEC_FILENAME), spec)
+        job = Job(workspace, {"id": job_id, "created_at": _now(), "label": _describe(spec['params']),
+                              "inputs": inputs, "owner": owner, "messages": [], "rows": None})
+        return self._enqueue(job, spec)
+
+    def resume(self, job_id: str, refine_only: bool = False, owner: str = None) -> Job:
+        """
+        실패/취소/중단된 작업을 같은 폴더에서 다시 실행합니다. 체크포인트가 있으면 이어서 수집하고,
+        refine_only=True이면 수집 없이 지금까지 받은 데이터만 정제합니다.
+        owner를 지정하면 그 세션이 제출한 작업만 다시 실행합니다. (이미 실행 중이거나 다른 세션의 작업이면 ValueError)
+        """
+        job = self.get(job_id)
+        if job is None or job.status in ACTIVE_STATUSES or (owner is not None and not job.owned_by(owner)):
+            raise ValueError(f"다시 실행할 수 없는 작업입니다: {job_id}")
+        with open(os.path.join(job.workspace, SPEC_FILENAME), 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        job.log('info', "지금까지 받은 데이터로 정제를 시작합니다." if refine_only else "작업을 다시 시작합니다.")
+        return self._enqueue(job, dict(spec, refine_only=refine_only))
+
+    def cancel(self, job_id: str, owner: str = None) -> bool:
+        """
+        실행/대기 중인 작업에 취소를 요청합니다. 수집은 다음 페이지를 받기 전에 멈춥니다.
+        owner를 지정하면 그 세션이 제출한 작업만 취소합니다.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES or (owner is not None and not job.owned_by(owner)):
+            return False
+        job.cancel_event.set()
+        job.log('warning', "취소를 요청했습니다. 진행 중인 요청이 끝나면 멈춥니다.")
+        return True
+
+    def get(self, job_id: str):
+        """작업을 돌려줍니다. 이 프로세스에서 제출하지 않은 작업은 job.json에서 읽어옵니다."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job or Job.load(os.path.join(self.jobs_dir, job_id))
+
+    def history(self, limit: int = None) -> list:
+        """최근에 만든 작업부터 목록을 돌려줍니다."""
+        with self._lock:
+            in_memory = dict(self._jobs)
+        jobs = [in_memory.get(job.id, job) for job in self._load_all()]
+        jobs.sort(key=lambda job: job.state['created_at'], reverse=True)
+        return jobs[:limit] if limit else jobs
+
+    def delete(self, job_id: str, owner: str = None) -> bool:
+        """
+        끝난 작업의 폴더를 삭제합니다. 실행/대기 중인 작업은 지우지 않습니다.
+        owner를 지정하면 그 세션이 제출한 작업만 삭제합니다.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in ACTIVE_STATUSES or (owner is not None and not job.owned_by(owner)):
+            return False
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        shutil.rmtree(job.workspace, ignore_errors=True)
+        return True
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    """서버 프로세스 전체(모든 사용자 세션)에서 공유하는 JobRunner를 돌려줍니다."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
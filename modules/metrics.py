@@ -0,0 +1,224 @@
+# modules/metrics.py
+import contextvars
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+REPORT_FILENAME = "run_report.json"
+PROFILE_TOP_N = 25     # 성능 분석 모드에서 단계별로 보고서에 남길 상위 함수 수 (누적 시간 기준)
+
+# 현재 스크립트 실행(Streamlit 세션 스레드)에서 활성화된 RunMetrics. 작업자 스레드/프로세스에서는 비어 있습니다.
+_current_run = contextvars.ContextVar('current_run', default=None)
+
+# tracemalloc은 프로세스 전체에 하나뿐이므로, 동시에 실행되는 작업들의 단계가 함께 씁니다.
+# 첫 단계가 켜고 마지막 단계가 끝날 때 끄며, 측정 중인 다른 단계가 있으면 최대값을 초기화하지 않습니다.
+_tracing_lock = threading.Lock()
+_tracing_users = 0        # tracemalloc으로 측정 중인 단계 수
+_tracing_starts = 0       # 지금까지 측정을 시작한 단계 수 (다른 단계와 겹쳤는지 판단용)
+_tracing_owned = False    # tracemalloc을 이 모듈이 켰는지 (밖에서 켠 경우에는 끄지 않음)
+
+
+def _begin_tracing() -> tuple:
+    """단계의 메모리 측정을 시작하고, _end_tracing에 넘길 값을 돌려줍니다."""
+    global _tracing_users, _tracing_starts, _tracing_owned
+    with _tracing_lock:
+        shared = _tracing_users > 0
+        if not shared:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracing_owned = True
+            tracemalloc.reset_peak()
+        _tracing_users += 1
+        _tracing_starts += 1
+        return _tracing_starts, shared
+
+
+def _end_tracing(token: tuple) -> tuple:
+    """
+    단계가 시작된 뒤 프로세스 전체의 파이썬 메모리 최대 사용량(MB)과, 그동안 다른 단계도 측정 중이었는지를 돌려줍니다.
+    다른 단계와 겹쳤다면 최대값에는 그 단계가 할당한 메모리도 포함됩니다.
+    """
+    global _tracing_users, _tracing_owned
+    started, shared = token
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        shared = shared or _tracing_users > 1 or _tracing_starts != started
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()   # 단계 밖의 코드까지 느려지지 않도록 바로 끕니다.
+            _tracing_owned = False
+    return round(peak / 1024 ** 2, 1), shared
+
+
+def peak_rss_mb() -> float:
+    """
+    프로세스 시작 이후 최대 RSS(MB). 같은 서버 프로세스에서 실행된 모든 작업과 세션이 합산된 값입니다.
+    (Linux는 KB, macOS는 바이트 단위로 보고됩니다)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+class StageMetrics:
+    """
+    단계 하나의 측정값. stage() 블록 안에서 rows/bytes를 채우고, 필요한 값은 extra에 추가합니다.
+    (accumulate=True로 같은 이름의 단계를 여러 번 측정하면 시간/행 수/바이트가 합산됩니다)
+    """
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        self.parent = None
+        self.rows = rows
+        self.bytes = None
+        self.wall_s = 0.0
+        self.calls = 0
+        self.process_peak_rss_mb = None
+        self.traced_peak_mb = None
+        self.traced_shared = None
+        self.profile_path = None
+        self.profile_top = None
+        self.extra = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "parent": self.parent,
+            "wall_s": round(self.wall_s, 4),
+            "calls": self.calls,
+            "rows": self.rows,
+            "rows_per_s": round(self.rows / self.wall_s, 1) if self.rows and self.wall_s else None,
+            "bytes": self.bytes,
+            "process_peak_rss_mb": self.process_peak_rss_mb,
+            "traced_peak_mb": self.traced_peak_mb,
+            "traced_shared": self.traced_shared,
+            "profile_path": self.profile_path,
+            "profile_top": self.profile_top,
+            **self.extra,
+        }
+
+
+class RunMetrics:
+    """
+    수집부터 정제/내보내기까지 한 번의 실행에서 단계별 측정값을 모으고,
+    단계가 끝날 때마다 report_path(JSON)에 실행 보고서를 다시 씁니다.
+
+    profile=True(성능 분석 모드)이면 최상위 단계마다 cProfile로 함수별 시간을 기록해
+    '<보고서 폴더>/profile_<단계>.prof'로 저장하고, tracemalloc으로 파이썬 메모리 최대 사용량을 잽니다.
+    (cProfile은 단계를 실행한 스레드만 기록하므로, 병렬 수집/정제의 작업자 스레드·프로세스는 포함되지 않습니다)
+    process_peak_rss_mb와 traced_peak_mb는 프로세스 전체 값입니다. 다른 작업의 단계와 겹쳐 측정된 경우
+    traced_shared가 True이며, 이때 traced_peak_mb에는 겹친 단계의 메모리도 포함됩니다.
+    """
+
+    def __init__(self, report_path: str = None, profile: bool = False, info: dict = None):
+        self.report_path = report_path
+        self.profile = profile
+        self.info = info or {}
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self._open_stages = []
+
+    def _find(self, name: str):
+        return next((s for s in self.stages if s.name == name), None)
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None, accumulate: bool = False):
+        record = self._find(name) if accumulate else None
+        if record is None:
+            record = StageMetrics(name)
+            self.stages.append(record)
+        if rows is not None:
+            record.rows = (record.rows or 0) + rows if accumulate else rows
+        if self._open_stages:
+            record.parent = self._open_stages[-1]
+
+        # 단계 안에서 다시 단계를 재는 경우(중첩)에는 바깥 단계에서만 프로파일링합니다.
+        profiler = None
+        if self.profile and not self._open_stages:
+            profiler = cProfile.Profile()
+            tracing = _begin_tracing()
+            profiler.enable()
+        self._open_stages.append(name)
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_s += time.perf_counter() - started
+            record.calls += 1
+            self._open_stages.pop()
+            record.process_peak_rss_mb = peak_rss_mb()
+            if profiler is not None:
+                profiler.disable()
+                record.traced_peak_mb, record.traced_shared = _end_tracing(tracing)
+                self._save_profile(record, profiler)
+            self.save()
+
+    def _save_profile(self, record: StageMetrics, profiler: cProfile.Profile):
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        record.profile_top = out.getvalue()
+        if self.report_path:
+            path = os.path.join(os.path.dirname(self.report_path) or '.', f"profile_{record.name}.prof")
+            stats.dump_stats(path)
+            record.profile_path = path
+
+    def summary(self) -> list:
+        """단계별 측정값을 딕셔너리 목록으로 돌려줍니다. (Streamlit 표시용, 프로파일 텍스트 제외)"""
+        return [{k: v for k, v in s.to_dict().items() if k != 'profile_top'} for s in self.stages]
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "updated_at": datetime.now().isoformat(timespec='seconds'),
+            "profile": self.profile,
+            "info": self.info,
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpu_count": os.cpu_count()},
+            "process_peak_rss_mb": peak_rss_mb(),
+            "stages": [s.to_dict() for s in self.stages],
+        }
+
+    def save(self):
+        if not self.report_path:
+            return
+        os.makedirs(os.path.dirname(self.report_path) or '.', exist_ok=True)
+        tmp_path = f"{self.report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.report_path)
+
+
+def activate(run: RunMetrics):
+    """
+    이후 stage() 호출이 run에 기록되도록 현재 실행에 연결합니다.
+    Streamlit은 단계가 바뀔 때마다 스크립트를 다시 실행하므로, 세션에 보관한 RunMetrics를 매번 다시 연결합니다.
+    """
+    _current_run.set(run)
+
+
+def current():
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name: str, rows: int = None, accumulate: bool = False):
+    """
+    현재 실행(activate)에 단계 측정값을 기록합니다. 활성화된 실행이 없으면(작업자 프로세스, 스크립트 직접 호출 등)
+    빈 측정값만 넘겨주고 아무것도 기록하지 않습니다.
+    """
+    run = _current_run.get()
+    if run is None:
+        yield StageMetrics(name, rows)
+        return
+    with run.stage(name, rows=rows, accumulate=accumulate) as record:
+        yield record
@@ -0,0 +1,214 @@
+# modules/query_cache.py
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, timedelta
+
+CACHE_DIR = os.path.join("data", "cache")
+CACHE_TTL_DAYS = 30                      # API에서 받은 지(fetched_at) 이 기간이 지난 캐시는 만료되어 삭제
+CACHE_MAX_BYTES = 2 * 1024 ** 3          # 캐시 전체 크기 상한 (넘으면 오래 안 쓴 것부터 삭제)
+
+# 여러 백그라운드 작업이 같은 캐시 항목을 동시에 쓰거나 지우지 않도록 쓰기 작업을 직렬화합니다.
+_write_lock = threading.RLock()
+
+
+def _normalize_keywords(keywords) -> list:
+    """공백을 정리하고 소문자로 바꾼 뒤, 중복을 없애고 정렬합니다. (키워드 순서는 검색 결과와 무관)"""
+    return sorted({re.sub(r'\s+', ' ', k).strip().lower() for k in (keywords or []) if k and k.strip()})
+
+
+def _normalize_year_range(year_range) -> str:
+    """'2015 - 2020', '2020-2015' 등을 '2015-2020' 형태로 통일합니다."""
+    if not year_range:
+        return ''
+    years = sorted(int(y) for y in re.findall(r'\d{4}', str(year_range)))
+    return f"{years[0]}-{years[-1]}" if years else ''
+
+
+def canonical_query(params: dict, search_mode: str) -> dict:
+    """
+    url_builder.prepare_params 결과를 검색 결과에 영향을 주는 항목만 남긴 정규형으로 바꿉니다.
+    (이메일은 결과와 무관하므로 제외)
+    """
+    return {
+        "search_mode": search_mode,
+        "or_keywords": _normalize_keywords(params.get("or_keywords")),
+        "and_keywords": _normalize_keywords(params.get("and_keywords")),
+        "year_range": _normalize_year_range(params.get("year_range")),
+        "include_types": sorted(params.get("include_types") or []),
+        "select_fields": sorted(params.get("select_fields") or []),
+    }
+
+
+def cache_key(canonical: dict) -> str:
+    """정규화된 쿼리로부터 캐시 키(해시)를 만듭니다."""
+    payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _data_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.jsonl.gz")
+
+
+def _meta_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _write_meta(key: str, meta: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_meta_path(key)}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, _meta_path(key))
+
+
+def _read_meta(key: str):
+    try:
+        with open(_meta_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _expired(meta: dict, ttl_days: int = CACHE_TTL_DAYS) -> bool:
+    """
+    만료 여부는 마지막으로 API에서 받은 시각(fetched_at) 기준입니다.
+    자주 읽는 캐시도 오래된 데이터를 계속 보여주지 않도록 last_accessed는 용량 정리(LRU)에만 씁니다.
+    """
+    return datetime.fromisoformat(meta['fetched_at']) < datetime.now() - timedelta(days=ttl_days)
+
+
+def lookup(key: str):
+    """유효한 캐시가 있으면 메타데이터를, 없거나 만료되었으면 None을 돌려줍니다."""
+    meta = _read_meta(key)
+    if meta is None or not os.path.exists(_data_path(key)):
+        return None
+    if _expired(meta):
+        remove(key)
+        return None
+    return meta
+
+
+def store(key: str, canonical: dict, jsonl_path: str) -> dict:
+    """수집한 JSONL을 gzip으로 압축해 캐시에 저장하고 메타데이터를 기록합니다."""
+    with _write_lock:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_data_path(key)}.tmp"
+        items = 0
+        with open(jsonl_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+            for line in src:
+                if line.strip():
+                    dst.write(line)
+                    items += 1
+        os.replace(tmp_path, _data_path(key))
+
+        now = _now()
+        meta = {
+            "key": key,
+            "query": canonical,
+            "created_at": now,
+            "fetched_at": now,   # 마지막으로 API에서 받은 시각 (갱신 시 from_updated_date 기준)
+            "last_accessed": now,
+            "items": items,
+            "size_bytes": os.path.getsize(_data_path(key)),
+        }
+        _write_meta(key, meta)
+        evict(keep=key)
+        return meta
+
+
+def restore(key: str, dest_path: str):
+    """캐시된 결과를 압축 해제하여 dest_path(JSONL)로 복원합니다."""
+    with _write_lock:
+        with gzip.open(_data_path(key), 'rb') as src, open(dest_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        meta = _read_meta(key)
+        meta['last_accessed'] = _now()
+        _write_meta(key, meta)
+
+
+def merge_updates(key: str, updates_path: str) -> dict:
+    """
+    from_updated_date로 받은 신규/변경 작업물(JSONL)을 캐시에 id 기준으로 병합합니다.
+    기존 레코드 중 갱신된 id는 버리고, 갱신본과 신규 레코드를 뒤에 붙입니다.
+    """
+    with _write_lock:
+        updated = {}
+        with open(updates_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    work = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                updated[work.get('id')] = line if line.endswith('\n') else line + '\n'
+
+        tmp_path = f"{_data_path(key)}.tmp"
+        items, replaced = 0, 0
+        with gzip.open(_data_path(key), 'rt', encoding='utf-8') as src, gzip.open(tmp_path, 'wt', encoding='utf-8') as dst:
+            for line in src:
+                try:
+                    work_id = json.loads(line).get('id')
+                except json.JSONDecodeError:
+                    continue
+                if work_id in updated:
+                    replaced += 1
+                    continue
+                dst.write(line)
+                items += 1
+            for line in updated.values():
+                dst.write(line)
+                items += 1
+        os.replace(tmp_path, _data_path(key))
+
+        meta = _read_meta(key)
+        meta.update({
+            "fetched_at": _now(),
+            "last_accessed": _now(),
+            "items": items,
+            "size_bytes": os.path.getsize(_data_path(key)),
+        })
+        _write_meta(key, meta)
+        evict(keep=key)
+        return {"updated": replaced, "added": len(updated) - replaced, "items": items}
+
+
+def remove(key: str):
+    """캐시 항목을 삭제합니다."""
+    for path in (_data_path(key), _meta_path(key)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def evict(ttl_days: int = CACHE_TTL_DAYS, max_bytes: int = CACHE_MAX_BYTES, keep: str = None):
+    """
+    만료된(fetched_at 기준) 캐시를 지우고, 전체 크기가 상한을 넘으면 가장 오래 사용하지 않은(last_accessed) 것부터 지웁니다.
+    keep으로 지정한 키(방금 저장한 항목)는 크기 때문에 지우지 않습니다.
+    """
+    with _write_lock:
+        if not os.path.isdir(CACHE_DIR):
+            return
+        entries = []
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            meta = _read_meta(key)
+            if meta is None or not os.path.exists(_data_path(key)) or _expired(meta, ttl_days):
+                remove(key)
+                continue
+            entries.append(meta)
+
+        total = sum(m['size_bytes'] for m in entries)
+        candidates = sorted((m for m in entries if m['key'] != keep), key=lambda m: m['last_accessed'])
+        while candidates and total > max_bytes:
+            oldest = candidates.pop(0)
+            remove(oldest['key'])
+            total -= oldest['size_bytes']
@@ -0,0 +1,301 @@
+# modules/query_engine.py
+import os
+import pathlib
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from modules import storage
+from modules.data_processor import FINAL_COLUMNS
+
+DB_FILENAME = "works.sqlite"
+SCHEMA_VERSION = 2                # 테이블 구성이 바뀌면 올립니다. (이전 버전 데이터베이스는 열 때 다시 만듦)
+BUILD_BATCH_SIZE = 20_000
+DEFAULT_PAGE_SIZE = 50
+FACET_LIMIT = 30                  # 패싯마다 보여줄 상위 값 수
+
+# 패싯: 키 -> (정제 결과 컬럼, 화면 표시 이름)
+# 값은 이름 사전 테이블(<키>)의 정수 id로 저장해 필터/집계용 테이블의 행을 작게 유지합니다.
+FACETS = {
+    'journals': ('Journal_Name', "저널"),
+    'institutions': ('All_Institutions', "기관"),
+    'topics': ('Primary_Topic(Score)', "주요 주제"),
+}
+
+# 필터/정렬용 좁은 테이블(works)의 지표 컬럼: works 컬럼 -> 정제 결과 컬럼
+# 무거운 텍스트(초록, 저자 목록 등)는 work_details에 따로 두어, 필터·집계가 큰 행을 읽지 않게 합니다.
+METRIC_COLUMNS = {
+    'publication_year': 'publication_year',
+    'cited_by_count': 'cited_by_count',
+    'fwci': 'fwci',
+    'percentile': 'Citation_Percentile',
+    'top_1': 'Is_Top_1_Percent',
+    'top_10': 'Is_Top_10_Percent',
+}
+FILTER_COLUMNS = ['journal', 'topic', *METRIC_COLUMNS]
+
+# 전문 검색 테이블(works_text, SQLite FTS5)의 컬럼: FTS 컬럼 -> 정제 결과 컬럼
+# 어간 추출(porter)로 단수/복수, 시제가 달라도 찾으므로 OpenAlex 검색과 비슷하게 동작합니다.
+TEXT_COLUMNS = {'title': 'title', 'abstract': 'Abstract', 'keywords': 'Keywords(Scores)'}
+TEXT_TOKENIZER = "porter unicode61 remove_diacritics 2"
+# url_builder와 같은 규칙: OR 키워드는 검색 모드별 범위(넓게=default.search, 정확하게=title_and_abstract.search)에서,
+# AND 키워드는 두 모드 모두 제목과 초록에서 찾습니다. (넓게 검색의 본문(full text)은 수집 데이터에 없어 제외)
+SEARCH_MODE_COLUMNS = {'broad': ['title', 'abstract', 'keywords'], 'precise': ['title', 'abstract']}
+AND_KEYWORD_COLUMNS = ['title', 'abstract']
+
+# 정렬 기준: works 컬럼 -> 화면 표시 이름
+SORT_COLUMNS = {
+    'cited_by_count': "피인용 수",
+    'fwci': "FWCI",
+    'percentile': "인용 백분위",
+    'publication_year': "출판 연도",
+}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _topic_name(value):
+    """'주제 이름 (0.987)' 형식에서 주제 이름만 꺼냅니다."""
+    return value.rsplit(' (', 1)[0] if value else None
+
+
+def _keyword_names(value):
+    """'키워드 (0.5); 키워드 (0.3)' 형식에서 점수를 빼고 이름만 남깁니다."""
+    return re.sub(r" \([0-9.]+\)(?=; |$)", "", value) if value else None
+
+
+def _connect(db_path: str, read_only: bool = True):
+    """요청마다 새 연결을 열고 끝나면 닫습니다. (여러 세션이 동시에 읽기 전용으로 조회)"""
+    if read_only:
+        return closing(sqlite3.connect(f"{pathlib.Path(os.path.abspath(db_path)).as_uri()}?mode=ro", uri=True))
+    return closing(sqlite3.connect(db_path))
+
+
+def build_index(parquet_path: str, db_path: str) -> int:
+    """
+    정제 결과(Parquet)를 배치 단위로 읽어 SQLite 데이터베이스를 만들고 저장한 행 수를 돌려줍니다.
+
+    - works: 필터/정렬용 좁은 테이블 (저널·주제 id, 연도, 인용 지표)
+    - work_institutions: 논문-기관 연결 테이블. 기관 패싯을 조인 없이 셀 수 있도록 works의 필터 컬럼을 함께 둡니다.
+    - work_details: 화면에 보여줄 전체 컬럼 (보이는 페이지의 행만 읽습니다)
+    - works_text: 제목/초록/키워드 전문 검색 색인 (FTS5, 원문은 work_details에 있으므로 색인만 저장)
+    - journals / topics / institutions: 패싯 값 이름 사전 (id, name)
+    """
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    parquet = pq.ParquetFile(parquet_path)
+    detail_columns = [col for col in FINAL_COLUMNS if col in parquet.schema_arrow.names]
+    dictionaries = {facet: {} for facet in FACETS}
+
+    def encode(facet, name):
+        if not name:
+            return None
+        ids = dictionaries[facet]
+        return ids.setdefault(name, len(ids) + 1)
+
+    with _connect(tmp_path, read_only=False) as conn:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"CREATE TABLE works (rowid INTEGER PRIMARY KEY, {', '.join(FILTER_COLUMNS)})")
+        conn.execute(f"CREATE TABLE work_institutions (work_id INTEGER, institution INTEGER, {', '.join(FILTER_COLUMNS)})")
+        conn.execute(f"CREATE TABLE work_details (rowid INTEGER PRIMARY KEY, {', '.join(map(_quote, detail_columns))})")
+        for facet in FACETS:
+            conn.execute(f"CREATE TABLE {facet} (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute(f"CREATE VIRTUAL TABLE works_text USING fts5({', '.join(TEXT_COLUMNS)}, "
+                     f"content='', tokenize='{TEXT_TOKENIZER}')")
+
+        rowid = 0
+        for batch in parquet.iter_batches(batch_size=BUILD_BATCH_SIZE, columns=detail_columns):
+            data = {name: batch.column(name).to_pylist() for name in detail_columns}
+            missing = [None] * batch.num_rows
+            rowids = range(rowid + 1, rowid + batch.num_rows + 1)
+            rowid += batch.num_rows
+
+            works = list(zip(
+                rowids,
+                (encode('journals', name) for name in data.get(FACETS['journals'][0], missing)),
+                (encode('topics', _topic_name(value)) for value in data.get(FACETS['topics'][0], missing)),
+                *(data.get(column, missing) for column in METRIC_COLUMNS.values())))
+            conn.executemany(f"INSERT INTO works VALUES ({', '.join('?' * (len(FILTER_COLUMNS) + 1))})", works)
+            conn.executemany(f"INSERT INTO work_institutions VALUES ({', '.join('?' * (len(FILTER_COLUMNS) + 2))})",
+                             ((work[0], encode('institutions', name), *work[1:])
+                              for work, names in zip(works, data.get(FACETS['institutions'][0], missing)) if names
+                              for name in set(names.split('; ')) if name))
+            conn.executemany(f"INSERT INTO work_details VALUES ({', '.join('?' * (len(detail_columns) + 1))})",
+                             zip(rowids, *(data[col] for col in detail_columns)))
+            conn.executemany(f"INSERT INTO works_text (rowid, {', '.join(TEXT_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                             zip(rowids, data.get('title', missing), data.get('Abstract', missing),
+                                 map(_keyword_names, data.get('Keywords(Scores)', missing))))
+
+        for facet, ids in dictionaries.items():
+            conn.executemany(f"INSERT INTO {facet} VALUES (?, ?)", ((i, name) for name, i in ids.items()))
+            conn.execute(f"CREATE UNIQUE INDEX idx_{facet}_name ON {facet} (name)")
+        # 데이터를 모두 넣은 뒤에 인덱스를 만드는 편이 훨씬 빠릅니다.
+        # 인덱스는 값 목록(IN) 필터처럼 고르는 행이 적은 조건에만 쓰고, 범위 조건은 좁은 테이블을 그대로 훑습니다.
+        conn.execute("CREATE INDEX idx_works_journal ON works (journal)")
+        conn.execute("CREATE INDEX idx_works_topic ON works (topic)")
+        conn.execute("CREATE INDEX idx_work_institutions ON work_institutions (institution, work_id)")
+        conn.execute("CREATE INDEX idx_work_institutions_work ON work_institutions (work_id)")
+        # 배치마다 생긴 전문 검색 색인 조각을 하나로 합쳐 검색 시 읽는 양을 줄입니다.
+        conn.execute("INSERT INTO works_text (works_text) VALUES ('optimize')")
+        conn.execute("ANALYZE")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    os.replace(tmp_path, db_path)
+    return rowid
+
+
+def ensure_index(parquet_path: str, db_path: str) -> bool:
+    """데이터베이스가 없거나, 정제 결과보다 오래되었거나, 테이블 구성이 이전 버전이면 다시 만듭니다. 새로 만들었으면 True."""
+    if os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(parquet_path):
+        with _connect(db_path) as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                return False
+    build_index(parquet_path, db_path)
+    return True
+
+
+def _phrase(keyword: str) -> str:
+    """키워드를 FTS5 구문(phrase)으로 감쌉니다. 입력에 붙은 따옴표는 떼고, 하이픈 등 특수 문자는 구문 안에서 그대로 단어 구분자로 처리됩니다."""
+    return '"' + keyword.strip().strip('"').replace('"', '""') + '"'
+
+
+def text_match(or_keywords: list, and_keywords: list = None, search_mode: str = 'broad'):
+    """
+    prepare_params의 키워드 목록을 url_builder와 같은 의미의 FTS5 검색식으로 바꿉니다. 키워드가 없으면 None.
+    예) 넓게 검색, OR [MRAM, "spin torque"], AND [device] -> ("MRAM" OR "spin torque") AND {title abstract} : ("device")
+    """
+    def scoped(columns, expression):
+        # 모든 컬럼에서 찾을 때는 컬럼 지정을 생략합니다. (지정하면 걸린 위치마다 컬럼을 확인해 느려집니다)
+        return expression if set(columns) == set(TEXT_COLUMNS) else f"{{{' '.join(columns)}}} : {expression}"
+
+    parts = []
+    if or_keywords:
+        parts.append(scoped(SEARCH_MODE_COLUMNS[search_mode], f"({' OR '.join(map(_phrase, or_keywords))})"))
+    for keyword in and_keywords or []:
+        parts.append(scoped(AND_KEYWORD_COLUMNS, f"({_phrase(keyword)})"))
+    return " AND ".join(parts) or None
+
+
+def terms_outside_harvest(harvest_or_keywords: list, or_keywords: list) -> list:
+    """
+    수집할 때의 OR 키워드에 없던 키워드 목록. 이런 키워드로만 찾을 수 있는 논문은 수집 데이터에 없으므로
+    로컬 검색 결과가 일부일 수 있고, 해당 키워드만 API에서 더 받아야 합니다.
+    """
+    collected = {k.strip('"').lower() for k in harvest_or_keywords}
+    return [k for k in or_keywords if k.strip('"').lower() not in collected]
+
+
+def _source(table: str, filters: dict) -> str:
+    """
+    조회할 테이블(별칭 w)의 FROM 절. 전문 검색 조건이 있으면 검색 색인에서 걸린 논문부터 읽어 테이블을 조인합니다.
+    (테이블을 훑으며 논문마다 검색 결과에 있는지 확인하는 것보다 몇 배 빠릅니다)
+    """
+    if not filters.get('text_query'):
+        return f"{table} w"
+    id_column = 'work_id' if table == 'work_institutions' else 'rowid'
+    return f"works_text JOIN {table} w ON w.{id_column} = works_text.rowid"
+
+
+def _where(filters: dict, exclude: str = None) -> tuple:
+    """
+    필터 조건을 works 또는 work_institutions(별칭 w)에 대한 WHERE 절과 파라미터로 바꿉니다.
+    exclude로 지정한 패싯 조건은 빼고 만듭니다. (패싯별 건수는 자기 자신의 선택을 뺀 조건으로 세어야 여러 값을 골라 넓힐 수 있습니다)
+
+    filters 키: year_range(시작, 끝), journals, institutions, topics(이름 목록),
+               min_citations, min_fwci, min_percentile(하한), top_10, top_1(True이면 해당 논문만),
+               text_query(text_match가 만든 전문 검색식)
+    전문 검색 조건(works_text MATCH)은 _source가 검색 색인을 조인한 경우에만 쓸 수 있습니다.
+
+    범위/플래그 조건은 컬럼 앞에 '+'를 붙여 인덱스를 쓰지 않게 합니다. 많은 행이 걸리는 조건을 인덱스로 찾으면
+    행마다 테이블을 다시 찾아가야 해서, 좁은 테이블을 한 번 훑는 것보다 몇 배 느립니다.
+    """
+    clauses, params = [], []
+    if filters.get('year_range'):
+        clauses.append("+w.publication_year BETWEEN ? AND ?")
+        params += list(filters['year_range'])
+    for facet, column in (('journals', 'journal'), ('topics', 'topic'), ('institutions', None)):
+        names = filters.get(facet)
+        if not names or facet == exclude:
+            continue
+        ids = f"SELECT id FROM {facet} WHERE name IN ({', '.join('?' * len(names))})"
+        if column:
+            clauses.append(f"w.{column} IN ({ids})")
+        else:
+            clauses.append(f"w.rowid IN (SELECT work_id FROM work_institutions WHERE institution IN ({ids}))")
+        params += list(names)
+    if filters.get('text_query'):
+        clauses.append("works_text MATCH ?")
+        params.append(filters['text_query'])
+    for key, column in (('min_citations', 'cited_by_count'), ('min_fwci', 'fwci'), ('min_percentile', 'percentile')):
+        if filters.get(key):
+            clauses.append(f"+w.{column} >= ?")
+            params.append(filters[key])
+    for key in ('top_10', 'top_1'):
+        if filters.get(key):
+            clauses.append(f"+w.{key} = 1")
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def summary(db_path: str) -> dict:
+    """필터 위젯의 범위를 정하는 데 쓰는 전체 건수와 연도/피인용 수 범위."""
+    with _connect(db_path) as conn:
+        total, min_year, max_year, max_cited = conn.execute(
+            "SELECT COUNT(*), MIN(publication_year), MAX(publication_year), MAX(cited_by_count) FROM works").fetchone()
+    return {"total": total, "min_year": min_year, "max_year": max_year, "max_cited_by_count": max_cited or 0}
+
+
+def facet_counts(db_path: str, facet: str, filters: dict, limit: int = FACET_LIMIT) -> pd.DataFrame:
+    """현재 필터(해당 패싯 제외) 안에서 패싯 값별 논문 수를 많은 순으로 돌려줍니다. 컬럼: value, count"""
+    if facet == 'institutions':
+        # 연결 테이블에 필터 컬럼이 함께 있으므로 works와 조인하지 않고 셉니다.
+        source, column = _source("work_institutions", filters), "institution"
+    else:
+        source, column = _source("works", filters), {'journals': 'journal', 'topics': 'topic'}[facet]
+    where, params = _where(filters, exclude=facet)
+    # 조건이 없으면 그룹 컬럼의 인덱스만 훑어 세고(커버링 인덱스), 조건이 있으면 '+'를 붙여
+    # 정렬된 인덱스를 따라가며 행마다 테이블을 다시 찾는 계획 대신 테이블을 한 번 훑게 합니다.
+    group = f"+w.{column}" if where else f"w.{column}"
+    sql = (f"SELECT n.name AS value, c.count FROM ("
+           f"SELECT {group} AS id, COUNT(*) AS count FROM {source} {where} "
+           f"GROUP BY {group} HAVING id IS NOT NULL ORDER BY count DESC LIMIT ?"
+           f") c JOIN {facet} n ON n.id = c.id ORDER BY c.count DESC")
+    with _connect(db_path) as conn:
+        return pd.read_sql_query(sql, conn, params=params + [limit])
+
+
+def all_facet_counts(db_path: str, filters: dict, limit: int = FACET_LIMIT) -> dict:
+    """모든 패싯의 값별 논문 수를 동시에 셉니다. (SQLite는 조회 중에 GIL을 놓으므로 연결별로 병렬 실행됩니다)"""
+    with ThreadPoolExecutor(max_workers=len(FACETS)) as executor:
+        return dict(zip(FACETS, executor.map(lambda facet: facet_counts(db_path, facet, filters, limit), FACETS)))
+
+
+def query_page(db_path: str, filters: dict, sort_by: str = 'cited_by_count', descending: bool = True,
+               page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> tuple:
+    """
+    조건에 맞는 논문 중 page번째 페이지(1부터)만 읽어 (데이터프레임, 전체 건수)를 돌려줍니다.
+    정렬과 페이지 선택은 좁은 works 테이블에서 하고, 화면에 보일 행의 전체 컬럼만 work_details에서 가져옵니다.
+    값이 없는 행은 정렬 방향과 관계없이 뒤에 둡니다.
+    """
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"지원하지 않는 정렬 기준입니다: {sort_by}")
+    source, (where, params) = _source("works", filters), _where(filters)
+    direction = "DESC" if descending else "ASC"
+    with _connect(db_path) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+        rowids = [row[0] for row in conn.execute(
+            f"SELECT w.rowid FROM {source} {where} ORDER BY +w.{sort_by} {direction} NULLS LAST, w.rowid LIMIT ? OFFSET ?",
+            params + [page_size, (page - 1) * page_size])]
+        if not rowids:
+            return pd.DataFrame(), total
+        details = pd.read_sql_query(
+            f"SELECT * FROM work_details WHERE rowid IN ({', '.join('?' * len(rowids))})", conn, params=rowids)
+    details = details.set_index('rowid').loc[rowids].reset_index(drop=True)
+    return storage.apply_column_types(details), total
@@ -0,0 +1,63 @@
+# modules/reporter.py
+import streamlit as st
+
+
+class Reporter:
+    """
+    수집/정제 중 진행 상황과 메시지를 알리는 곳. 기본 구현은 아무것도 표시하지 않습니다.
+    (벤치마크, 스크립트 직접 실행 등 화면이 없는 곳에서 사용)
+
+    cancelled()가 True를 돌려주면 수집 함수는 다음 페이지를 받기 전에 멈추고 체크포인트를 남긴 채 False를 돌려줍니다.
+    """
+
+    def info(self, message: str):
+        pass
+
+    def success(self, message: str):
+        pass
+
+    def warning(self, message: str):
+        pass
+
+    def error(self, message: str):
+        pass
+
+    def write(self, message: str):
+        pass
+
+    def progress(self, fraction: float, text: str):
+        """진행률(0~1)과 현재 상태 문구를 갱신합니다."""
+        pass
+
+    def cancelled(self) -> bool:
+        return False
+
+
+class StreamlitReporter(Reporter):
+    """Streamlit 스크립트 실행 중에 화면에 바로 출력합니다. (프로그레스 바는 처음 갱신할 때 만듭니다)"""
+
+    def __init__(self):
+        self._progress_bar = None
+        self._status_text = None
+
+    def info(self, message: str):
+        st.info(message)
+
+    def success(self, message: str):
+        st.success(message)
+
+    def warning(self, message: str):
+        st.warning(message)
+
+    def error(self, message: str):
+        st.error(message)
+
+    def write(self, message: str):
+        st.write(message)
+
+    def progress(self, fraction: float, text: str):
+        if self._progress_bar is None:
+            self._progress_bar = st.progress(0)
+            self._status_text = st.empty()
+        self._progress_bar.progress(fraction)
+        self._status_text.text(text)
@@ -0,0 +1,237 @@
+# modules/storage.py
+import hashlib
+import json
+import math
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+REFINED_FILENAME = "refined_data.parquet"
+RAW_COMPRESSION = "zstd"
+PARQUET_COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 50_000
+
+# 정제 결과에서 항상 숫자/불리언으로 저장할 컬럼 (나머지는 값에 따라 정함: _storage_dtype)
+TYPED_COLUMNS = {
+    'publication_year': 'Int64',
+    'cited_by_count': 'Int64',
+    'fwci': 'Float64',
+    'Citation_Percentile': 'Float64',
+    'Is_Top_1_Percent': 'boolean',
+    'Is_Top_10_Percent': 'boolean',
+}
+
+
+# object 컬럼의 값 종류(pandas.api.types.infer_dtype)별 저장 타입. 여기에 없는 종류(섞인 값 등)는 문자열입니다.
+_INFERRED_DTYPES = {
+    'empty': None,               # 전부 결측 (뒤 청크에서 값이 나오면 그 타입으로 정함)
+    'string': 'string',
+    'boolean': 'boolean',
+    'integer': 'Int64',
+    'floating': 'Float64',
+    'mixed-integer-float': 'Float64',
+}
+
+
+def _to_str(value):
+    """결측값은 None으로, 딕셔너리/리스트는 JSON 문자열로, 그 외 값은 문자열로 바꿉니다."""
+    if value is None or isinstance(value, str):
+        return value
+    if value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if hasattr(value, 'tolist'):
+        value = value.tolist()  # Parquet에서 읽은 리스트(numpy 배열) 등
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def _storage_dtype(col, series: pd.Series):
+    """
+    컬럼을 저장할 pandas nullable 타입을 정합니다. TYPED_COLUMNS는 고정 타입,
+    그 외 컬럼은 숫자/불리언 값으로만 이루어져 있으면 그 타입을 유지하고 섞인 값이 있으면 문자열로 저장합니다.
+    전부 결측인 object 컬럼은 None(아직 정할 수 없음)을 돌려줍니다.
+    """
+    if col in TYPED_COLUMNS:
+        return TYPED_COLUMNS[col]
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'boolean'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'Int64'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'Float64'
+    if dtype == object:
+        return _INFERRED_DTYPES.get(pd.api.types.infer_dtype(series, skipna=True), 'string')
+    return 'string'
+
+
+def _common_dtype(current, new):
+    """두 청크의 저장 타입을 모두 담을 수 있는 타입. (정수와 실수는 실수로, 그 밖에 다르면 문자열로)"""
+    if current == new or new is None:
+        return current
+    if current is None:
+        return new
+    if {current, new} == {'Int64', 'Float64'}:
+        return 'Float64'
+    return 'string'
+
+
+def _coerce(series: pd.Series, dtype) -> pd.Series:
+    """series를 _storage_dtype이 정한 타입으로 바꿉니다."""
+    if dtype is None:
+        return pd.Series([None] * len(series), index=series.index, dtype=object)
+    if dtype == 'string':
+        if not isinstance(series.dtype, pd.StringDtype):
+            series = series.map(_to_str)
+        return series.astype('string')
+    if dtype == 'boolean':
+        return series.astype('boolean')
+    return pd.to_numeric(series, errors='coerce').astype(dtype)
+
+
+def _column_dtypes(df: pd.DataFrame) -> dict:
+    return {col: _storage_dtype(col, df[col]) for col in df.columns}
+
+
+def apply_column_types(df: pd.DataFrame, dtypes: dict = None) -> pd.DataFrame:
+    """
+    컬럼을 저장 타입(dtypes, 없으면 값으로 추정)으로 맞춥니다. 숫자/불리언 컬럼은 nullable 타입으로 유지하고,
+    값의 종류가 섞인 컬럼만 문자열로 바꾸어 Parquet 스키마를 만들 수 있게 합니다.
+    """
+    dtypes = dtypes if dtypes is not None else _column_dtypes(df)
+    return pd.DataFrame({col: _coerce(df[col], dtypes[col]) for col in df.columns}, index=df.index)
+
+
+def _schema_of(dtypes: dict) -> pa.Schema:
+    """저장 타입으로 빈 데이터프레임을 만들어 Arrow 스키마(판다스 타입 정보 포함)를 구합니다."""
+    empty = pd.DataFrame({col: pd.Series([], dtype=object if dtype is None else dtype) for col, dtype in dtypes.items()})
+    return pa.Schema.from_pandas(empty, preserve_index=False)
+
+
+def _to_table(df: pd.DataFrame, dtypes: dict = None, schema: pa.Schema = None) -> pa.Table:
+    """정제 결과를 저장 타입에 맞춰 Arrow 테이블로 바꿉니다."""
+    return pa.Table.from_pandas(apply_column_types(df, dtypes), schema=schema, preserve_index=False)
+
+
+def save_refined(df: pd.DataFrame, path: str):
+    """정제된 데이터프레임을 타입이 지정된 Parquet 파일로 저장합니다."""
+    tmp_path = f"{path}.tmp"
+    pq.write_table(_to_table(df), tmp_path, compression=PARQUET_COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+class RefinedParquetWriter:
+    """
+    청크 단위로 정제된 데이터프레임을 하나의 Parquet 파일에 이어 쓰는 작성기.
+    첫 청크의 컬럼 구성과 타입을 스키마로 정하고, 이후 청크는 그 스키마에 맞춥니다.
+    뒤 청크에서 처음 나타난 컬럼은 덧붙이고, 타입이 달라진 컬럼(정수 뒤에 실수 등)은
+    두 타입을 모두 담을 수 있는 타입으로 넓힙니다. (_widen)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.writer = None
+        self.schema = None
+        self.dtypes = None
+        self.widen_count = 0
+
+    def write(self, df: pd.DataFrame):
+        chunk_dtypes = _column_dtypes(df)
+        if self.writer is None:
+            self.dtypes = chunk_dtypes
+            self.schema = _schema_of(self.dtypes)
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression=PARQUET_COMPRESSION)
+        dtypes = {col: _common_dtype(dtype, chunk_dtypes.get(col)) for col, dtype in self.dtypes.items()}
+        dtypes.update((col, dtype) for col, dtype in chunk_dtypes.items() if col not in dtypes)
+        if dtypes != self.dtypes:
+            self._widen(dtypes)
+        df = df.reindex(columns=list(self.dtypes))
+        self.writer.write_table(_to_table(df, self.dtypes, self.schema), row_group_size=ROW_GROUP_SIZE)
+
+    def _widen(self, dtypes: dict):
+        """
+        스키마를 dtypes로 바꿉니다. 쓰는 도중인 Parquet 파일은 스키마를 바꿀 수 없으므로,
+        지금까지 쓴 행을 새 타입으로 바꾸고 새 컬럼은 빈 값으로 채워 새 임시 파일로 옮겨 쓴 뒤 그 파일에 이어 씁니다.
+        """
+        schema = _schema_of(dtypes)
+        self.writer.close()
+        self.widen_count += 1
+        tmp_path = f"{self.path}.{self.widen_count}.tmp"
+        writer = pq.ParquetWriter(tmp_path, schema, compression=PARQUET_COMPRESSION)
+        try:
+            with pq.ParquetFile(self.tmp_path) as written:
+                for batch in written.iter_batches(batch_size=ROW_GROUP_SIZE):
+                    written_df = batch.to_pandas().reindex(columns=list(dtypes))
+                    writer.write_table(_to_table(written_df, dtypes, schema), row_group_size=ROW_GROUP_SIZE)
+        except BaseException:
+            writer.close()
+            os.remove(tmp_path)
+            raise
+        os.remove(self.tmp_path)
+        self.tmp_path, self.writer = tmp_path, writer
+        self.schema, self.dtypes = schema, dtypes
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.path)
+            self.writer = None
+
+    def abort(self):
+        """쓰던 임시 파일을 지우고 끝냅니다. (path는 건드리지 않음)"""
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(self.tmp_path)
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_refined(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    저장된 Parquet을 메모리 맵으로 읽습니다. columns를 지정하면 해당 컬럼만 읽습니다.
+    JSON을 다시 파싱하거나 정제 단계를 다시 실행할 필요가 없습니다.
+    """
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def harvest_id(path: str) -> str:
+    """
+    저장된 정제 결과 파일을 식별하는 ID. 파일이 다시 저장되면(새 수집) 값이 바뀌므로
+    내보내기 등 정제 결과에서 파생되는 파일의 캐시 키로 사용합니다.
+    """
+    stat = os.stat(path)
+    payload = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def compress_raw(jsonl_path: str, remove_original: bool = True) -> str:
+    """원본 JSONL을 zstd로 압축해 '<파일명>.zst'로 저장하고 그 경로를 돌려줍니다."""
+    compressed_path = f"{jsonl_path}.zst"
+    tmp_path = f"{compressed_path}.tmp"
+    with open(jsonl_path, 'rb') as src, pa.CompressedOutputStream(tmp_path, RAW_COMPRESSION) as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+    os.replace(tmp_path, compressed_path)
+    if remove_original:
+        os.remove(jsonl_path)
+    return compressed_path
+
+
+def decompress_raw(compressed_path: str, jsonl_path: str) -> str:
+    """compress_raw로 압축한 원본을 JSONL로 복원합니다."""
+    with pa.CompressedInputStream(pa.OSFile(compressed_path), RAW_COMPRESSION) as src, open(jsonl_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+    return jsonl_path
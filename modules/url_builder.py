@@ -1,5 +1,10 @@
 # modules/url_builder.py
 from urllib.parse import quote
+from modules.fields import WORK_FIELDS, REFERENCE_FIELDS
+
+def split_keywords(keywords_input: str) -> list:
+    """쉼표로 구분한 키워드 입력을 목록으로 나눕니다. (빈 항목 제외)"""
+    return [k.strip() for k in keywords_input.split(',') if k.strip()]
 
 def prepare_params(
     email: str,
@@ -7,25 +12,39 @@ def prepare_params(
     and_keywords_input: str,
     start_year: int,
     end_year: int,
-    include_types_values: list = None
+    include_types_values: list = None,
+    lean: bool = False,
+    with_references: bool = False
 ):
     """
     Streamlit UI의 원본 입력값들을 받아,
     API 쿼리 함수에 바로 전달할 수 있는 깔끔한 딕셔너리로 변환합니다.
+    lean=True이면 data_processor가 사용하는 필드(fields.WORK_FIELDS)만 받도록 select를 지정합니다.
+    with_references=True이면 인용 네트워크 확장에 필요한 referenced_works도 select에 넣습니다.
     """
-    or_keywords = [k.strip() for k in or_keywords_input.split(',') if k.strip()]
-    and_keywords = [k.strip() for k in and_keywords_input.split(',') if k.strip()]
+    or_keywords = split_keywords(or_keywords_input)
+    and_keywords = split_keywords(and_keywords_input)
     year_range = f"{start_year}-{end_year}"
+    select_fields = None
+    if lean:
+        select_fields = WORK_FIELDS + REFERENCE_FIELDS if with_references else WORK_FIELDS
 
     return {
         "email": email,
         "or_keywords": or_keywords,
         "and_keywords": and_keywords,
         "year_range": year_range,
-        "include_types": include_types_values
+        "include_types": include_types_values,
+        "select_fields": select_fields
     }
 
-def create_broad_query(email, or_keywords, and_keywords=None, year_range=None, include_types=None):
+def _append_select(url, select_fields):
+    """select_fields가 있으면 서버 측 필드 선택(select=) 파라미터를 붙입니다."""
+    if not select_fields:
+        return url
+    return f"{url}&select={','.join(select_fields)}"
+
+def create_broad_query(email, or_keywords, and_keywords=None, year_range=None, include_types=None, select_fields=None, from_updated_date=None):
     """[넓게 검색] OR 조건을 default.search로 검색합니다."""
     filters = []
     base_url = "https://api.openalex.org/works"
@@ -40,11 +59,13 @@ def create_broad_query(email, or_keywords, and_keywords=None, year_range=None, i
         filters.append(f"type:{'|'.join(include_types)}")
     if year_range:
         filters.append(f"publication_year:{year_range}")
+    if from_updated_date:
+        filters.append(f"from_updated_date:{from_updated_date}")
     final_filter_string = ",".join(filters)
     encoded_filter = quote(final_filter_string)
-    return f"{base_url}?filter={encoded_filter}&mailto={email}"
+    return _append_select(f"{base_url}?filter={encoded_filter}&mailto={email}", select_fields)
 
-def create_precise_query(email, or_keywords, and_keywords=None, year_range=None, include_types=None):
+def create_precise_query(email, or_keywords, and_keywords=None, year_range=None, include_types=None, select_fields=None, from_updated_date=None):
     """[정확하게 검색] OR 조건을 title_and_abstract.search로 검색합니다."""
     filters = []
     base_url = "https://api.openalex.org/works"
@@ -59,6 +80,32 @@ def create_precise_query(email, or_keywords, and_keywords=None, year_range=None,
         filters.append(f"type:{'|'.join(include_types)}")
     if year_range:
         filters.append(f"publication_year:{year_range}")
+    if from_updated_date:
+        filters.append(f"from_updated_date:{from_updated_date}")
     final_filter_string = ",".join(filters)
     encoded_filter = quote(final_filter_string)
-    return f"{base_url}?filter={encoded_filter}&mailto={email}"
\ No newline at end of file
+    return _append_select(f"{base_url}?filter={encoded_filter}&mailto={email}", select_fields)
+
+def split_into_shards(params: dict, by_year: bool = True, by_type: bool = False) -> list:
+    """
+    prepare_params가 만든 딕셔너리를 연도별(그리고 선택적으로 문서 유형별)로 나누어,
+    서로 겹치지 않는 여러 개의 파라미터 딕셔너리 리스트로 돌려줍니다.
+    각 샤드는 create_broad_query/create_precise_query에 그대로 넘길 수 있습니다.
+    """
+    year_values = [params.get("year_range")]
+    if by_year and params.get("year_range"):
+        start, _, end = params["year_range"].partition('-')
+        year_values = [str(y) for y in range(int(start), int(end or start) + 1)]
+
+    type_values = [params.get("include_types")]
+    if by_type and params.get("include_types"):
+        type_values = [[t] for t in params["include_types"]]
+
+    shards = []
+    for year in year_values:
+        for types in type_values:
+            shard = dict(params)
+            shard["year_range"] = year
+            shard["include_types"] = types
+            shards.append(shard)
+    return shards
@@ -0,0 +1,119 @@
+"""
+리팩터링 전 정제 구현(refine_authors의 iterrows + df.at, 주제/초록/백분위/저널의 apply와 정렬 기반 초록 복원)을
+그대로 옮겨 둔 참조 코드입니다. 현재 구현의 출력이 바뀌지 않았는지 테스트에서 비교하고,
+benchmarks.run에서 기준 시간을 재는 용도로만 사용합니다.
+"""
+import pandas as pd
+
+
+def refine_authors_iterrows(df: pd.DataFrame) -> pd.DataFrame:
+    """authorships 컬럼을 정제하여 저자/기관 관련 6개 컬럼을 추가합니다."""
+    print("-> 저자/기관 정보 정제 중...")
+    new_cols = ['First_Author_Name', 'First_Author_Institution', 'Corresponding_Author_Names',
+                'Corresponding_Institution_Names', 'All_Authors', 'All_Institutions']
+    for col in new_cols:
+        df[col] = ''
+
+    for index, row in df.iterrows():
+        try:
+            authorships = row.get('authorships', [])
+            if not isinstance(authorships, list): continue
+
+            corr_ids = row.get('corresponding_author_ids', [])
+            first_author_name, first_author_institution = '', ''
+            corr_author_names, all_author_names = [], []
+            corr_institution_names, all_institution_names = set(), set()
+
+            for author_info in authorships:
+                author_id = author_info.get('author', {}).get('id')
+                author_name = author_info.get('author', {}).get('display_name', '')
+                institutions = author_info.get('institutions', [])
+                inst_names_str = "; ".join(sorted([inst.get('display_name', '') for inst in institutions if inst.get('display_name')]))
+
+                if author_name: all_author_names.append(author_name)
+                if inst_names_str:
+                    for inst_name in inst_names_str.split('; '): all_institution_names.add(inst_name)
+
+                if author_info.get('author_position') == 'first':
+                    first_author_name, first_author_institution = author_name, inst_names_str
+
+                if corr_ids and author_id in corr_ids:
+                    corr_author_names.append(author_name)
+                    if inst_names_str:
+                        for inst_name in inst_names_str.split('; '): corr_institution_names.add(inst_name)
+
+            df.at[index, 'First_Author_Name'] = first_author_name
+            df.at[index, 'First_Author_Institution'] = first_author_institution
+            df.at[index, 'Corresponding_Author_Names'] = "; ".join(sorted(corr_author_names))
+            df.at[index, 'Corresponding_Institution_Names'] = "; ".join(sorted(list(corr_institution_names)))
+            df.at[index, 'All_Authors'] = "; ".join(all_author_names)
+            df.at[index, 'All_Institutions'] = "; ".join(sorted(list(all_institution_names)))
+        except Exception as e:
+            print(f"경고: 저자 정보 처리 중 에러 (index: {index}): {e}")
+            continue
+    return df
+
+
+def refine_topics_and_keywords_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """topics, primary_topic, keywords 컬럼을 정제합니다."""
+    print("-> 주제/키워드 정보 정제 중...")
+
+    def format_item(item_dict):
+        try:
+            if not isinstance(item_dict, dict): return ""
+            name = item_dict.get('display_name', 'N/A')
+            score = round(item_dict.get('score', 0), 3)
+            return f"{name} ({score})"
+        except Exception: return ""
+
+    df['Primary_Topic(Score)'] = df['primary_topic'].apply(format_item)
+    df['Top_Topics(Scores)'] = df['topics'].apply(lambda lst: "; ".join([format_item(t) for t in lst]) if isinstance(lst, list) else "")
+    df['Keywords(Scores)'] = df['keywords'].apply(lambda lst: "; ".join([format_item(k) for k in sorted(lst, key=lambda x: x.get('score', 0), reverse=True)]) if isinstance(lst, list) else "")
+    return df
+
+
+def reconstruct_abstract_sorted(inverted_index):
+    try:
+        if not isinstance(inverted_index, dict): return ""
+        indexed_words = sorted([(idx, word) for word, indices in inverted_index.items() for idx in indices])
+        return " ".join([word for idx, word in indexed_words])
+    except Exception: return ""
+
+
+def refine_abstract_sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """abstract_inverted_index를 복원하여 Abstract 컬럼을 추가합니다."""
+    print("-> 초록 정보 복원 중...")
+    df['Abstract'] = df['abstract_inverted_index'].apply(reconstruct_abstract_sorted)
+    return df
+
+
+def refine_percentile_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """citation_normalized_percentile을 정제하여 3개 컬럼을 추가합니다."""
+    print("-> 인용 백분위 정보 정제 중...")
+    def extract_info(p_dict):
+        try:
+            if not isinstance(p_dict, dict): return None, None, None
+            return p_dict.get('value'), p_dict.get('is_in_top_1_percent'), p_dict.get('is_in_top_10_percent')
+        except Exception: return None, None, None
+    (df['Citation_Percentile'], df['Is_Top_1_Percent'], df['Is_Top_10_Percent']) = zip(*df['citation_normalized_percentile'].apply(extract_info))
+    return df
+
+
+def refine_journal_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """primary_location을 정제하여 저널/출판사 관련 3개 컬럼을 추가합니다."""
+    print("-> 저널/출판사 정보 정제 중...")
+    def extract_info(loc_dict):
+        try:
+            if not isinstance(loc_dict, dict): return None, None, None
+            source = loc_dict.get('source', {}) or {}
+            return source.get('display_name'), source.get('host_organization_name'), source.get('issn_l')
+        except Exception: return None, None, None
+    (df['Journal_Name'], df['Publisher'], df['ISSN-L']) = zip(*df['primary_location'].apply(extract_info))
+    return df
+
+
+def refine_content_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """리팩터링 전 파이프라인 순서대로 주제/키워드, 초록, 인용 백분위, 저널 정제를 적용합니다."""
+    for refine in (refine_topics_and_keywords_apply, refine_abstract_sorted, refine_percentile_apply, refine_journal_apply):
+        df = refine(df)
+    return df
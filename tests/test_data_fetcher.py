@@ -0,0 +1,59 @@
+"""cursor 수집이 마지막 페이지에서 바로 멈추고(빈 페이지를 더 요청하지 않음) 이어받기도 올바른지 확인합니다."""
+import json
+import math
+
+import pytest
+
+from benchmarks.mock_server import MockOpenAlexServer
+from modules import data_fetcher
+from modules.reporter import Reporter
+
+
+def _lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('size', [1, 150, 400, 401])
+def test_cursor_fetch_makes_no_extra_request(tmp_path, size):
+    path = str(tmp_path / "raw.jsonl")
+    with MockOpenAlexServer(size) as server:
+        assert data_fetcher.fetch_and_save_incrementally(f"{server.works_url}?mailto=t@example.com", path,
+                                                         reporter=Reporter())
+    assert server.requests == math.ceil(size / data_fetcher.MAX_PER_PAGE)
+    assert len(_lines(path)) == size
+
+
+def test_sharded_fetch_makes_no_extra_request_per_shard(tmp_path):
+    path = str(tmp_path / "raw.jsonl")
+    with MockOpenAlexServer(1000) as server:
+        urls = [f"{server.works_url}?filter=publication_year:{year}&mailto=t@example.com" for year in range(2015, 2020)]
+        shard_counts = [data_fetcher.get_client().get_json(f"{url}&per-page=1")['meta']['count'] for url in urls]
+        requests_before = server.requests
+        assert data_fetcher.fetch_sharded_and_save(urls, path, max_workers=2, reporter=Reporter())
+    expected = sum(max(1, math.ceil(count / data_fetcher.MAX_PER_PAGE)) for count in shard_counts)
+    assert server.requests - requests_before == expected
+    assert len(_lines(path)) == sum(shard_counts)
+
+
+class _CancelAfter(Reporter):
+    def __init__(self, pages):
+        self.pages = pages
+
+    def progress(self, fraction, text):
+        self.pages -= 1
+
+    def cancelled(self):
+        return self.pages <= 0
+
+
+def test_resumed_cursor_fetch_stops_at_count(tmp_path):
+    path = str(tmp_path / "raw.jsonl")
+    with MockOpenAlexServer(400) as server:
+        url = f"{server.works_url}?mailto=t@example.com"
+        assert not data_fetcher.fetch_and_save_incrementally(url, path, reporter=_CancelAfter(1))
+        assert data_fetcher.fetch_and_save_incrementally(url, path, reporter=Reporter())
+    # 취소 전 1페이지 + 이어받은 1페이지 (결과가 per-page의 배수여도 빈 페이지를 요청하지 않음)
+    assert server.requests == 2
+    assert [w['id'] for w in _lines(path)] == list(dict.fromkeys(w['id'] for w in _lines(path)))
+    assert len(_lines(path)) == 400
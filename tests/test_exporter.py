@@ -0,0 +1,51 @@
+"""exporter의 엑셀 셀 길이 제한 처리를 확인합니다."""
+import pandas as pd
+from openpyxl import load_workbook
+
+from modules import exporter, storage
+
+
+def _refined(tmp_path, abstracts):
+    path = str(tmp_path / "refined.parquet")
+    storage.save_refined(pd.DataFrame({'id': [f'W{i}' for i in range(len(abstracts))], 'Abstract': abstracts}), path)
+    return path
+
+
+def test_oversize_parts_counts_cells_per_column(tmp_path):
+    limit = exporter.EXCEL_CELL_LIMIT
+    path = _refined(tmp_path, ['a' * (limit + 1), 'short', None, 'b' * (2 * limit + 5)])
+    assert exporter._oversize_parts(path) == {'Abstract': 3}
+
+
+def test_split_export_spreads_long_values_over_columns(tmp_path):
+    limit = exporter.EXCEL_CELL_LIMIT
+    long_value = 'x' * limit + 'y' * 10
+    path = _refined(tmp_path, [long_value, 'short'])
+    output_path, report = exporter.export(path, str(tmp_path / "out"), 'xlsx', oversize='split')
+
+    assert report == {'Abstract': {'cells': 1, 'max_length': limit + 10}}
+    rows = list(load_workbook(output_path, read_only=True)['Sheet1'].values)
+    assert rows[0] == ('id', 'Abstract', 'Abstract_2')
+    assert rows[1][1] + rows[1][2] == long_value
+    assert rows[2][:2] == ('W1', 'short')
+
+
+def test_limits_count_utf16_code_units(tmp_path):
+    limit = exporter.EXCEL_CELL_LIMIT
+    # 이모지는 UTF-16에서 2단위이므로 코드 포인트 수는 제한 이하여도 엑셀 제한은 넘습니다.
+    emoji_value = '😀' * (limit // 2 + 1)
+    path = _refined(tmp_path, [emoji_value, 'short'])
+    assert exporter._oversize_parts(path) == {'Abstract': 2}
+
+    output_path, report = exporter.export(path, str(tmp_path / "split"), 'xlsx', oversize='split')
+    assert report == {'Abstract': {'cells': 1, 'max_length': limit + 1}}
+    rows = list(load_workbook(output_path, read_only=True)['Sheet1'].values)
+    assert rows[1][1] + rows[1][2] == emoji_value
+    # 서로게이트 쌍을 가르지 않으므로 첫 조각은 제한보다 한 단위 짧습니다.
+    assert [exporter._excel_length(piece) for piece in rows[1][1:]] == [limit - 1, 2]
+
+    output_path, _ = exporter.export(path, str(tmp_path / "truncate"), 'xlsx', oversize='truncate')
+    truncated = list(load_workbook(output_path, read_only=True)['Sheet1'].values)[1][1]
+    assert truncated.endswith(exporter.TRUNCATION_MARKER)
+    assert exporter._excel_length(truncated) <= limit
+    assert emoji_value.startswith(truncated[:-len(exporter.TRUNCATION_MARKER)])
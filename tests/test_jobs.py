@@ -0,0 +1,69 @@
+"""작업 취소/삭제/다시 실행이 작업을 제출한 세션으로 제한되는지 확인합니다."""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from modules import jobs
+
+
+def _failed_job(jobs_dir, job_id, owner):
+    workspace = os.path.join(jobs_dir, job_id)
+    os.makedirs(workspace)
+    spec = {"params": {}, "search_mode": "broad", "cache_key": "k", "cache_query": {}, "cache_action": "fresh",
+            "run_options": {'overlap_refine': False, 'parallel_refine': False, 'profile': False,
+                            'expand_citations': False}}
+    with open(os.path.join(workspace, jobs.SPEC_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+    jobs.Job(workspace, {"id": job_id, "created_at": jobs._now(), "label": job_id, "inputs": {}, "owner": owner,
+                         "messages": [], "rows": None}).update(status='failed', resumable=True)
+
+
+def _wait(runner, job_id):
+    while runner.get(job_id).status in jobs.ACTIVE_STATUSES:
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = jobs.JobRunner(str(tmp_path), max_workers=1)
+    yield runner
+    runner._executor.shutdown(wait=True)
+
+
+def test_only_owner_can_resume_and_delete(tmp_path, runner):
+    _failed_job(str(tmp_path), "job-a", owner="alice")
+
+    with pytest.raises(ValueError):
+        runner.resume("job-a", refine_only=True, owner="bob")
+    assert not runner.delete("job-a", owner="bob")
+    assert runner.get("job-a").status == 'failed'
+
+    runner.resume("job-a", refine_only=True, owner="alice")
+    _wait(runner, "job-a")
+    assert runner.delete("job-a", owner="alice")
+    assert runner.get("job-a") is None
+
+
+def test_only_owner_can_cancel_and_double_resume_is_rejected(tmp_path, runner):
+    _failed_job(str(tmp_path), "job-a", owner="alice")
+    blocker = threading.Event()
+    runner._executor.submit(blocker.wait)   # 작업이 대기열에 머물도록 작업자를 붙잡아 둡니다.
+    try:
+        runner.resume("job-a", refine_only=True, owner="alice")
+        with pytest.raises(ValueError):
+            runner.resume("job-a", refine_only=True, owner="alice")
+        assert not runner.cancel("job-a", owner="bob")
+        assert runner.cancel("job-a", owner="alice")
+    finally:
+        blocker.set()
+    _wait(runner, "job-a")
+    assert runner.get("job-a").status == 'cancelled'
+
+
+def test_jobs_without_owner_stay_manageable(tmp_path, runner):
+    _failed_job(str(tmp_path), "legacy", owner=None)
+    assert runner.get("legacy").owned_by("anyone")
+    assert runner.delete("legacy", owner="anyone")
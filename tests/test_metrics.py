@@ -0,0 +1,52 @@
+"""동시에 실행되는 작업의 성능 분석 단계가 프로세스 전체의 tracemalloc을 서로 끄지 않는지 확인합니다."""
+import threading
+import tracemalloc
+
+from modules import metrics
+
+
+def test_concurrent_profiled_stages_share_tracemalloc(tmp_path):
+    assert not tracemalloc.is_tracing()
+    run_a = metrics.RunMetrics(str(tmp_path / "a_report.json"), profile=True)
+    run_b = metrics.RunMetrics(str(tmp_path / "b_report.json"), profile=True)
+    b_started, b_finished = threading.Event(), threading.Event()
+    tracing_after_b = []
+
+    def stage_b():
+        try:
+            with run_b.stage('refine'):
+                b_started.set()
+                b_data = bytearray(2 * 1024 ** 2)
+                del b_data
+        finally:
+            b_started.set()
+            b_finished.set()
+
+    with run_a.stage('fetch') as record_a:
+        thread = threading.Thread(target=stage_b)
+        thread.start()
+        assert b_started.wait(10) and b_finished.wait(10)
+        tracing_after_b.append(tracemalloc.is_tracing())
+        a_data = bytearray(8 * 1024 ** 2)
+        del a_data
+    thread.join()
+
+    # B가 먼저 끝나도 A의 측정은 계속되고, 마지막 단계가 끝나면 tracemalloc을 끕니다.
+    assert tracing_after_b == [True]
+    assert not tracemalloc.is_tracing()
+    assert record_a.traced_peak_mb >= 8
+    assert record_a.traced_shared and run_b.stages[0].traced_shared
+    assert record_a.process_peak_rss_mb > 0
+
+
+def test_single_profiled_stage_is_not_shared():
+    run = metrics.RunMetrics(profile=True)
+    with run.stage('refine') as record:
+        data = bytearray(4 * 1024 ** 2)
+        del data
+    with run.stage('export') as later:
+        pass
+    assert record.traced_shared is False and record.traced_peak_mb >= 4
+    # 다음 단계는 앞 단계의 최대값을 이어받지 않습니다.
+    assert later.traced_peak_mb < 4
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,85 @@
+"""OverlappedRefiner가 저장한 결과가 process_and_refine_data와 같은지, 작업 스레드가 항상 멈추는지 확인합니다."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import make_work
+from modules import data_processor, storage
+
+
+def _pages(records, page_size):
+    return [records[i:i + page_size] for i in range(0, len(records), page_size)]
+
+
+def _corpus(tmp_path, records):
+    path = tmp_path / "raw.jsonl"
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records), encoding='utf-8')
+    return str(path)
+
+
+def _records():
+    records = [make_work(i) for i in range(120)]
+    # 묶음마다 값의 종류가 달라지는 경우: 한 묶음 전체가 비어 있는 지표, 뒤에서 처음 나오는 필드, 중복 id
+    for work in records[:40]:
+        work['fwci'] = None
+        work['citation_normalized_percentile'] = None
+    records[70]['extra_field'] = {'nested': [1, 2]}
+    records[90]['extra_scalar'] = 3
+    records += [dict(records[5], title="중복"), dict(records[100], title="중복")]
+    return records
+
+
+@pytest.mark.parametrize('batch_size, page_size', [(40, 20), (1, 7), (10_000, 50)])
+def test_matches_process_and_refine_data(tmp_path, batch_size, page_size):
+    records = _records()
+    expected_path = str(tmp_path / "expected.parquet")
+    storage.save_refined(data_processor.process_and_refine_data(_corpus(tmp_path, records)), expected_path)
+    output_path = str(tmp_path / "overlapped.parquet")
+
+    with data_processor.OverlappedRefiner(output_path, batch_size=batch_size, drop_raw=False) as refiner:
+        for page in _pages(records, page_size):
+            refiner.on_page(page)
+        rows = refiner.finish()
+
+    assert rows == 120
+    pd.testing.assert_frame_equal(storage.load_refined(output_path), storage.load_refined(expected_path))
+
+
+def test_drops_raw_columns_by_default(tmp_path):
+    output_path = str(tmp_path / "overlapped.parquet")
+    with data_processor.OverlappedRefiner(output_path, batch_size=40) as refiner:
+        for page in _pages(_records(), 25):
+            refiner.on_page(page)
+        assert refiner.finish() == 120
+    columns = set(storage.load_refined(output_path).columns)
+    assert 'Abstract' in columns and 'authorships' not in columns and 'extra_scalar' in columns
+    assert os.listdir(tmp_path) == ["overlapped.parquet"]
+
+
+def test_close_stops_worker_and_removes_partial_file(tmp_path):
+    refiner = data_processor.OverlappedRefiner(str(tmp_path / "out.parquet"), batch_size=10, max_pending_pages=2)
+    for page in _pages([make_work(i) for i in range(50)], 10):
+        refiner.on_page(page)
+    refiner.close()
+    assert not refiner.thread.is_alive()
+    refiner.close()   # 여러 번 불러도 됩니다.
+    with pytest.raises(RuntimeError):
+        refiner.finish()
+    assert os.listdir(tmp_path) == []
+
+
+def test_context_manager_stops_worker_when_fetch_fails(tmp_path):
+    with pytest.raises(ConnectionError):
+        with data_processor.OverlappedRefiner(str(tmp_path / "out.parquet")) as refiner:
+            refiner.on_page([make_work(0)])
+            raise ConnectionError("수집 실패")
+    assert not refiner.thread.is_alive()
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_finish_writes_nothing(tmp_path):
+    with data_processor.OverlappedRefiner(str(tmp_path / "out.parquet")) as refiner:
+        assert refiner.finish() == 0
+    assert os.listdir(tmp_path) == []
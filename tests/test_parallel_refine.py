@@ -0,0 +1,46 @@
+"""병렬 정제가 구간별 Parquet을 합쳐 process_and_refine_data와 같은 내용을 저장하는지 확인합니다."""
+import json
+import os
+
+import pandas as pd
+
+from benchmarks.corpus import make_work
+from modules import data_processor, storage
+
+
+def test_parallel_refine_matches_single_process(tmp_path):
+    records = [make_work(i) for i in range(300)]
+    records[250]['late_field'] = 'x'
+    # 서로 다른 구간에 걸친 중복 id (첫 번째 레코드 유지)
+    records += [dict(records[3], title="중복"), dict(records[150], title="중복")]
+    jsonl_path = tmp_path / "raw.jsonl"
+    jsonl_path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records), encoding='utf-8')
+
+    expected_path = str(tmp_path / "expected.parquet")
+    storage.save_refined(data_processor.process_and_refine_data(str(jsonl_path)), expected_path)
+    output_path = str(tmp_path / "parallel.parquet")
+    rows = data_processor.process_and_refine_data_parallel(str(jsonl_path), output_path, workers=2, drop_raw=False)
+
+    assert rows == 300
+    pd.testing.assert_frame_equal(storage.load_refined(output_path), storage.load_refined(expected_path))
+    # 구간별 임시 파일은 남지 않습니다.
+    assert sorted(os.listdir(tmp_path)) == ["expected.parquet", "parallel.parquet", "raw.jsonl"]
+
+
+def test_parallel_refine_drops_raw_columns_by_default(tmp_path):
+    jsonl_path = tmp_path / "raw.jsonl"
+    jsonl_path.write_text("".join(json.dumps(make_work(i)) + "\n" for i in range(40)), encoding='utf-8')
+    output_path = str(tmp_path / "parallel.parquet")
+
+    assert data_processor.process_and_refine_data_parallel(str(jsonl_path), output_path, workers=2) == 40
+    columns = storage.load_refined(output_path).columns
+    consumed = {col for _, cols in data_processor.REFINE_STEPS for col in cols}
+    assert consumed and not consumed & set(columns)
+    assert 'Abstract' in columns and 'id' in columns
+
+
+def test_parallel_refine_empty_file(tmp_path):
+    jsonl_path = tmp_path / "raw.jsonl"
+    jsonl_path.write_text("", encoding='utf-8')
+    assert data_processor.process_and_refine_data_parallel(str(jsonl_path), str(tmp_path / "out.parquet")) == 0
+    assert not (tmp_path / "out.parquet").exists()
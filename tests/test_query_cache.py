@@ -0,0 +1,49 @@
+"""query_cache의 만료는 fetched_at, 용량 정리는 last_accessed 기준인지 확인합니다."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules import query_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_cache, 'CACHE_DIR', str(tmp_path / "cache"))
+    return tmp_path
+
+
+def _store(tmp_path, key, fetched_days_ago, accessed_days_ago):
+    jsonl_path = tmp_path / f"{key}.jsonl"
+    jsonl_path.write_text('{"id": "W1"}\n', encoding='utf-8')
+    query_cache.store(key, {"or_keywords": [key]}, str(jsonl_path))
+    meta = query_cache._read_meta(key)
+    now = datetime.now()
+    meta['fetched_at'] = (now - timedelta(days=fetched_days_ago)).isoformat(timespec='seconds')
+    meta['last_accessed'] = (now - timedelta(days=accessed_days_ago)).isoformat(timespec='seconds')
+    query_cache._write_meta(key, meta)
+
+
+def test_frequently_read_cache_still_expires(cache_dir):
+    _store(cache_dir, 'stale', fetched_days_ago=query_cache.CACHE_TTL_DAYS + 1, accessed_days_ago=0)
+    assert query_cache.lookup('stale') is None
+    assert query_cache._read_meta('stale') is None
+
+
+def test_rarely_read_cache_is_valid_until_ttl(cache_dir):
+    _store(cache_dir, 'fresh', fetched_days_ago=1, accessed_days_ago=query_cache.CACHE_TTL_DAYS + 1)
+    assert query_cache.lookup('fresh')['key'] == 'fresh'
+
+
+def test_evict_expires_by_fetched_at_and_trims_by_last_accessed(cache_dir):
+    ttl = query_cache.CACHE_TTL_DAYS
+    _store(cache_dir, 'stale', fetched_days_ago=ttl + 1, accessed_days_ago=0)
+    _store(cache_dir, 'idle', fetched_days_ago=1, accessed_days_ago=ttl + 1)
+    _store(cache_dir, 'recent', fetched_days_ago=1, accessed_days_ago=0)
+
+    query_cache.evict()
+    assert query_cache._read_meta('stale') is None
+    assert query_cache.lookup('idle') and query_cache.lookup('recent')
+
+    query_cache.evict(max_bytes=query_cache._read_meta('recent')['size_bytes'])
+    assert query_cache._read_meta('idle') is None
+    assert query_cache.lookup('recent')
@@ -0,0 +1,77 @@
+"""refine_authors가 리팩터링 전 iterrows 구현과 같은 프레임을 만드는지 확인합니다."""
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import make_work
+from modules.data_processor import refine_authors
+from tests.baseline import refine_authors_iterrows
+
+
+def _author(author_id, name, position='middle', institutions=()):
+    return {
+        'author_position': position,
+        'author': {'id': author_id, 'display_name': name},
+        'institutions': [{'display_name': inst} for inst in institutions],
+    }
+
+
+MALFORMED_RECORDS = [
+    {'id': 'W-missing'},  # authorships 키 없음
+    {'id': 'W-none', 'authorships': None, 'corresponding_author_ids': None},
+    {'id': 'W-empty', 'authorships': [], 'corresponding_author_ids': []},
+    {'id': 'W-str', 'authorships': 'not a list', 'corresponding_author_ids': ['A1']},
+    {'id': 'W-no-inst', 'corresponding_author_ids': ['A1'],
+     'authorships': [_author('A1', 'Kim', 'first'), _author('A2', 'Lee', 'last', institutions=[])]},
+    {'id': 'W-blank-inst', 'corresponding_author_ids': ['A2'],
+     'authorships': [_author('A1', 'Kim', 'first', ['']),
+                     {'author_position': 'last', 'author': {'id': 'A2', 'display_name': 'Lee'},
+                      'institutions': [{'id': 'I1'}, {'display_name': 'Seoul Univ'}]}]},
+    {'id': 'W-dup-corr', 'corresponding_author_ids': ['A2', 'A2', 'A1', 'A1'],
+     'authorships': [_author('A1', 'Kim', 'first', ['Seoul Univ', 'KAIST']),
+                     _author('A2', 'Lee', 'last', ['KAIST'])]},
+    {'id': 'W-corr-none', 'corresponding_author_ids': None,
+     'authorships': [_author('A1', 'Kim', 'first', ['KAIST'])]},
+    {'id': 'W-semicolon-inst', 'corresponding_author_ids': ['A1'],
+     'authorships': [_author('A1', 'Kim', 'first', ['Dept. A; Univ B', 'Univ C'])]},
+    {'id': 'W-author-none', 'corresponding_author_ids': ['A1'],
+     'authorships': [{'author_position': 'first', 'author': None, 'institutions': []}]},
+    {'id': 'W-no-name', 'corresponding_author_ids': ['A1'],
+     'authorships': [{'author_position': 'first', 'author': {'id': 'A1'}, 'institutions': []},
+                     _author('A2', 'Lee')]},
+]
+
+
+def _compare(records):
+    current = refine_authors(pd.DataFrame(records))
+    expected = refine_authors_iterrows(pd.DataFrame(records))
+    pd.testing.assert_frame_equal(current, expected)
+
+
+@pytest.mark.parametrize('seed', [0, 7])
+def test_matches_iterrows_on_synthetic_works(seed):
+    _compare([make_work(i, seed=seed) for i in range(500)])
+
+
+def test_matches_iterrows_on_malformed_records():
+    _compare(MALFORMED_RECORDS)
+
+
+@pytest.mark.parametrize('record', MALFORMED_RECORDS, ids=[r['id'] for r in MALFORMED_RECORDS])
+def test_matches_iterrows_per_malformed_record(record):
+    _compare([record])
+
+
+def test_matches_iterrows_on_mixed_records():
+    records = [make_work(i) for i in range(50)]
+    records[5:5] = MALFORMED_RECORDS
+    _compare(records)
+
+
+def test_matches_iterrows_without_author_columns():
+    _compare([{'id': 'W1', 'title': 'a'}, {'id': 'W2', 'title': 'b'}])
+
+
+def test_matches_iterrows_on_empty_frame():
+    current = refine_authors(pd.DataFrame({'authorships': [], 'corresponding_author_ids': []}))
+    expected = refine_authors_iterrows(pd.DataFrame({'authorships': [], 'corresponding_author_ids': []}))
+    pd.testing.assert_frame_equal(current, expected)
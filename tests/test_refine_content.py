@@ -0,0 +1,47 @@
+"""주제/키워드, 초록, 인용 백분위, 저널 정제가 리팩터링 전 apply/정렬 구현과 같은 결과를 만드는지 확인합니다."""
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import make_work
+from modules import data_processor
+from tests import baseline
+
+ABSTRACTS = {
+    'contiguous': {'b': [1], 'a': [0, 2]},
+    'gaps': {'a': [0], 'b': [5], 'c': [2]},
+    'duplicate_positions': {'a': [0, 1], 'b': [1], 'c': [2]},
+    'empty_dict': {},
+    'empty_positions': {'a': [], 'b': []},
+    'negative': {'a': [-1], 'b': [0]},
+    'huge_index': {'a': [0], 'b': [10 ** 9]},
+    'non_integer': {'a': [0.5], 'b': [0]},
+    'positions_none': {'a': None},
+    'not_a_dict': 'a b c',
+    'none': None,
+}
+
+
+@pytest.mark.parametrize('inverted_index', ABSTRACTS.values(), ids=ABSTRACTS.keys())
+def test_reconstruct_abstract_matches_sorted(inverted_index):
+    assert data_processor._reconstruct_abstract(inverted_index) == baseline.reconstruct_abstract_sorted(inverted_index)
+
+
+def _records():
+    records = [make_work(i, seed=3) for i in range(200)]
+    for i, inverted_index in enumerate(ABSTRACTS.values()):
+        records[i]['abstract_inverted_index'] = inverted_index
+    records[20].update(primary_topic=None, topics='not a list', keywords=None)
+    records[21].update(primary_topic={'display_name': 'x'}, topics=[{'score': 0.5}, None],
+                       keywords=[{'display_name': 'k', 'score': 0.1}, {'display_name': 'm'}])
+    records[22].update(citation_normalized_percentile=None, primary_location=None)
+    records[23].update(citation_normalized_percentile={'value': 0.9}, primary_location={'source': None})
+    return records
+
+
+def test_refine_steps_match_apply_baseline():
+    current = pd.DataFrame(_records())
+    for refine in (data_processor.refine_topics_and_keywords, data_processor.refine_abstract,
+                   data_processor.refine_percentile, data_processor.refine_journal):
+        current = refine(current)
+    expected = baseline.refine_content_apply(pd.DataFrame(_records()))
+    pd.testing.assert_frame_equal(current, expected)
@@ -0,0 +1,73 @@
+"""동시에 실행되는 수집 작업이 공유 클라이언트를 쓰면서도 요청 통계를 따로 집계하는지 확인합니다."""
+import json
+import threading
+
+from benchmarks import corpus
+from benchmarks.mock_server import MockOpenAlexServer
+from modules import citations, data_fetcher, jobs
+from modules.http_client import RequestStats, get_client
+from modules.reporter import Reporter
+
+
+def test_concurrent_fetches_keep_separate_stats(tmp_path):
+    client_requests_before = get_client().stats.summary()['requests']
+    results = {}
+
+    def fetch(name, server, stats):
+        url = f"{server.works_url}?mailto=test@example.com"
+        results[name] = data_fetcher.fetch_and_save_incrementally(url, str(tmp_path / f"{name}.jsonl"),
+                                                                  reporter=Reporter(), stats=stats)
+
+    with MockOpenAlexServer(600, latency_ms=30) as server_a, MockOpenAlexServer(200, latency_ms=30) as server_b:
+        stats_a, stats_b = RequestStats(), RequestStats()
+        threads = [threading.Thread(target=fetch, args=('a', server_a, stats_a)),
+                   threading.Thread(target=fetch, args=('b', server_b, stats_b))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert results == {'a': True, 'b': True}
+    assert stats_a.summary()['requests'] == server_a.requests
+    assert stats_b.summary()['requests'] == server_b.requests
+    assert stats_a.summary()['requests'] > stats_b.summary()['requests']
+    # 클라이언트 전체 누적은 수집을 시작할 때 초기화되지 않습니다.
+    assert get_client().stats.summary()['requests'] - client_requests_before == server_a.requests + server_b.requests
+
+
+def test_sharded_fetch_collects_stats_from_all_shards(tmp_path):
+    stats = RequestStats()
+    with MockOpenAlexServer(400) as server:
+        urls = [f"{server.works_url}?filter=publication_year:{year}&mailto=test@example.com" for year in (2015, 2016)]
+        assert data_fetcher.fetch_sharded_and_save(urls, str(tmp_path / "sharded.jsonl"), max_workers=2,
+                                                   reporter=Reporter(), stats=stats)
+    assert stats.summary()['requests'] == server.requests
+
+
+def test_citation_lookup_keeps_separate_stats_during_fetch(tmp_path):
+    jsonl_path = tmp_path / "works.jsonl"
+    jsonl_path.write_text("".join(json.dumps(corpus.make_work(i)) + "\n" for i in range(40)), encoding='utf-8')
+    workspace = tmp_path / "citations"
+    workspace.mkdir()
+    fetch_stats, citation_stats = RequestStats(), RequestStats()
+
+    with MockOpenAlexServer(600, latency_ms=30) as fetch_server, \
+            MockOpenAlexServer(corpus.ID_OFFSET, latency_ms=30) as citation_server:
+        fetch_thread = threading.Thread(target=data_fetcher.fetch_and_save_incrementally, args=(
+            f"{fetch_server.works_url}?mailto=test@example.com", str(tmp_path / "fetch.jsonl")),
+            kwargs=dict(reporter=Reporter(), stats=fetch_stats))
+        fetch_thread.start()
+        summary = citations.expand_citations(str(jsonl_path), str(workspace), "test@example.com", 2, Reporter(),
+                                             works_url=citation_server.works_url, stats=citation_stats)
+        fetch_thread.join()
+
+    assert summary is not None and summary['external'] > 0
+    assert citation_stats.summary()['requests'] == citation_server.requests
+    assert fetch_stats.summary()['requests'] == fetch_server.requests
+
+
+def test_describe_year_range():
+    params = {'or_keywords': ['a', 'b', 'c', 'd'], 'and_keywords': ['x'], 'year_range': "2015-2024"}
+    assert jobs._describe(params) == "a, b, c 외 1개 + x (2015-2024)"
+    assert jobs._describe({'or_keywords': ['a']}) == "a"
+    assert jobs._describe({}) == "(검색어 없음)"
@@ -0,0 +1,99 @@
+"""storage.RefinedParquetWriter가 청크마다 달라지는 컬럼 구성을 잃지 않고 저장하는지 확인합니다."""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.corpus import make_work
+from modules import data_processor, storage
+
+
+def _write_chunks(path, chunks):
+    with storage.RefinedParquetWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(pd.DataFrame(chunk))
+    return storage.load_refined(path)
+
+
+def test_columns_first_seen_in_later_chunk_are_kept(tmp_path):
+    path = str(tmp_path / "refined.parquet")
+    df = _write_chunks(path, [
+        {'id': ['W1', 'W2'], 'title': ['a', 'b']},
+        {'id': ['W3'], 'title': ['c'], 'extra': ['x']},
+        {'id': ['W4'], 'late': ['y'], 'cited_by_count': [3]},
+    ])
+    assert df.columns.tolist() == ['id', 'title', 'extra', 'late', 'cited_by_count']
+    assert df['id'].tolist() == ['W1', 'W2', 'W3', 'W4']
+    assert df['title'].tolist()[:3] == ['a', 'b', 'c'] and pd.isna(df['title'].iloc[3])
+    assert df['extra'].isna().tolist() == [True, True, False, True]
+    assert df['late'].isna().tolist() == [True, True, True, False]
+    assert str(df['cited_by_count'].dtype) == 'Int64'
+    assert df['cited_by_count'].iloc[3] == 3
+    assert sorted(os.listdir(tmp_path)) == ["refined.parquet"]
+
+
+def test_failed_write_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / "refined.parquet")
+    with pytest.raises(RuntimeError):
+        with storage.RefinedParquetWriter(path) as writer:
+            writer.write(pd.DataFrame({'id': ['W1']}))
+            writer.write(pd.DataFrame({'id': ['W2'], 'extra': ['x']}))
+            raise RuntimeError("중단")
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunked_refine_keeps_raw_columns(tmp_path):
+    jsonl_path = tmp_path / "raw.jsonl"
+    records = [make_work(i) for i in range(30)]
+    records[25]['only_in_last_chunk'] = 'value'
+    jsonl_path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding='utf-8')
+    output_path = str(tmp_path / "refined.parquet")
+
+    rows = data_processor.process_and_refine_data_chunked(str(jsonl_path), output_path, chunk_size=10, drop_raw=False)
+    chunked = storage.load_refined(output_path)
+    expected = data_processor.process_and_refine_data(str(jsonl_path))
+
+    assert rows == len(expected) == 30
+    assert chunked.columns.tolist() == expected.columns.tolist()
+    assert chunked['only_in_last_chunk'].tolist()[25] == 'value'
+
+
+@pytest.mark.parametrize('first, later, expected, dtype', [
+    ([None, None], [1.5, 2.0], [None, None, 1.5, 2.0], 'Float64'),              # null 뒤에 실수
+    ([1, 2], [1.5], [1.0, 2.0, 1.5], 'Float64'),                                # 정수 뒤에 실수
+    ([True, False], ['x'], ['True', 'False', 'x'], 'string'),                   # 불리언 뒤에 문자열
+    (['a', 'b'], [3], ['a', 'b', '3'], 'string'),                               # 문자열 뒤에 정수
+    ([{'k': '값'}, None], [[1, 2]], ['{"k": "값"}', None, '[1, 2]'], 'string'),  # 중첩 값은 JSON
+])
+def test_heterogeneous_chunks_are_widened(tmp_path, first, later, expected, dtype):
+    path = str(tmp_path / "refined.parquet")
+    df = _write_chunks(path, [
+        {'id': [f'W{i}' for i in range(len(first))], 'value': first, 'fwci': [None] * len(first)},
+        {'id': ['W9'] * len(later), 'value': later, 'fwci': [0.5] * len(later)},
+    ])
+    assert [None if pd.isna(v) else v for v in df['value']] == expected
+    assert str(df['value'].dtype).startswith(dtype)
+    assert str(df['fwci'].dtype) == 'Float64'
+    assert df['fwci'].iloc[-1] == 0.5
+    assert sorted(os.listdir(tmp_path)) == ["refined.parquet"]
+
+
+def test_save_refined_keeps_native_types(tmp_path):
+    path = str(tmp_path / "refined.parquet")
+    storage.save_refined(pd.DataFrame({
+        'id': ['W1', 'W2'],
+        'count': [1, 2],
+        'ratio': [0.5, None],
+        'flag': [True, None],
+        'mixed': [1, 'a'],
+        'nested': [{'이름': 'x'}, ['a', 'b']],
+        'cited_by_count': [1, None],
+    }), path)
+    df = storage.load_refined(path)
+    assert str(df['count'].dtype) == 'Int64' and df['count'].tolist() == [1, 2]
+    assert str(df['ratio'].dtype) == 'Float64' and df['ratio'].iloc[0] == 0.5
+    assert str(df['flag'].dtype) == 'boolean' and df['flag'].iloc[0]
+    assert df['mixed'].tolist() == ['1', 'a']
+    assert df['nested'].tolist() == ['{"이름": "x"}', '["a", "b"]']
+    assert str(df['cited_by_count'].dtype) == 'Int64'